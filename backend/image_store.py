@@ -0,0 +1,191 @@
+# backend/image_store.py
+import os
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+import numpy as np
+
+from my_agent.image_io import load_working_image
+
+# Configuration (environment overridable)
+IMAGE_STORE_MEMORY_MB = float(os.getenv("IMAGE_STORE_MEMORY_MB", "256"))
+IMAGE_STORE_DISK_MB = float(os.getenv("IMAGE_STORE_DISK_MB", "2048"))
+IMAGE_STORE_DIR = os.getenv("IMAGE_STORE_DIR", os.path.join(tempfile.gettempdir(), "spatial_engine_images"))
+
+class ImageStore:
+    """
+    Upload-once store for vision audit photos.
+
+    Photos are identified by a content hash of the uploaded bytes. The decoded,
+    downscaled RGB array is kept in a byte-bounded LRU in memory, backed by an
+    on-disk tier of .npy files (also LRU, byte-bounded), so "Recalculate" can
+    re-render the overlay without re-uploading or re-decoding the photo.
+    The original (oriented) size is kept with each photo (source_size), so
+    lamp positions in original pixels can be mapped onto the working array.
+    """
+
+    def __init__(self, memory_mb: float = IMAGE_STORE_MEMORY_MB, disk_mb: float = IMAGE_STORE_DISK_MB,
+                 directory: str = IMAGE_STORE_DIR):
+        self.memory_budget = int(memory_mb * 1024 * 1024)
+        self.disk_budget = int(disk_mb * 1024 * 1024)
+        self.directory = directory
+
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._memory_bytes = 0
+        self._disk: "OrderedDict[str, int]" = OrderedDict()  # image_id -> file size
+        self._disk_bytes = 0
+        self._sizes: Dict[str, Tuple[int, int]] = {}  # image_id -> original (width, height), either tier
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "decodes": 0}
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._load_disk_index()
+
+    @staticmethod
+    def image_id_for(image_bytes: bytes) -> str:
+        return hashlib.sha256(image_bytes).hexdigest()[:32]
+
+    def _path(self, image_id: str) -> str:
+        return os.path.join(self.directory, f"{image_id}.npz")
+
+    def _load_disk_index(self):
+        """Rebuilds the disk LRU from existing files, oldest first."""
+        entries = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.endswith(".npz"):
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, name[:-4], stat.st_size))
+            elif name.endswith(".npy"):
+                try:
+                    os.remove(path)  # earlier format without the source size
+                except OSError:
+                    pass
+        for _, image_id, size in sorted(entries):
+            self._disk[image_id] = size
+            self._disk_bytes += size
+        self._evict_disk()
+
+    def put(self, image_bytes: bytes) -> str:
+        """
+        Registers an upload and returns its image_id.
+        Decodes (at working resolution) only if the photo is not stored yet.
+        """
+        image_id = self.image_id_for(image_bytes)
+        with self._lock:
+            if image_id in self._memory or image_id in self._disk:
+                return image_id
+
+        working = load_working_image(image_bytes)
+        image = np.asarray(working)
+        image.setflags(write=False)
+        source_size = tuple(working.info["source_size"])
+        with self._lock:
+            self._stats["decodes"] += 1
+            self._sizes[image_id] = source_size
+            self._remember(image_id, image)
+        self._write_disk(image_id, image, source_size)
+        return image_id
+
+    def get(self, image_id: str) -> Optional[np.ndarray]:
+        """Returns the decoded RGB array (read-only), or None if unknown/evicted."""
+        with self._lock:
+            image = self._memory.get(image_id)
+            if image is not None:
+                self._memory.move_to_end(image_id)
+                self._stats["memory_hits"] += 1
+                return image
+            on_disk = image_id in self._disk
+
+        if on_disk:
+            try:
+                with np.load(self._path(image_id)) as stored:
+                    image, source_size = stored["image"], tuple(int(v) for v in stored["source_size"])
+            except (OSError, ValueError, KeyError):
+                image = None
+            if image is not None:
+                image.setflags(write=False)
+                with self._lock:
+                    self._stats["disk_hits"] += 1
+                    self._sizes[image_id] = source_size
+                    if image_id in self._disk:
+                        self._disk.move_to_end(image_id)
+                    self._remember(image_id, image)
+                return image
+
+        with self._lock:
+            self._stats["misses"] += 1
+        return None
+
+    def source_size(self, image_id: str) -> Optional[Tuple[int, int]]:
+        """Original (width, height) of a stored photo, or None if unknown/evicted."""
+        with self._lock:
+            if image_id in self._sizes:
+                return self._sizes[image_id]
+            on_disk = image_id in self._disk
+        if not on_disk:
+            return None
+        try:
+            with np.load(self._path(image_id)) as stored:
+                source_size = tuple(int(v) for v in stored["source_size"])
+        except (OSError, ValueError, KeyError):
+            return None
+        with self._lock:
+            self._sizes[image_id] = source_size
+        return source_size
+
+    def _remember(self, image_id: str, image: np.ndarray):
+        """Inserts into the memory tier and evicts LRU entries over budget. Caller holds the lock."""
+        if image_id not in self._memory:
+            self._memory_bytes += image.nbytes
+        self._memory[image_id] = image
+        self._memory.move_to_end(image_id)
+        while self._memory_bytes > self.memory_budget and len(self._memory) > 1:
+            evicted_id, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted.nbytes
+            if evicted_id not in self._disk:
+                self._sizes.pop(evicted_id, None)
+
+    def _write_disk(self, image_id: str, image: np.ndarray, source_size: Tuple[int, int]):
+        path = self._path(image_id)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                np.savez(f, image=image, source_size=np.array(source_size))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"[IMAGE STORE]: Disk tier write failed ({e}); keeping memory copy only.")
+            return
+        size = os.path.getsize(path)
+        with self._lock:
+            if image_id not in self._disk:
+                self._disk_bytes += size
+            self._disk[image_id] = size
+            self._disk.move_to_end(image_id)
+            self._evict_disk()
+
+    def _evict_disk(self):
+        while self._disk_bytes > self.disk_budget and len(self._disk) > 1:
+            image_id, size = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            if image_id not in self._memory:
+                self._sizes.pop(image_id, None)
+            try:
+                os.remove(self._path(image_id))
+            except OSError:
+                pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(
+                self._stats,
+                memory_entries=len(self._memory),
+                memory_mb=round(self._memory_bytes / 1024 / 1024, 1),
+                disk_entries=len(self._disk),
+                disk_mb=round(self._disk_bytes / 1024 / 1024, 1)
+            )
+
+# Shared by the API process
+image_store = ImageStore()
@@ -1,8 +1,10 @@
-from fastapi import FastAPI, UploadFile, File, Form
+from fastapi import FastAPI, UploadFile, File, Form, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse, HTMLResponse, Response
+from fastapi.concurrency import run_in_threadpool
 from typing import Optional
+from contextlib import asynccontextmanager
 import json
 import os
 import sys
@@ -12,16 +14,29 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from my_agent.physics_engine import (
     calculate_lux_at_point, 
+    calculate_lux_batch,
+    calculate_lux_records,
     generate_optimization_report, 
     calculate_roi_and_savings, 
     check_health_compliance,
     generate_light_distribution_heatmap,
     generate_roi_chart,
     generate_consumption_chart,
-    overlay_heatmap_on_image
+    render_overlay
 )
 
-app = FastAPI(title="Spatial Engine AI API")
+from backend.render_service import render_service, RenderQueueFullError, RenderTimeoutError
+from my_agent.image_io import inspect_image, InvalidImageError, ImageTooLargeError, MAX_UPLOAD_BYTES
+from backend.image_store import image_store
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Spawn and warm up the chart render workers before serving traffic
+    render_service.start()
+    yield
+    render_service.shutdown()
+
+app = FastAPI(title="Spatial Engine AI API", lifespan=lifespan)
 
 # Enable CORS
 app.add_middleware(
@@ -32,21 +47,83 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+def _render_error(e: Exception) -> HTTPException:
+    """Maps render service failures to HTTP errors."""
+    if isinstance(e, RenderQueueFullError):
+        return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    return HTTPException(status_code=504, detail=str(e))
+
 # @app.get("/")
 # def read_root():
 #     return {"status": "Spatial Engine API Online", "version": "1.0.4"}
 
 @app.post("/api/lux-calculation")
-def api_calculate_lux(lumens: float, distance: float, angle: float = 120.0):
-    """Calculates Lux using the Physics Engine."""
+def api_calculate_lux(lumens: float, distance: float, angle: float = 120.0, render_mode: str = "publication"):
+    """
+    Calculates Lux using the Physics Engine.
+    render_mode: "publication" (matplotlib chart) or "fast" (raster heatmap, much lower latency).
+    """
     result = calculate_lux_at_point(lumens, distance, angle)
-    heatmap = generate_light_distribution_heatmap(lumens, distance, angle)
+    try:
+        heatmap = render_service.render(generate_light_distribution_heatmap, lumens, distance, angle, render_mode=render_mode)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except (RenderQueueFullError, RenderTimeoutError) as e:
+        raise _render_error(e)
     return {"lux": float(result), "heatmap_image": heatmap}
 
+BATCH_DTYPES = {"float32": "<f4", "float64": "<f8"}
+
+@app.post("/api/lux-calculation/batch")
+async def api_calculate_lux_batch(request: Request, dtype: str = "float64"):
+    """
+    Batch Lux calculation for many fixtures in one round trip.
+
+    Accepts either JSON:
+      - {"lumens": [...], "distance": [...], "angle": [...] | 120}
+      - {"records": [{"lumens": ..., "distance": ..., "angle": ...}, ...]}
+    or a compact binary body (Content-Type: application/octet-stream) of
+    little-endian `dtype` values laid out as (lumens, distance, angle) triples.
+
+    Binary requests get a binary response of the same dtype (one Lux value per triple);
+    JSON requests get {"count": n, "lux": [...]}.
+    """
+    import numpy as np
+
+    content_type = request.headers.get("content-type", "")
+    body = await request.body()
+
+    if content_type.startswith("application/octet-stream"):
+        if dtype not in BATCH_DTYPES:
+            raise HTTPException(status_code=400, detail=f"Unsupported dtype '{dtype}'. Use float32 or float64.")
+        np_dtype = np.dtype(BATCH_DTYPES[dtype])
+        if len(body) % (3 * np_dtype.itemsize) != 0:
+            raise HTTPException(status_code=400, detail="Binary body must contain whole (lumens, distance, angle) triples.")
+        triples = np.frombuffer(body, dtype=np_dtype).reshape(-1, 3)
+        lux = calculate_lux_batch(triples[:, 0], triples[:, 1], triples[:, 2])
+        return Response(content=lux.astype(np_dtype).tobytes(), media_type="application/octet-stream")
+
+    try:
+        payload = json.loads(body)
+        if "records" in payload:
+            lux = calculate_lux_records(payload["records"])
+        else:
+            lux = calculate_lux_batch(payload["lumens"], payload["distance"], payload.get("angle", 120))
+    except (ValueError, KeyError, TypeError) as e:
+        raise HTTPException(status_code=422, detail=f"Invalid batch payload: {e}")
+
+    return {"count": int(lux.size), "lux": lux.tolist()}
+
 @app.post("/api/optimization-report")
-def api_optimization_report(area: float, target_lux: int, current_lumens: int):
+def api_optimization_report(
+    area: float,
+    target_lux: int,
+    current_lumens: int,
+    measured_avg_lux: Optional[float] = None,
+    measured_min_lux: Optional[float] = None
+):
     """Generates an optimization strategy report."""
-    report_json = generate_optimization_report(area, target_lux, current_lumens)
+    report_json = generate_optimization_report(area, target_lux, current_lumens, measured_avg_lux, measured_min_lux)
     return json.loads(report_json)
 
 @app.post("/api/roi-analysis")
@@ -69,13 +146,14 @@ def api_roi_analysis(
     )
     roi_data = json.loads(roi_json)
     
-    # Generate Chart
-    chart = generate_roi_chart(old_watts, new_watts, price, hours, rate)
-    roi_data["roi_chart_image"] = chart
-    
-    # Generate Consumption Chart
-    consumption_chart = generate_consumption_chart(old_watts, new_watts, hours)
-    roi_data["consumption_chart_image"] = consumption_chart
+    # Render both charts in parallel on the render pool
+    try:
+        roi_future = render_service.submit(generate_roi_chart, old_watts, new_watts, price, hours, rate)
+        consumption_future = render_service.submit(generate_consumption_chart, old_watts, new_watts, hours)
+        roi_data["roi_chart_image"] = render_service.result(roi_future)
+        roi_data["consumption_chart_image"] = render_service.result(consumption_future)
+    except (RenderQueueFullError, RenderTimeoutError) as e:
+        raise _render_error(e)
     
     return roi_data
 
@@ -85,15 +163,12 @@ def api_health_check(lux: float, room_type: str = "office"):
     verdict = check_health_compliance(lux, room_type)
     return {"verdict": verdict, "compliant": "PASS" in verdict}
 
-@app.post("/api/spatial-audit")
-async def api_spatial_audit(file: UploadFile = File(...)):
-    """
-    Simulates a multimodal spatial audit.
-    In a real implementation, this would call the Gemini vision model.
-    """
-    # Read file for processing
-    contents = await file.read()
-    
+async def _render_spatial_audit(image_id: str) -> dict:
+    """Renders the audit overlay for a stored photo (compositing only, no decode)."""
+    image = await run_in_threadpool(image_store.get, image_id)
+    if image is None:
+        raise HTTPException(status_code=404, detail=f"Unknown or expired image_id '{image_id}'. Upload the photo again.")
+
     # Generate Overlay
     # Mocking Agent Decision: Placing lamps at logical points
     # Randomized to simulate "Recalculate" feature
@@ -101,11 +176,16 @@ async def api_spatial_audit(file: UploadFile = File(...)):
     num_lamps = random.randint(2, 4)
     mock_lamp_decisions = [(random.uniform(0.2, 0.8), random.uniform(0.2, 0.8)) for _ in range(num_lamps)]
     
-    overlay_b64 = overlay_heatmap_on_image(contents, lamp_positions=mock_lamp_decisions)
+    try:
+        overlay_b64 = await render_service.render_async(render_overlay, image, lamp_positions=mock_lamp_decisions,
+                                                        source_size=image_store.source_size(image_id))
+    except (RenderQueueFullError, RenderTimeoutError) as e:
+        raise _render_error(e)
 
     # Mock response mirroring the script.js logic for now
     return {
         "status": "success",
+        "image_id": image_id,
         "area_sqm": 18.5,
         "reflection": 0.45,
         "vision_data": {
@@ -116,6 +196,36 @@ async def api_spatial_audit(file: UploadFile = File(...)):
         }
     }
 
+@app.post("/api/spatial-audit")
+async def api_spatial_audit(file: UploadFile = File(...)):
+    """
+    Simulates a multimodal spatial audit.
+    In a real implementation, this would call the Gemini vision model.
+    The response carries an `image_id`; use it with the recalculate endpoint
+    instead of uploading the same photo again.
+    """
+    # Read file for processing (at most one byte past the limit)
+    contents = await file.read(MAX_UPLOAD_BYTES + 1)
+    try:
+        # Header-only check before decoding
+        inspect_image(contents)
+    except ImageTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except InvalidImageError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Decode once at working resolution (skipped if this photo is already stored)
+    try:
+        image_id = await run_in_threadpool(image_store.put, contents)
+    except (InvalidImageError, OSError) as e:
+        raise HTTPException(status_code=400, detail=f"Could not decode image: {e}")
+    return await _render_spatial_audit(image_id)
+
+@app.post("/api/spatial-audit/{image_id}/recalculate")
+async def api_spatial_audit_recalculate(image_id: str):
+    """Re-runs the audit design on a previously uploaded photo (overlay re-render only)."""
+    return await _render_spatial_audit(image_id)
+
 from backend.report_generator import ReportRequest, generate_html_report
 from fastapi.responses import HTMLResponse, Response
 from backend.pdf_generator import generate_pdf_report
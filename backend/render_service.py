@@ -0,0 +1,184 @@
+# backend/render_service.py
+import io
+import os
+import threading
+import importlib
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+# Configuration (environment overridable, e.g. per Cloud Run instance size)
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", "2"))
+RENDER_MAX_QUEUE = int(os.getenv("RENDER_MAX_QUEUE", "16"))
+RENDER_TIMEOUT_S = float(os.getenv("RENDER_TIMEOUT_S", "30"))
+RENDER_MAX_JOBS_PER_WORKER = int(os.getenv("RENDER_MAX_JOBS_PER_WORKER", "200"))
+
+class RenderQueueFullError(RuntimeError):
+    """Raised when the render queue is at capacity (caller should shed load / retry)."""
+
+class RenderTimeoutError(TimeoutError):
+    """Raised when a render job exceeds its timeout."""
+
+def _warm_worker(preload_modules: tuple):
+    """
+    Process initializer: import matplotlib with the Agg backend, load the font cache
+    and draw one tiny figure so the first real job pays no import/setup cost.
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from matplotlib import font_manager
+
+    font_manager.fontManager.findfont("DejaVu Sans")
+    fig, ax = plt.subplots(figsize=(1, 1))
+    ax.set_title("warm-up")
+    fig.savefig(io.BytesIO(), format='png')
+    plt.close(fig)
+
+    for module in preload_modules:
+        importlib.import_module(module)
+
+def _worker_ready() -> int:
+    return os.getpid()
+
+class RenderService:
+    """
+    Pre-warmed process pool for the matplotlib chart generators.
+
+    - pyplot runs in worker processes, off the API threadpool and outside its GIL.
+    - Queue depth is bounded: submit() fails fast with RenderQueueFullError.
+    - Each job has a timeout (RenderTimeoutError); the slot is only freed when
+      the job really finishes, so the bound stays honest.
+    - Workers are recycled after `max_jobs_per_worker` jobs to cap leaked memory.
+    - workers=0 renders inline on the caller's thread (tests, debugging).
+    """
+
+    def __init__(
+        self,
+        workers: int = RENDER_WORKERS,
+        max_queue: int = RENDER_MAX_QUEUE,
+        timeout_s: float = RENDER_TIMEOUT_S,
+        max_jobs_per_worker: int = RENDER_MAX_JOBS_PER_WORKER,
+        preload_modules: tuple = ("my_agent.physics_engine",)
+    ):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.timeout_s = timeout_s
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.preload_modules = preload_modules
+
+        self._pool = None
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_queue)
+        self._stats = {"submitted": 0, "completed": 0, "failed": 0, "rejected": 0, "timeouts": 0}
+
+    def start(self):
+        """Creates the pool and spawns all workers up front (idempotent)."""
+        if self.workers <= 0:
+            return
+        with self._lock:
+            if self._pool is not None:
+                return
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_warm_worker,
+                initargs=(self.preload_modules,),
+                max_tasks_per_child=self.max_jobs_per_worker
+            )
+            pool = self._pool
+        # One concurrent no-op per worker forces every process to spawn and warm up now
+        warmups = [pool.submit(_worker_ready) for _ in range(self.workers)]
+        for f in warmups:
+            f.result()
+        print(f"[RENDER SERVICE]: {self.workers} workers ready.")
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        """
+        Queues fn(*args, **kwargs) on the pool. fn must be importable at module level.
+        Raises RenderQueueFullError when max_queue jobs are already pending/running.
+        """
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._stats["rejected"] += 1
+            raise RenderQueueFullError(f"Render queue full ({self.max_queue} jobs in flight).")
+
+        with self._lock:
+            self._stats["submitted"] += 1
+
+        try:
+            if self.workers <= 0:
+                future = Future()
+                try:
+                    future.set_result(fn(*args, **kwargs))
+                except Exception as e:
+                    future.set_exception(e)
+            else:
+                future = self._submit_to_pool(fn, *args, **kwargs)
+        except Exception:
+            self._slots.release()
+            raise
+
+        future.add_done_callback(self._on_done)
+        return future
+
+    def _submit_to_pool(self, fn, *args, **kwargs) -> Future:
+        self.start()
+        try:
+            return self._pool.submit(fn, *args, **kwargs)
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM-killed): replace the pool once and retry
+            print("[RENDER SERVICE]: Pool broken, restarting workers...")
+            with self._lock:
+                broken, self._pool = self._pool, None
+            if broken is not None:
+                broken.shutdown(wait=False, cancel_futures=True)
+            self.start()
+            return self._pool.submit(fn, *args, **kwargs)
+
+    def _on_done(self, future: Future):
+        self._slots.release()
+        with self._lock:
+            if future.cancelled() or future.exception() is not None:
+                self._stats["failed"] += 1
+            else:
+                self._stats["completed"] += 1
+
+    def result(self, future: Future, timeout_s: float = None):
+        """Waits for a submitted job. Raises RenderTimeoutError after the timeout."""
+        try:
+            return future.result(timeout=timeout_s or self.timeout_s)
+        except FutureTimeoutError:
+            future.cancel()  # Only effective if the job has not started yet
+            with self._lock:
+                self._stats["timeouts"] += 1
+            raise RenderTimeoutError(f"Render job exceeded {timeout_s or self.timeout_s}s.")
+
+    def render(self, fn, *args, timeout_s: float = None, **kwargs):
+        """Submits and waits: the blocking equivalent of calling fn directly."""
+        return self.result(self.submit(fn, *args, **kwargs), timeout_s)
+
+    async def render_async(self, fn, *args, timeout_s: float = None, **kwargs):
+        """Awaitable render for async endpoints; never blocks the event loop."""
+        import asyncio
+        future = self.submit(fn, *args, **kwargs)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout=timeout_s or self.timeout_s)
+        except asyncio.TimeoutError:
+            future.cancel()
+            with self._lock:
+                self._stats["timeouts"] += 1
+            raise RenderTimeoutError(f"Render job exceeded {timeout_s or self.timeout_s}s.")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats, workers=self.workers, max_queue=self.max_queue)
+
+# Shared by the API process
+render_service = RenderService()
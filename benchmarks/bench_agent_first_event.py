@@ -0,0 +1,100 @@
+# benchmarks/bench_agent_first_event.py
+"""
+Time to first event of the spatial agent: fresh session service + session + Runner
+per call (the old call_agent_async) vs. the warmed RunnerPool.
+
+The LLM is an offline stub registered for "stub-gemini" model names. Like Gemini,
+it builds a real google.genai Client in a cached `api_client` property, so the
+per-call model/client construction that string model names cause is measured
+for real; no network is used and the response is a fixed text part.
+
+Usage: python benchmarks/bench_agent_first_event.py [calls]   (default: 20)
+"""
+import sys
+import os
+import io
+import time
+import asyncio
+import warnings
+import statistics
+import contextlib
+from functools import cached_property
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'my_agent'))
+warnings.filterwarnings("ignore")
+
+from google.adk.models import BaseLlm, LlmResponse
+from google.adk.models.registry import LLMRegistry
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import Client, types
+
+with contextlib.redirect_stdout(io.StringIO()):
+    from agent import root_agent, APP_NAME
+from runner_registry import RunnerPool
+
+class StubGemini(BaseLlm):
+    @classmethod
+    def supported_models(cls):
+        return [r"stub-gemini.*"]
+
+    @cached_property
+    def api_client(self) -> Client:
+        return Client(api_key="offline-benchmark")
+
+    async def generate_content_async(self, llm_request, stream=False):
+        self.api_client
+        yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text="Room looks fine.")]))
+
+LLMRegistry.register(StubGemini)
+
+def message(i: int) -> types.Content:
+    return types.Content(role="user", parts=[types.Part(text=f"Audit request {i}: 20 sqm office, one 800 lm bulb.")])
+
+async def first_event_ms(events, start: float) -> float:
+    async for _ in events:
+        elapsed = (time.perf_counter() - start) * 1000
+        break
+    async for _ in events:  # drain the rest of the turn
+        pass
+    return elapsed
+
+async def fresh_call(agent, i: int) -> float:
+    start = time.perf_counter()
+    session_service = InMemorySessionService()
+    await session_service.create_session(app_name=APP_NAME, user_id="engineer_01", session_id="session_v1")
+    runner = Runner(agent=agent, app_name=APP_NAME, session_service=session_service)
+    return await first_event_ms(runner.run_async(user_id="engineer_01", session_id="session_v1",
+                                                 new_message=message(i)), start)
+
+async def pooled_call(pool: RunnerPool, i: int) -> float:
+    start = time.perf_counter()
+    user_id = f"engineer_{i % 4:02d}"
+    session_id = await pool.session_id_for(user_id)
+    return await first_event_ms(pool.run_async(user_id, session_id, message(i)), start)
+
+def report(label: str, samples: list):
+    rest = samples[1:] or samples
+    print(f"{label:<28}{samples[0]:>10.2f}{statistics.median(rest):>10.2f}{max(rest):>10.2f}")
+
+async def main(calls: int):
+    fresh_agent = root_agent.clone(update={"model": "stub-gemini"})
+    pooled_agent = root_agent.clone(update={"model": "stub-gemini"})
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        fresh = [await fresh_call(fresh_agent, i) for i in range(calls)]
+
+        pool = RunnerPool(pooled_agent, APP_NAME)
+        start = time.perf_counter()
+        await pool.warm_up()
+        warmup_ms = (time.perf_counter() - start) * 1000
+        pooled = [await pooled_call(pool, i) for i in range(calls)]
+
+    print(f"--- AGENT TIME TO FIRST EVENT ({calls} sequential calls, ms) ---")
+    print(f"{'mode':<28}{'first':>10}{'median':>10}{'max':>10}")
+    report("fresh runner per call", fresh)
+    report("pooled runner (warmed)", pooled)
+    print(f"pool warm-up at process start: {warmup_ms:.1f} ms; {pool.stats()}")
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 20))
@@ -0,0 +1,54 @@
+# benchmarks/bench_heatmap_render.py
+"""
+Compares the two floor heatmap render modes of generate_light_distribution_heatmap:
+latency per call and encoded output size.
+
+Usage: python benchmarks/bench_heatmap_render.py [iterations]
+"""
+import sys
+import os
+import time
+import base64
+import statistics
+import contextlib
+import io
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'my_agent'))
+
+from physics_engine import generate_light_distribution_heatmap, HEATMAP_RENDER_MODES
+
+def bench_mode(mode: str, iterations: int) -> dict:
+    # Warm-up: imports, font cache and the unit-kernel cache are not part of the steady state
+    with contextlib.redirect_stdout(io.StringIO()):
+        generate_light_distribution_heatmap(800, 2.5, 120, render_mode=mode)
+
+    timings = []
+    sizes = []
+    for i in range(iterations):
+        lumens = 500 + 50 * i  # vary lumens: same kernel, different field
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            img_b64 = generate_light_distribution_heatmap(lumens, 2.5, 120, render_mode=mode)
+        timings.append((time.perf_counter() - start) * 1000)
+        sizes.append(len(base64.b64decode(img_b64)))
+
+    timings.sort()
+    return {
+        "mode": mode,
+        "mean_ms": statistics.mean(timings),
+        "p50_ms": timings[len(timings) // 2],
+        "p95_ms": timings[min(len(timings) - 1, int(len(timings) * 0.95))],
+        "png_kb": statistics.mean(sizes) / 1024
+    }
+
+if __name__ == "__main__":
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+
+    print(f"--- HEATMAP RENDER BENCHMARK ({iterations} iterations) ---")
+    print(f"{'mode':<12}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'PNG KB':>10}")
+    results = [bench_mode(mode, iterations) for mode in HEATMAP_RENDER_MODES]
+    for r in results:
+        print(f"{r['mode']:<12}{r['mean_ms']:>10.2f}{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}{r['png_kb']:>10.1f}")
+
+    baseline, fast = results[0], results[1]
+    print(f"\nSpeedup (p50): {baseline['p50_ms'] / fast['p50_ms']:.1f}x")
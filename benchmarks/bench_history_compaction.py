@@ -0,0 +1,100 @@
+# benchmarks/bench_history_compaction.py
+"""
+Prompt size and model latency per turn over a long, persistent (SQLite)
+audit conversation: every turn reads catalog pages, consults the KB and
+reports on the room, so each turn adds several KB of tool output.
+
+  no compaction    the full session history is sent on every model call
+  compaction       HistoryCompactor (tool-result digests + summary of old turns)
+
+The model is an offline stub; its latency is simulated as a fixed overhead
+plus a prefill cost per prompt token (MODEL_BASE_MS, MODEL_MS_PER_1K_TOKENS).
+
+Usage: python benchmarks/bench_history_compaction.py [turns]   (default: 40)
+"""
+import sys
+import os
+import io
+import time
+import asyncio
+import tempfile
+import warnings
+import contextlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'my_agent'))
+warnings.filterwarnings("ignore")
+
+from google.adk.agents import Agent
+from google.adk.models import BaseLlm, LlmResponse
+from google.genai import types
+
+from runner_registry import RunnerPool, make_session_service
+from history_compaction import HistoryCompactor, content_tokens, HISTORY_TOKEN_BUDGET
+
+MODEL_BASE_MS = 5
+MODEL_MS_PER_1K_TOKENS = 4
+PAGES = "".join(f"SKU-{i} LED A19 {800 + i} lm 9 W 2700K CRI 90 dimmable Zigbee $7.99\n" for i in range(150))
+KB = "## Protocols > Zigbee\n- Requires Hub: YES (Philips Hue Bridge, IKEA Dirigera).\n" * 30
+ROOM = "Room: 20 sqm, reflection 0.5, 4 lights. " + "Point grid lux: " + ", ".join(str(300 + i) for i in range(200))
+
+class AuditLlm(BaseLlm):
+    """Offline model: one fan-out of three tool calls per user message, then an answer."""
+    sizes: list = []
+
+    async def generate_content_async(self, llm_request, stream=False):
+        tokens = content_tokens(llm_request.contents)
+        self.sizes.append(tokens)
+        await asyncio.sleep((MODEL_BASE_MS + MODEL_MS_PER_1K_TOKENS * tokens / 1000) / 1000)
+        if llm_request.contents[-1].parts[0].function_response is None:
+            calls = [("read_catalog", {"first_page": len(self.sizes)}), ("consult_kb", {"topic": "zigbee hub"}),
+                     ("room_state", {})]
+            parts = [types.Part(function_call=types.FunctionCall(name=n, args=a)) for n, a in calls]
+            yield LlmResponse(content=types.Content(role="model", parts=parts))
+            return
+        yield LlmResponse(content=types.Content(role="model", parts=[types.Part(
+            text="Zigbee lamps need a hub; 4 x 800 lm reaches 480 lux. Recommend SKU-12 at $7.99.")]))
+
+def read_catalog(first_page: int) -> str:
+    """Reads catalog pages."""
+    return PAGES
+
+def consult_kb(topic: str) -> str:
+    """Reads the standards KB."""
+    return KB
+
+def room_state() -> str:
+    """Reports the room state."""
+    return ROOM
+
+async def run(turns: int, compactor: HistoryCompactor = None):
+    model = AuditLlm(model="stub", sizes=[])
+    callbacks = dict(before_model_callback=compactor.before_model,
+                     after_model_callback=compactor.after_model) if compactor else {}
+    agent = Agent(name="audit_agent", model=model, instruction="Audit.",
+                  tools=[read_catalog, consult_kb, room_state], **callbacks)
+    with tempfile.TemporaryDirectory() as tmp:
+        pool = RunnerPool(agent, "bench_history", session_service=make_session_service(os.path.join(tmp, "s.db")))
+        per_turn = []
+        with contextlib.redirect_stdout(io.StringIO()):
+            for i in range(turns):
+                session_id = await pool.session_id_for("auditor")
+                start = time.perf_counter()
+                async for _ in pool.run_async("auditor", session_id, types.Content(
+                        role="user", parts=[types.Part(text=f"Audit step {i}: check lamps, hub and lux.")])):
+                    pass
+                per_turn.append((model.sizes[-1], (time.perf_counter() - start) * 1000))
+    return per_turn
+
+if __name__ == "__main__":
+    turns = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    plain = asyncio.run(run(turns))
+    compactor = HistoryCompactor()
+    compacted = asyncio.run(run(turns, compactor))
+
+    print(f"--- HISTORY COMPACTION: {turns} turns, SQLite sessions, budget {HISTORY_TOKEN_BUDGET} tokens ---")
+    print(f"{'turn':>6}{'plain tokens':>15}{'plain ms':>10}{'compacted tokens':>19}{'compacted ms':>14}")
+    for i in sorted({0, 1, 4, 9, 19, turns - 1} & set(range(turns))):
+        print(f"{i + 1:>6}{plain[i][0]:>15}{plain[i][1]:>10.0f}{compacted[i][0]:>19}{compacted[i][1]:>14.0f}")
+    stats = compactor.prompt_stats()
+    print(f"\ncompactor: {stats['calls']} model calls, {stats['compacted_calls']} compacted, "
+          f"{stats['digested']} tool results digested, max history {stats['max_history_tokens']} tokens")
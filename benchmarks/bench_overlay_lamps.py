@@ -0,0 +1,46 @@
+# benchmarks/bench_overlay_lamps.py
+"""
+Multi-lamp vision overlay field: one FFT convolution of lamp impulses vs.
+direct per-lamp summation, for 1 to 200 lamps on the capped working grid.
+
+Usage: python benchmarks/bench_overlay_lamps.py [width height]   (default: 4000 3000)
+"""
+import sys
+import os
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'my_agent'))
+
+from physics_engine import _lamp_field_fft, _lamp_field_direct, _overlay_grid, OVERLAY_WORK_SIDE
+
+LAMP_COUNTS = [1, 2, 5, 10, 20, 50, 100, 200]
+
+def best_of(fn, repeats: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+if __name__ == "__main__":
+    w, h = (int(sys.argv[1]), int(sys.argv[2])) if len(sys.argv) > 2 else (4000, 3000)
+    gw, gh, _, _ = _overlay_grid(w, h, OVERLAY_WORK_SIDE)
+    rng = np.random.default_rng(42)
+
+    # Prime the cached kernel spectrum: steady state for repeat audits
+    _lamp_field_fft(w, h, [(w / 2, h / 2)])
+
+    print(f"--- OVERLAY LAMP FIELD: {w}x{h} photo, {gw}x{gh} working grid ---")
+    print(f"{'lamps':>6}{'direct ms':>11}{'fft ms':>9}{'speedup':>9}{'max |err|':>11}")
+    for n in LAMP_COUNTS:
+        lamps = list(zip(rng.uniform(0, w, n), rng.uniform(0, h, n)))
+        t_direct = best_of(lambda: _lamp_field_direct(w, h, lamps))
+        t_fft = best_of(lambda: _lamp_field_fft(w, h, lamps))
+
+        direct = _lamp_field_direct(w, h, lamps)
+        fft = _lamp_field_fft(w, h, lamps)
+        err = np.abs(fft - direct).max() / direct.max()  # relative to the normalized peak
+
+        print(f"{n:>6}{t_direct:>11.2f}{t_fft:>9.2f}{t_direct / t_fft:>8.1f}x{err:>11.2e}")
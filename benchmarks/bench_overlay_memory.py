@@ -0,0 +1,75 @@
+# benchmarks/bench_overlay_memory.py
+"""
+Peak RSS of overlay_heatmap_on_image per photo size, for sizing Cloud Run instances.
+
+Each size runs in a fresh subprocess (ru_maxrss is a per-process high-water mark):
+the child imports everything, records its baseline RSS, builds a synthetic JPEG,
+runs the overlay and reports the new peak.
+
+Usage: python benchmarks/bench_overlay_memory.py [MP ...]   (default: 1 3 6 12 24)
+"""
+import sys
+import os
+import io
+import json
+import time
+import resource
+import subprocess
+import contextlib
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ASPECT = 4 / 3
+
+def _peak_rss_mb() -> float:
+    # Linux reports KiB, macOS reports bytes
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def _child(megapixels: float):
+    sys.path.insert(0, ROOT)
+    import numpy as np
+    from PIL import Image
+    from my_agent.physics_engine import overlay_heatmap_on_image
+
+    w = int(round((megapixels * 1e6 * ASPECT) ** 0.5))
+    h = int(round(w / ASPECT))
+    # Noise-free gradient keeps the JPEG small; the decode cost is what matters
+    gradient = np.linspace(0, 255, w, dtype=np.uint8)
+    img = Image.fromarray(np.broadcast_to(gradient, (h, w))).convert("RGB")
+    buf = io.BytesIO()
+    img.save(buf, format="JPEG", quality=85)
+    image_bytes = buf.getvalue()
+    del img, buf
+
+    baseline = _peak_rss_mb()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = overlay_heatmap_on_image(image_bytes, lamp_positions=[(0.3, 0.3), (0.7, 0.6)])
+    elapsed = time.perf_counter() - start
+
+    print(json.dumps({
+        "megapixels": megapixels,
+        "size": f"{w}x{h}",
+        "upload_kb": len(image_bytes) / 1024,
+        "baseline_mb": baseline,
+        "peak_mb": _peak_rss_mb(),
+        "seconds": elapsed,
+        "ok": bool(result)
+    }))
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == "--child":
+        _child(float(sys.argv[2]))
+        sys.exit(0)
+
+    sizes = [float(a) for a in sys.argv[1:]] or [1, 3, 6, 12, 24]
+
+    print("--- VISION OVERLAY PEAK MEMORY ---")
+    print(f"{'MP':>6}{'pixels':>14}{'upload KB':>11}{'base MB':>9}{'peak MB':>9}{'delta MB':>10}{'sec':>7}")
+    for mp in sizes:
+        out = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", str(mp)],
+                             capture_output=True, text=True, check=True)
+        r = json.loads(out.stdout.strip().splitlines()[-1])
+        print(f"{r['megapixels']:>6g}{r['size']:>14}{r['upload_kb']:>11.0f}{r['baseline_mb']:>9.0f}"
+              f"{r['peak_mb']:>9.0f}{r['peak_mb'] - r['baseline_mb']:>10.0f}{r['seconds']:>7.2f}"
+              f"{'' if r['ok'] else '  (overlay failed)'}")
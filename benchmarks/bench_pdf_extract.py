@@ -0,0 +1,112 @@
+# benchmarks/bench_pdf_extract.py
+"""
+read_pdf_file on a synthetic lighting catalog (default: 300 pages): the old
+behaviour (parse every page, build the result with `text +=`, on every call)
+vs. the streaming, content-hash-cached extractor:
+
+  whole document, cold   sequential, and with the process pool (page batches)
+  whole document, warm   served from the page cache
+  tool call, cold        what the agent asks by default: the first PDF_MAX_CHARS
+
+"Loop stall" is the longest the event loop went unresponsive (a heartbeat
+ticks every 5 ms) while one agent turn reads the catalog: the old tool ran
+on the loop, the new one is offloaded and stops at the char budget.
+
+Usage: python benchmarks/bench_pdf_extract.py [pages] [workers]   (default: 300, min(4, CPUs) but >= 2)
+"""
+import sys
+import os
+import io
+import time
+import asyncio
+import tempfile
+import contextlib
+
+import pypdf
+from fpdf import FPDF
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'my_agent'))
+
+with contextlib.redirect_stdout(io.StringIO()):
+    import agent
+from pdf_text import PdfTextExtractor, PDF_MAX_CHARS, PDF_EXTRACT_WORKERS
+from tool_executor import offload
+
+def write_catalog(path: str, pages: int):
+    pdf = FPDF()
+    pdf.set_font("helvetica", size=9)
+    for p in range(pages):
+        pdf.add_page()
+        for r in range(40):
+            pdf.cell(0, 6, f"SKU-{p}-{r} LED A19 Luminous Flux: {800 + r * 10} lumens, Power Consumption: "
+                           f"{9 + r % 5} Watts, CRI 90, 2700K", new_x="LMARGIN", new_y="NEXT")
+    pdf.output(path)
+
+def old_read_pdf_file(file_path: str) -> str:
+    reader = pypdf.PdfReader(file_path)
+    text = f"--- Content of {file_path} ---\n"
+    for i, page in enumerate(reader.pages):
+        text += f"[Page {i+1}]\n{page.extract_text()}\n"
+    return text
+
+def timed_ms(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+async def loop_stall_ms(tool, *args) -> float:
+    """Runs one tool call while a 5 ms heartbeat measures the longest gap on the loop."""
+    gaps, done = [0.0], asyncio.Event()
+
+    async def heartbeat():
+        last = time.perf_counter()
+        while not done.is_set():
+            await asyncio.sleep(0.005)
+            now = time.perf_counter()
+            gaps[0] = max(gaps[0], now - last)
+            last = now
+
+    beat = asyncio.create_task(heartbeat())
+    await asyncio.sleep(0.02)
+    result = tool(*args)
+    if asyncio.iscoroutine(result):
+        await result
+    done.set()
+    await beat
+    return gaps[0] * 1000
+
+if __name__ == "__main__":
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else max(PDF_EXTRACT_WORKERS, 2)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "catalog.pdf")
+        write_catalog(path, pages)
+        print(f"--- PDF EXTRACT: {pages} pages, {os.path.getsize(path) / 1e6:.1f} MB, "
+              f"{os.cpu_count()} CPUs, pool of {workers} ---")
+
+        old_ms = timed_ms(lambda: old_read_pdf_file(path))
+        sequential = PdfTextExtractor(workers=1)
+        seq_ms = timed_ms(lambda: sequential.extract_text(path))
+        parallel = PdfTextExtractor(workers=workers)
+        spawn_ms = timed_ms(parallel.warm_up)
+        par_ms = timed_ms(lambda: parallel.extract_text(path))
+        warm_ms = timed_ms(lambda: parallel.extract_text(path))
+        tool = PdfTextExtractor(workers=workers)
+        tool.warm_up()
+        tool_ms = timed_ms(lambda: tool.extract_text(path, max_chars=PDF_MAX_CHARS))
+        window = tool.extract_text(path, max_chars=PDF_MAX_CHARS)
+
+        print(f"{'process pool warm-up (once)':<40}{spawn_ms:>10.0f} ms")
+        print(f"{'old read_pdf_file (every call)':<40}{old_ms:>10.0f} ms")
+        print(f"{'whole document, cold, sequential':<40}{seq_ms:>10.0f} ms")
+        print(f"{'whole document, cold, process pool':<40}{par_ms:>10.0f} ms")
+        print(f"{'whole document, warm (page cache)':<40}{warm_ms:>10.1f} ms")
+        print(f"{'tool call, cold (pages 1-' + str(window['last_page']) + ')':<40}{tool_ms:>10.0f} ms")
+
+        agent.pdf_text_extractor = turn = PdfTextExtractor(workers=workers)  # cold cache for the agent
+        turn.warm_up()
+        old_stall = asyncio.run(loop_stall_ms(old_read_pdf_file, path))
+        new_stall = asyncio.run(loop_stall_ms(offload(agent.read_pdf_file), path))
+        print(f"\nloop stall during one turn: old {old_stall:.0f} ms, new {new_stall:.0f} ms")
+        for extractor in (parallel, tool, turn):
+            extractor._pool.shutdown()
@@ -0,0 +1,75 @@
+# benchmarks/bench_product_catalog.py
+"""
+Offline product catalog: indexed lookups (sorted + bitmap + inverted indexes)
+vs. a full numpy scan, over a synthetic feed of N SKUs.
+
+Usage: python benchmarks/bench_product_catalog.py [skus]   (default: 100000)
+"""
+import sys
+import os
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'my_agent'))
+
+from product_catalog import ProductCatalog, parse_product_query
+
+QUERIES = [
+    "dimmable 1500 lm Zigbee bulb under $10",
+    "non-dimmable 60W equivalent",
+    "wifi bulb under $15",
+    "Brand3 800 lumens",
+    "1100+ lumens matter bulb $20-$40",
+]
+PROTOCOLS = ["None", "Zigbee", "WiFi", "Bluetooth", "Matter", "Thread"]
+
+def synthetic_feed(n: int):
+    rng = np.random.default_rng(42)
+    lumens = rng.integers(200, 3000, n)
+    prices = rng.uniform(2, 60, n)
+    for i in range(n):
+        yield {"sku": f"SKU-{i}", "name": f"Brand{i % 200} Model{i} A19", "brand": f"Brand{i % 200}",
+               "price_usd": float(prices[i]), "lumens": float(lumens[i]), "watts": float(lumens[i] / 90),
+               "is_dimmable": bool(i % 3), "protocol": PROTOCOLS[i % len(PROTOCOLS)], "link": ""}
+
+def scan(catalog: ProductCatalog, query: str):
+    """Baseline: evaluate every predicate over every row, then rank the matches like find()."""
+    filters = parse_product_query(query)
+    cols = catalog._columns
+    keep = np.ones(catalog._count, dtype=bool)
+    for c in ("lumens", "watts", "price_usd"):
+        lo, hi = filters.get(c, (None, None))
+        if lo is not None:
+            keep &= cols[c] >= lo
+        if hi is not None:
+            keep &= cols[c] <= hi
+    if "is_dimmable" in filters:
+        keep &= cols["is_dimmable"] == filters["is_dimmable"]
+    if "protocol" in filters:
+        keep &= cols["protocol"] == catalog._protocol_codes[filters["protocol"]]
+    for term in filters["terms"]:
+        keep &= np.array([term in name.lower().split() for name in catalog._text["name"]])
+    rows = np.flatnonzero(keep)
+    if "near_lumens" in filters:
+        return rows[np.lexsort((cols["price_usd"][rows], np.abs(cols["lumens"][rows] - filters["near_lumens"])))][:1]
+    return rows[np.argsort(cols["price_usd"][rows], kind="stable")][:1]
+
+def per_call_ms(fn, repeats: int = 200) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) * 1000 / repeats
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    catalog = ProductCatalog()
+    start = time.perf_counter()
+    catalog.add_products(synthetic_feed(n))
+    catalog.warm_up()
+    print(f"--- PRODUCT CATALOG: {n} SKUs, loaded + indexed in {time.perf_counter() - start:.2f} s ---")
+    print(f"{'query':<42}{'indexed ms':>12}{'scan ms':>10}{'speedup':>9}")
+    for q in QUERIES:
+        t_index = per_call_ms(lambda: catalog.lookup(q))
+        t_scan = per_call_ms(lambda: scan(catalog, q), repeats=5 if parse_product_query(q)["terms"] else 50)
+        print(f"{q:<42}{t_index:>12.3f}{t_scan:>10.3f}{t_scan / t_index:>8.1f}x")
+    print("stats:", catalog.stats())
@@ -0,0 +1,81 @@
+# benchmarks/bench_standards_kb.py
+"""
+consult_standards_kb on a synthetic multi-megabyte knowledge base: the old
+behaviour (read the whole file on every call and return all of it) vs. the
+sectioned, mtime-cached BM25 index (cold build, then warm queries).
+
+Usage: python benchmarks/bench_standards_kb.py [megabytes]   (default: 8)
+"""
+import sys
+import os
+import time
+import tempfile
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'my_agent'))
+
+from standards_kb import StandardsKB, estimate_tokens
+
+PROTOCOLS = ["Zigbee", "Wi-Fi", "Matter", "Thread", "Bluetooth Mesh", "Z-Wave", "DALI", "KNX", "Casambi", "EnOcean"]
+BRANDS = ["Philips Hue", "IKEA Tradfri", "LIFX", "Nanoleaf", "Sengled", "Innr", "Lutron", "GE Cync", "WiZ", "Aqara"]
+FILLER = ("firmware bridge controller dimmer switch latency mesh repeater pairing reset range interference "
+          "gateway scene schedule group automation sensor motion daylight harvesting wattage driver ballast "
+          "flicker buzz phase-cut trailing-edge leading-edge neutral wire relay standby power certification").split()
+QUERIES = ["Philips Hue bridge Zigbee compatibility", "Does Matter need a hub?", "trailing-edge dimmer flicker",
+           "Thread border router range", "KNX DALI gateway"]
+
+def write_kb(path: str, megabytes: float, seed: int = 3) -> int:
+    rng = np.random.default_rng(seed)
+    target, written, chapter = megabytes * 1024 * 1024, 0, 0
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("# Synthetic Smart Home Standards KB\n\n")
+        while written < target:
+            chapter += 1
+            protocol, brand = PROTOCOLS[chapter % len(PROTOCOLS)], BRANDS[(chapter // 3) % len(BRANDS)]
+            block = [f"## {chapter}. {brand} on {protocol}\n"]
+            for sub in range(4):
+                words = " ".join(rng.choice(FILLER, size=120))
+                block.append(f"### {chapter}.{sub} {protocol} {FILLER[(chapter + sub) % len(FILLER)]}\n"
+                             f"- **Requires Hub**: {'YES' if chapter % 2 else 'NO'} for {brand}.\n- {words}\n\n")
+            text = "".join(block)
+            f.write(text)
+            written += len(text)
+    return chapter
+
+def old_consult(path: str, topic: str) -> str:
+    with open(path, "r", encoding="utf-8") as f:
+        return f"--- KNOWLEDGE BASE ({topic}) ---\n{f.read()}"
+
+def per_call_ms(fn, repeats: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) * 1000 / repeats
+
+if __name__ == "__main__":
+    megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 8
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "kb.md")
+        chapters = write_kb(path, megabytes)
+        kb = StandardsKB(path)
+
+        start = time.perf_counter()
+        kb.search(QUERIES[0])
+        cold_ms = (time.perf_counter() - start) * 1000
+        stats = kb.stats()
+        print(f"--- STANDARDS KB: {os.path.getsize(path) / 1e6:.1f} MB, {chapters} chapters, "
+              f"{stats['sections']} sections, {stats['terms']} terms; cold parse + index {cold_ms:.0f} ms ---")
+        print(f"{'topic':<42}{'old ms':>9}{'old tokens':>12}{'new ms':>9}{'new tokens':>12}")
+        for q in QUERIES:
+            t_old = per_call_ms(lambda: old_consult(path, q), 3)
+            old_tokens = estimate_tokens(old_consult(path, q))
+            t_new = per_call_ms(lambda: kb.search(q), 50)
+            new_tokens = sum(s["tokens"] for s in kb.search(q))
+            print(f"{q:<42}{t_old:>9.1f}{old_tokens:>12}{t_new:>9.2f}{new_tokens:>12}")
+
+        with open(path, "a", encoding="utf-8") as f:
+            f.write("\n## Appendix\n- **Matter 1.4**: adds energy reporting.\n")
+        start = time.perf_counter()
+        top = kb.search("Matter energy reporting")[0]["path"]
+        print(f"\nafter an edit: rebuilt in {(time.perf_counter() - start) * 1000:.0f} ms, top section '{top}', "
+              f"loads={kb.stats()['loads']}")
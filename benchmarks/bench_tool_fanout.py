@@ -0,0 +1,136 @@
+# benchmarks/bench_tool_fanout.py
+"""
+Per-turn wall clock of the spatial agent's tool calls, replaying a recorded
+procurement transcript (benchmarks/transcripts/audit_procurement.json):
+
+  sequential          one tool call per model turn (the old protocol)
+  fan-out, inline     independent calls in one turn; blocking tools run on the loop
+  fan-out, offloaded  independent calls in one turn; blocking tools on the tool executor
+
+The model is an offline stub that replays the recorded turns after a fixed
+"thinking" delay. Tool latencies are simulated: market searches sleep on the
+loop like the remote agent (the local catalog and tariff table are disabled so
+every search is remote), the KB lookup and PDF parse block like disk/CPU work.
+"Loop stall" is the longest the event loop went unresponsive (a heartbeat
+ticks every 5 ms): with inline blocking tools, every other session served by
+the same loop waits that long.
+
+Usage: python benchmarks/bench_tool_fanout.py [model_turn_s]   (default: 0.4)
+"""
+import sys
+import os
+import io
+import json
+import time
+import asyncio
+import warnings
+import contextlib
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'my_agent'))
+warnings.filterwarnings("ignore")
+
+from google.adk.agents import Agent
+from google.adk.models import BaseLlm, LlmResponse
+from google.genai import types
+
+with contextlib.redirect_stdout(io.StringIO()):
+    import agent
+from runner_registry import RunnerPool
+from product_catalog import ProductCatalog
+from tariff_table import TariffTable
+from tool_executor import offload
+from market_agent import FALLBACK_DEFAULTS
+
+TRANSCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "transcripts", "audit_procurement.json")
+MARKET_S = {"product": 1.2, "rate": 0.8}
+KB_S = 0.15
+PDF_S = 0.35
+
+class ReplayLlm(BaseLlm):
+    """Replays recorded model turns: the function calls of turn N, then the final answer."""
+    turns: list = []
+    final_answer: str = ""
+    delay: float = 0.4
+
+    async def generate_content_async(self, llm_request, stream=False):
+        await asyncio.sleep(self.delay)
+        turn = sum(1 for c in llm_request.contents if c.role == "model")
+        if turn < len(self.turns):
+            parts = [types.Part(function_call=types.FunctionCall(name=c["name"], args=c["args"])) for c in self.turns[turn]]
+        else:
+            parts = [types.Part(text=self.final_answer)]
+        yield LlmResponse(content=types.Content(role="model", parts=parts))
+
+async def remote_search(query: str, **kwargs) -> dict:
+    kind = "rate" if "rate" in query.lower() else "product"
+    await asyncio.sleep(MARKET_S[kind])
+    return dict(FALLBACK_DEFAULTS[kind])
+
+def consult_standards_kb(topic: str) -> str:
+    """Reads the Smart Home Standards Knowledge Base."""
+    time.sleep(KB_S)
+    return f"--- KNOWLEDGE BASE ({topic}) ---"
+
+def read_pdf_file(file_path: str) -> str:
+    """Reads a PDF file from the given path."""
+    time.sleep(PDF_S)
+    return f"--- Content of {file_path} ---"
+
+async def heartbeat(stalls: list, period: float = 0.005):
+    last = time.perf_counter()
+    while True:
+        await asyncio.sleep(period)
+        now = time.perf_counter()
+        stalls.append(now - last - period)
+        last = now
+
+async def replay(turns, final_answer: str, model_delay: float, offloaded: bool):
+    blocking = [consult_standards_kb, read_pdf_file]
+    tools = [agent.search_market_tool, agent.calculate_roi_and_savings]
+    tools += [offload(t) for t in blocking] if offloaded else blocking
+    model = ReplayLlm(model="replay", turns=turns, final_answer=final_answer, delay=model_delay)
+    pool = RunnerPool(Agent(name="spatial_engine_agent", model=model, instruction="Replay.", tools=tools), "bench_fanout")
+    session_id = await pool.session_id_for("bench")
+
+    tool_turns, called_at, stalls = [], None, []
+    beat = asyncio.create_task(heartbeat(stalls))
+    start = time.perf_counter()
+    message = types.Content(role="user", parts=[types.Part(text="Audit")])
+    async for event in pool.run_async("bench", session_id, message):
+        if event.get_function_calls():
+            called_at = time.perf_counter()
+        elif event.get_function_responses():
+            names = [r.name for r in event.get_function_responses()]
+            tool_turns.append((names, time.perf_counter() - called_at))
+    total = time.perf_counter() - start
+    beat.cancel()
+    return tool_turns, total, max(stalls, default=0.0)
+
+async def main(model_delay: float):
+    with open(TRANSCRIPT, "r", encoding="utf-8") as f:
+        transcript = json.load(f)
+    protocols = transcript["protocols"]
+    runs = [
+        ("sequential", protocols["sequential"], False),
+        ("fan-out, inline", protocols["fan_out"], False),
+        ("fan-out, offloaded", protocols["fan_out"], True),
+    ]
+    print(f"--- REPLAYED TRANSCRIPT: model turn {model_delay:.2f} s, market {MARKET_S}, KB {KB_S} s, PDF {PDF_S} s ---")
+    baseline = None
+    for label, turns, offloaded in runs:
+        tool_turns, total, stall = await replay(turns, transcript["final_answer"], model_delay, offloaded)
+        tool_time = sum(t for _, t in tool_turns)
+        baseline = baseline or total
+        print(f"\n{label}: {len(turns) + 1} model turns, total {total:.2f} s "
+              f"(tools {tool_time:.2f} s, saving {baseline - total:.2f} s vs sequential; "
+              f"max loop stall {stall * 1000:.0f} ms)")
+        for names, elapsed in tool_turns:
+            print(f"  {elapsed:6.2f} s  {', '.join(names)}")
+
+if __name__ == "__main__":
+    delay = float(sys.argv[1]) if len(sys.argv) > 1 else 0.4
+    with mock.patch.object(agent, "search_product_data_async", remote_search), \
+         mock.patch.object(agent, "product_catalog", ProductCatalog()), \
+         mock.patch.object(agent, "tariff_table", TariffTable()):
+        asyncio.run(main(delay))
@@ -78,6 +78,24 @@ function App() {
     }
   };
 
+  const handleRecalculate = async (imageId: string) => {
+    try {
+      addLog("[VISION] Recalculating design on cached photo...", 'system');
+      const response = await fetch(`${API_BASE_URL}/spatial-audit/${imageId}/recalculate`, {
+        method: 'POST'
+      });
+      if (!response.ok) throw new Error(`Recalculate failed (${response.status})`);
+      const data = await response.json();
+
+      setRoomState(prev => ({ ...prev, visionHeatmap: data.vision_data.heatmap_overlay }));
+      addLog(`Design recalculated.`, 'success');
+      return data;
+    } catch (err) {
+      addLog(`Recalculate Failed`, 'warn');
+      return null;
+    }
+  };
+
   const handleGenerateOptimizationReport = async (area: number, target: number, current: number) => {
     try {
       const response = await fetch(`${API_BASE_URL}/optimization-report?area=${area}&target_lux=${target}&current_lumens=${current}`, {
@@ -251,7 +269,7 @@ function App() {
               onAnalysisComplete={setRoiData} 
             />
           )}
-          {activeSection === 'vision' && <VisionAudit onAuditComplete={handleAuditComplete} />}
+          {activeSection === 'vision' && <VisionAudit onAuditComplete={handleAuditComplete} onRecalculate={handleRecalculate} />}
           {activeSection === 'market' && <MarketHub />}
           {activeSection === 'config' && <ConfigGenerator />}
           {activeSection === 'standards' && (
@@ -2,9 +2,10 @@ import React, { useState } from 'react';
 
 interface VisionAuditProps {
   onAuditComplete: (file: File) => Promise<any>;
+  onRecalculate: (imageId: string) => Promise<any>;
 }
 
-const VisionAudit: React.FC<VisionAuditProps> = ({ onAuditComplete }) => {
+const VisionAudit: React.FC<VisionAuditProps> = ({ onAuditComplete, onRecalculate }) => {
   const [image, setImage] = useState<string | null>(null);
   const [isAuditing, setIsAuditing] = useState(false);
   const [checks, setChecks] = useState([
@@ -15,6 +16,8 @@ const VisionAudit: React.FC<VisionAuditProps> = ({ onAuditComplete }) => {
   ]);
   const [heatmapOverlay, setHeatmapOverlay] = useState<string | null>(null);
   const [showHeatmap, setShowHeatmap] = useState(false);
+  // Server-side handle of the uploaded photo, reused by "Recalculate"
+  const [imageId, setImageId] = useState<string | null>(null);
 
   const handleUpload = (e: React.ChangeEvent<HTMLInputElement>) => {
     if (e.target.files?.[0]) {
@@ -22,6 +25,7 @@ const VisionAudit: React.FC<VisionAuditProps> = ({ onAuditComplete }) => {
       const file = e.target.files[0];
       reader.onload = (re) => setImage(re.target!.result as string);
       reader.readAsDataURL(file);
+      setImageId(null);
       // We'll store the file on the input element's data attribute or just handle it in runAudit
     }
   };
@@ -29,6 +33,7 @@ const VisionAudit: React.FC<VisionAuditProps> = ({ onAuditComplete }) => {
   const handleRemove = (e: React.MouseEvent) => {
     e.stopPropagation();
     setImage(null);
+    setImageId(null);
     setHeatmapOverlay(null);
     setShowHeatmap(false);
     const fileInput = document.getElementById('vision-upload') as HTMLInputElement;
@@ -59,6 +64,7 @@ const VisionAudit: React.FC<VisionAuditProps> = ({ onAuditComplete }) => {
     if (result && result.vision_data && result.vision_data.heatmap_overlay) {
        setHeatmapOverlay(result.vision_data.heatmap_overlay);
        setShowHeatmap(true);
+       setImageId(result.image_id ?? null);
     }
     
     if (!result) {
@@ -66,6 +72,23 @@ const VisionAudit: React.FC<VisionAuditProps> = ({ onAuditComplete }) => {
     }
   };
 
+  const recalculate = async () => {
+    // Fall back to a full upload if the server no longer has the photo
+    if (!imageId) return runAudit();
+
+    setIsAuditing(true);
+    const result = await onRecalculate(imageId);
+    setIsAuditing(false);
+
+    if (result && result.vision_data && result.vision_data.heatmap_overlay) {
+       setHeatmapOverlay(result.vision_data.heatmap_overlay);
+       setShowHeatmap(true);
+    } else {
+       setImageId(null);
+       return runAudit();
+    }
+  };
+
   return (
     <div className="animate-fade-in grid grid-cols-1 lg:grid-cols-3 gap-6">
       <div className="lg:col-span-2 glass-panel p-6 flex flex-col items-center">
@@ -117,7 +140,7 @@ const VisionAudit: React.FC<VisionAuditProps> = ({ onAuditComplete }) => {
 
         {heatmapOverlay && !isAuditing && (
           <button
-            onClick={runAudit}
+            onClick={recalculate}
             className="w-full mt-3 bg-transparent border border-white/20 text-gray-400 hover:text-white hover:border-white/50 py-2 rounded-lg transition-all text-sm uppercase tracking-wider"
           >
             Recalculate Design
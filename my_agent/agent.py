@@ -3,71 +3,167 @@ import os
 import sys
 import json
 from pathlib import Path
-import pypdf
 import asyncio
+from contextlib import contextmanager
+from typing import Optional
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from spatial_state import SpatialState
+from state_store import state_store, RoomSnapshotStore
+from runner_registry import runner_registry, make_session_service, AGENT_SESSION_DB
+from tool_executor import offload
+from tool_memo import memoize_tool, tool_memo
 
 from dotenv import load_dotenv
 load_dotenv()
 
 from google.adk.agents import Agent
-from google.adk.runners import Runner
-from google.adk.sessions import InMemorySessionService
+from google.adk.tools import ToolContext
 from google.genai import types
 
 from physics_engine import calculate_lux_at_point, generate_optimization_report, calculate_roi_and_savings, check_health_compliance
-from market_agent import search_product_data
+from market_agent import search_product_data_async, warm_up_market_search
+from market_cache import query_kind
+from product_catalog import product_catalog
+from tariff_table import tariff_table
+from standards_kb import standards_kb
+from pdf_text import pdf_text_extractor, PDF_MAX_CHARS
+from spec_extractor import extract_pdf_specs
+from history_compaction import history_compactor
 
 APP_NAME="spatial_engine_core"
 USER_ID="engineer_01"
 SESSION_ID="session_v1"
 
-room_state = SpatialState()
-
 # --- STATE TOOLS ---
-def set_room_parameters(area_sqm: float, wall_reflection: float):
-    """Sets room geometry. Reflection: 0.2 (Brick/Dark) to 0.8 (White/Mirrors)."""
-    room_state.area_sqm = area_sqm
-    room_state.wall_reflection = wall_reflection
-    room_state.update_geometry(area_sqm)
+# Each ADK session gets its own room from the shared state store, so concurrent
+# audits never see each other's lights. Direct calls (no tool_context) share one default room.
+def _room_key(tool_context: Optional[ToolContext]) -> str:
+    if tool_context is None:
+        return f"{USER_ID}:{SESSION_ID}"
+    session = tool_context.session
+    return f"{session.user_id}:{session.id}"
+
+# Sessions persist (SQLite) and can be resumed after a restart, while the state store is in
+# memory: each room's latest snapshot is kept beside the sessions, outside their event history.
+room_snapshots = RoomSnapshotStore(AGENT_SESSION_DB)
+
+@contextmanager
+def _room(tool_context: Optional[ToolContext], readonly: bool = False):
+    """
+    The session's room from the state store. A room missing from memory (new
+    process, expired) is restored from its stored snapshot first; after a
+    write, the stored snapshot is replaced.
+    """
+    key = _room_key(tool_context)
+    if tool_context is not None and key not in state_store:
+        blob = room_snapshots.get(key)
+        if blob:
+            state_store.restore(key, blob)
+    with state_store.session(key, readonly=readonly) as room_state:
+        yield room_state
+    if tool_context is not None and not readonly:
+        room_snapshots.put(key, state_store.snapshot(key))
+
+def set_room_parameters(area_sqm: float, wall_reflection: float, width_m: Optional[float] = None, depth_m: Optional[float] = None,
+                        tool_context: Optional[ToolContext] = None):
+    """
+    Sets room geometry. Reflection: 0.2 (Brick/Dark) to 0.8 (White/Mirrors).
+    Optionally pass the floor plan (width_m x depth_m) to enable point-by-point illuminance.
+    """
+    with _room(tool_context) as room_state:
+        room_state.area_sqm = area_sqm
+        room_state.wall_reflection = wall_reflection
+        if width_m and depth_m:
+            room_state.set_dimensions(width_m, depth_m)
+            return f"State Updated: Floor {width_m}x{depth_m} m ({room_state.area_sqm} sqm), Reflection={wall_reflection}."
+        had_floor_plan = room_state.width_m is not None
+        room_state.update_geometry(area_sqm)
+        if had_floor_plan and room_state.width_m is None:
+            return (f"State Updated: Area={area_sqm} sqm, Reflection={wall_reflection}. "
+                    f"The previous floor plan no longer matches and was cleared; pass width_m and depth_m "
+                    f"again for point-by-point illuminance.")
     return f"State Updated: Area={area_sqm} sqm, Reflection={wall_reflection}."
 
-def add_light_to_room(name: str, lumens: float):
-    """Adds a light source to the internal spatial state."""
-    room_state.add_light_source(name, lumens)
+def add_light_to_room(name: str, lumens: float, x_m: Optional[float] = None, y_m: Optional[float] = None,
+                      mounting_height_m: float = 2.5, beam_angle_degrees: float = 120,
+                      tool_context: Optional[ToolContext] = None):
+    """
+    Adds a light source to the internal spatial state.
+    Pass x_m/y_m (position on the floor plan, meters) to include it in the point-by-point illuminance.
+    """
+    with _room(tool_context) as room_state:
+        room_state.add_light_source(name, lumens, x=x_m, y=y_m, height=mounting_height_m, beam_angle=beam_angle_degrees)
     return f"State Updated: Added {name} ({lumens} lm)."
 
-def get_room_state():
+def get_room_state(tool_context: Optional[ToolContext] = None):
     """Returns the current summary of the room: area, sources, and total lux."""
-    return room_state.get_summary()
+    with _room(tool_context, readonly=True) as room_state:
+        return room_state.get_summary()
 
-def search_market_tool(query: str):
+async def search_market_tool(query: str):
     """
     Multipurpose Market Tool.
     1. Search for products: "Price of Philips LED 1500lm"
     2. Search for rates: "Electricity rate in New York"
     
+    Structured product questions ("dimmable 1500 lm Zigbee bulb under $10") are
+    answered from the local product catalog, and rates for known locations from
+    the local tariff table; the market agent is only asked on a miss.
+    
     Returns JSON string with data.
     """
     print(f"\n[MAIN AGENT] 🛒 Market Request: '{query}'...")
-    data = search_product_data(query)
+    # The catalog answers only what it can parse fully, so it is asked first ("800 lm bulb cost")
+    local = product_catalog.lookup(query)
+    if local is not None:
+        print(f"[MAIN AGENT] 📦 Catalog hit: {local['name']} (${local['price_usd']})")
+        return json.dumps(local, indent=2)
+    if query_kind(query) == "rate":
+        local = tariff_table.lookup(query)
+        if local is not None:
+            print(f"[MAIN AGENT] 📦 Tariff table hit: {local['location']} (${local['rate_usd_kwh']}/kWh)")
+            return json.dumps(local, indent=2)
+    data = await search_product_data_async(query)
     if "error" in data:
         return f"Market Error: {data['error']}"
     return json.dumps(data, indent=2)
 
-def read_pdf_file(file_path: str) -> str:
-    """Reads a PDF file from the given path."""
+def read_pdf_file(file_path: str, first_page: int = 1, last_page: Optional[int] = None,
+                  max_chars: int = PDF_MAX_CHARS) -> str:
+    """
+    Reads a PDF file from the given path.
+    Returns the text of pages first_page..last_page (1-based, default: to the end),
+    up to max_chars characters. Long catalogs end with a note naming the page to
+    continue from: read only the pages you need.
+    """
     try:
         if not os.path.exists(file_path):
             return f"Error: File '{file_path}' not found."
-        reader = pypdf.PdfReader(file_path)
-        text = f"--- Content of {file_path} ---\n"
-        for i, page in enumerate(reader.pages):
-            text += f"[Page {i+1}]\n{page.extract_text()}\n"
-        return text
+        result = pdf_text_extractor.extract_text(file_path, first_page, last_page, max_chars)
+        header = (f"--- Content of {file_path} (pages {result['first_page']}-{result['last_page']} "
+                  f"of {result['page_count']}) ---\n")
+        footer = ""
+        if result["next_page"] is not None:
+            footer = (f"[Stopped at {max_chars} characters. Call again with first_page={result['next_page']} "
+                      f"to continue.]\n")
+        return header + result["text"] + footer
+    except Exception as e:
+        return f"Error reading PDF: {str(e)}"
+
+def extract_datasheet_specs(file_path: str) -> str:
+    """
+    Extracts photometric specs from a lamp datasheet PDF: lumens, watts, color
+    temperature (cct_kelvin), CRI and beam angle, each with a confidence (0-1)
+    and the text it was read from. Call this before `read_pdf_file`.
+    """
+    try:
+        if not os.path.exists(file_path):
+            return f"Error: File '{file_path}' not found."
+        result = extract_pdf_specs(file_path)
+        found = ", ".join(f"{k}={v['value']:g}" for k, v in result["specs"].items())
+        print(f"\n[MAIN AGENT] 📄 Datasheet specs from '{file_path}': {found or 'none'}")
+        return json.dumps(result, indent=2)
     except Exception as e:
         return f"Error reading PDF: {str(e)}"
 
@@ -75,25 +171,28 @@ def consult_standards_kb(topic: str) -> str:
     """
     Reads the Smart Home Standards Knowledge Base.
     Use this when user asks about Zigbee, Matter, Hubs, or compatibility.
+    Returns only the sections most relevant to the topic.
     """
-    kb_path = "data/smart_home_standards.md"
     try:
-        if not os.path.exists(kb_path):
-            return "Error: Knowledge Base file not found at data/smart_home_standards.md"
-        
         print(f"\n[MAIN AGENT] 📖 Reading Standards for: '{topic}'...")
-        with open(kb_path, "r", encoding="utf-8") as f:
-            content = f.read()
-        return f"--- KNOWLEDGE BASE ({topic}) ---\n{content}"
+        sections = standards_kb.search(topic)
+        if not sections:
+            outline = "\n".join(f"- {path}" for path in standards_kb.outline())
+            return f"--- KNOWLEDGE BASE ({topic}) ---\nNo section matches this topic. Available sections:\n{outline}"
+        body = "\n\n".join(f"## {s['path']}\n{s['text']}" for s in sections)
+        return f"--- KNOWLEDGE BASE ({topic}) ---\n{body}"
+    except FileNotFoundError:
+        return f"Error: Knowledge Base file not found at {standards_kb.path}"
     except Exception as e:
         return f"Error reading KB: {str(e)}"
 
-def generate_scenarios_config(room_name: str) -> str:
+def generate_scenarios_config(room_name: str, tool_context: Optional[ToolContext] = None) -> str:
     """
     Generates a JSON configuration for Smart Home Hubs (Home Assistant/HomeKit).
     Creates presets: Focus, Relax, Movie.
     """
-    lights = [src['name'] for src in room_state.light_sources]
+    with _room(tool_context, readonly=True) as room_state:
+        lights = room_state.source_names()
     if not lights:
         lights = ["Main Ceiling Light"] # Fallback
 
@@ -133,10 +232,21 @@ You are the Spatial Engine AI. You combine Optical Physics, Economics, Smart Hom
 
 CORE PROTOCOL:
 
+PARALLEL CALLS: Tool calls that do not depend on each other's results MUST be issued together
+in the same turn; they run concurrently and the results come back in the order of the calls.
+Example: the Step A product search, the Step B rate search and `consult_standards_kb` go in one turn.
+Only call tools one at a time when an input depends on an earlier result (e.g. ROI needs the price).
+
+DATASHEETS: For a lamp datasheet PDF, CALL `extract_datasheet_specs` first and use its values.
+Only call `read_pdf_file` (with a page range) for fields listed in `missing` or `needs_review`.
+
 1. **VISUAL/STATE AUDIT**: 
    - Analyze the room (Area, Materials).
    - CALL `set_room_parameters`.
    - CALL `get_room_state` to check Lux levels.
+   - If the floor plan (width x depth) and lamp positions are known, pass them to `set_room_parameters` / `add_light_to_room`.
+     The room state then reports point-by-point Eavg/Emin; use them as `measured_avg_lux` / `measured_min_lux`
+     in `generate_optimization_report`.
 
 2. **HEALTH CHECK**:
    - Call `check_health_compliance(lux_level, room_type)`.
@@ -153,6 +263,8 @@ CORE PROTOCOL:
      - **Verification**: Check the JSON output. If the user asked for "Dimmable", confirm `is_dimmable` is true. If not, REJECT and search again.
    - **Step B (Rates)**: Find local electricity cost. Query example: "Electricity rate in New York".
      - Extract `rate_usd_kwh`.
+     - If you already know the site location, you may skip this step and pass `location` to
+       `calculate_roi_and_savings` instead: it resolves the rate from the local tariff table.
 
 5. **FINANCIAL ANALYSIS**:
    - CALL `calculate_roi_and_savings`.
@@ -160,7 +272,8 @@ CORE PROTOCOL:
      - `old_watts`: Assume 60W or 100W if replacing old bulbs.
      - `new_watts`: From Step A.
      - `new_bulb_price`: From Step A.
-     - `kwh_cost_usd`: From Step B (default 0.17 if search fails).
+     - `kwh_cost_usd`: From Step B (default 0.17 if search fails), or omit it and pass `location`.
+     - Check `rate_source` in the result: if it is the "US average default", search the rate (Step B) and recalculate.
 
 6. **CONFIGURATION**:
    - If the user asks for "setup", "scenes", "config", or "JSON", CALL `generate_scenarios_config`.
@@ -181,30 +294,39 @@ root_agent = Agent(
     model="gemini-3-pro-preview",
     description="Spatial AI with Physics, Market Logic, Standards, Health Checks, and Config Generation.",
     instruction=SPATIAL_ENGINEER_PROMPT,
+    # Sessions persist, so the history sent to the model is compacted (and measured) per call
+    before_model_callback=history_compactor.before_model,
+    after_model_callback=history_compactor.after_model,
+    # Deterministic tools are memoized per session: a repeated call is answered from the cache
     tools=[
-        calculate_lux_at_point,
-        generate_optimization_report,
-        calculate_roi_and_savings,
+        memoize_tool(calculate_lux_at_point, session_key=_room_key),
+        memoize_tool(generate_optimization_report, session_key=_room_key),
+        memoize_tool(calculate_roi_and_savings, session_key=_room_key),
         set_room_parameters,
         add_light_to_room,
         get_room_state,
-        read_pdf_file,
+        offload(read_pdf_file),  # blocking I/O: overlaps with the turn's other calls
+        offload(extract_datasheet_specs),
         search_market_tool,
-        consult_standards_kb,
-        generate_scenarios_config,
-        check_health_compliance
+        offload(consult_standards_kb),
+        memoize_tool(generate_scenarios_config, session_key=_room_key, state_version=state_store.version),
+        memoize_tool(check_health_compliance, session_key=_room_key)
     ]
 )
 
 # Session and Runner
-async def setup_session_and_runner():
-    session_service = InMemorySessionService()
-    session = await session_service.create_session(app_name=APP_NAME, user_id=USER_ID, session_id=SESSION_ID)
-    runner = Runner(agent=root_agent, app_name=APP_NAME, session_service=session_service)
-    return session, runner
+# Long-lived runners + a persistent (SQLite) session service, shared by every call in this process
+agent_runners = runner_registry.register(APP_NAME, root_agent, session_service=make_session_service())
 
 # Agent Interaction
-async def call_agent_async(query, image_path=None):
+async def call_agent_async(query, image_path=None, user_id: str = USER_ID, session_id: Optional[str] = None,
+                           resume: bool = False) -> str:
+    """
+    Sends one message to the agent and prints the events.
+    Reuses the user's current session (or `session_id`) so the conversation carries over;
+    with resume=True a new process continues the user's last stored conversation.
+    Returns: the session id used.
+    """
     print(f"User Query: {query}\n" + "="*50)
     parts = [types.Part(text=query)]
     if image_path:
@@ -214,8 +336,8 @@ async def call_agent_async(query, image_path=None):
             parts.append(types.Part(inline_data=types.Blob(mime_type="image/jpeg", data=image_data)))
     
     content = types.Content(role='user', parts=parts)
-    session, runner = await setup_session_and_runner()
-    events = runner.run_async(user_id=USER_ID, session_id=SESSION_ID, new_message=content)
+    session_id = await agent_runners.session_id_for(user_id, session_id, resume=resume)
+    events = agent_runners.run_async(user_id=user_id, session_id=session_id, new_message=content)
 
     print("Thinking...", end="", flush=True)
     async for event in events:
@@ -229,7 +351,28 @@ async def call_agent_async(query, image_path=None):
                         print(f"   Args: {part.function_call.args}")
         except Exception as e:
             print(f"\n[Log]: Event error: {e}")
+    stats = history_compactor.prompt_stats(last=1)
+    if stats["recent"]:
+        last = stats["recent"][-1]
+        print(f"\n[HISTORY]: Last prompt ~{last['history_tokens'] + last['instruction_tokens']} tokens "
+              f"(history {last['history_tokens']}, max this process {stats['max_history_tokens']}).")
+    memo = tool_memo.stats()
+    if memo["hits"]:
+        print(f"[TOOL MEMO]: {memo['hits']} of {memo['calls']} deterministic tool calls served from cache.")
     print("\n" + "="*50)
+    return session_id
+
+async def main(query, image_path=None, resume: bool = False):
+    """
+    Process entry point: warm the runners once, then serve the query.
+    Each run starts a new conversation; resume=True continues the last stored one (and its room).
+    """
+    await runner_registry.warm_up()
+    await warm_up_market_search()
+    product_catalog.warm_up()
+    tariff_table.warm_up()
+    pdf_text_extractor.warm_up()
+    return await call_agent_async(query, image_path=image_path, resume=resume)
 
 if __name__ == "__main__":
     # test_query = "I have a 20 sqm home office with only one 800 lumen bulb. It feels too dark for working. Calculate exactly how many lumens I am missing for standard office work (500 lux) and find me a suitable lamp on amazon."
@@ -328,4 +471,4 @@ if __name__ == "__main__":
     I need a DIMMABLE LED bulb for my bedroom. 
     Find one, VERIFY it is dimmable in the specs, and confirm to me.
     """
-    asyncio.run(call_agent_async(query))
\ No newline at end of file
+    asyncio.run(main(query, resume="--resume" in sys.argv))
\ No newline at end of file
@@ -0,0 +1,126 @@
+# my_agent/fixture_schedule.py
+import os
+import csv
+import json
+from typing import Callable, Dict, Iterator, Optional, Type
+
+# Column aliases accepted in fixture schedules (lowercased header -> SpatialState field)
+FIELD_ALIASES = {
+    "name": "name", "fixture": "name", "label": "name",
+    "lumens": "lumens", "lm": "lumens", "lumen": "lumens",
+    "x": "x", "x_m": "x",
+    "y": "y", "y_m": "y",
+    "height": "height", "mounting_height_m": "height", "z": "height",
+    "beam_angle": "beam_angle", "beam_angle_degrees": "beam_angle", "beam": "beam_angle",
+}
+NUMERIC_FIELDS = ("lumens", "x", "y", "height", "beam_angle")
+
+JSON_READ_CHUNK = 64 * 1024
+JSON_SEPARATORS = " \t\r\n,[]"
+
+class FixtureScheduleError(ValueError):
+    """A fixture schedule row is malformed (missing name/lumens or non-numeric values)."""
+
+def normalize_fixture(raw: Dict, line: int = 0) -> Dict:
+    """
+    Maps one schedule row onto add_light_source fields.
+    Empty cells are dropped; x/y are kept only when both are present.
+    """
+    row = {}
+    for key, value in raw.items():
+        field = FIELD_ALIASES.get(str(key).strip().lower())
+        if field is None or value is None or value == "":
+            continue
+        if field in NUMERIC_FIELDS:
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                raise FixtureScheduleError(f"Row {line}: '{key}' is not a number ({value!r}).")
+        else:
+            value = str(value).strip()
+        row[field] = value
+
+    if "name" not in row or "lumens" not in row:
+        raise FixtureScheduleError(f"Row {line}: 'name' and 'lumens' are required.")
+    if "x" not in row or "y" not in row:
+        row.pop("x", None)
+        row.pop("y", None)
+    return row
+
+def _iter_csv(f, normalize: Callable[[Dict, int], Dict], error: Type[ValueError]) -> Iterator[Dict]:
+    for line, raw in enumerate(csv.DictReader(f), start=2):
+        yield normalize(raw, line)
+
+def _iter_json(f, normalize: Callable[[Dict, int], Dict], error: Type[ValueError]) -> Iterator[Dict]:
+    """
+    Streams a top-level JSON array of objects, or JSON Lines, without loading the
+    whole document: objects are decoded one at a time from a rolling buffer.
+    """
+    decoder = json.JSONDecoder()
+    buf, pos, eof, record = "", 0, False, 0
+    while True:
+        # Skip array brackets and separators between records
+        while pos < len(buf) and buf[pos] in JSON_SEPARATORS:
+            pos += 1
+        if pos == len(buf):
+            if eof:
+                return
+            buf, pos = f.read(JSON_READ_CHUNK), 0
+            eof = not buf
+            continue
+        try:
+            obj, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError as e:
+            if eof:
+                raise error(f"Invalid JSON near record {record + 1}: {e.msg}")
+            # The record straddles the chunk boundary: read more and retry
+            chunk = f.read(JSON_READ_CHUNK)
+            eof = not chunk
+            buf, pos = buf[pos:] + chunk, 0
+            continue
+        record += 1
+        if not isinstance(obj, dict):
+            raise error(f"Record {record}: expected an object, got {type(obj).__name__}.")
+        yield normalize(obj, record)
+        pos = end
+
+def iter_records(source, normalize: Callable[[Dict, int], Dict], fmt: Optional[str] = None,
+                 error: Type[ValueError] = FixtureScheduleError) -> Iterator[Dict]:
+    """
+    Streams rows of a CSV or JSON feed through `normalize(raw_row, line_or_record)`.
+
+    Args:
+        source: File path, or an open text file object.
+        normalize: Maps one raw row onto the caller's fields; raises `error` if it is malformed.
+        fmt: "csv" or "json"; inferred from the file extension when omitted
+            (.csv / .json / .jsonl / .ndjson).
+        error: Exception raised for malformed JSON.
+    """
+    if fmt is None:
+        name = source if isinstance(source, (str, os.PathLike)) else getattr(source, "name", "")
+        ext = os.path.splitext(str(name))[1].lower()
+        fmt = "csv" if ext == ".csv" else "json" if ext in (".json", ".jsonl", ".ndjson") else None
+        if fmt is None:
+            raise ValueError("Cannot infer the feed format; pass fmt='csv' or fmt='json'.")
+    if fmt not in ("csv", "json"):
+        raise ValueError(f"Unknown feed format '{fmt}'. Use 'csv' or 'json'.")
+
+    reader = _iter_csv if fmt == "csv" else _iter_json
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "r", encoding="utf-8", newline="") as f:
+            yield from reader(f, normalize, error)
+    else:
+        yield from reader(source, normalize, error)
+
+def iter_fixture_rows(source, fmt: Optional[str] = None) -> Iterator[Dict]:
+    """
+    Streams normalized fixture rows from a CSV or JSON schedule.
+
+    Args:
+        source: File path, or an open text file object.
+        fmt: "csv" or "json"; inferred from the file extension when omitted
+            (.csv / .json / .jsonl / .ndjson).
+
+    Yields: dicts with "name", "lumens" and, when present, "x", "y", "height", "beam_angle".
+    """
+    return iter_records(source, normalize_fixture, fmt)
@@ -0,0 +1,240 @@
+# my_agent/history_compaction.py
+import os
+import json
+import math
+import time
+import threading
+from collections import OrderedDict, deque
+from typing import Dict, List, Optional, Tuple
+
+from google.genai import types
+
+try:
+    from .standards_kb import estimate_tokens, CHARS_PER_TOKEN
+except ImportError:
+    from standards_kb import estimate_tokens, CHARS_PER_TOKEN
+
+# Configuration (environment overridable)
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "6000"))  # conversation part of the prompt, estimated
+HISTORY_KEEP_TURNS = int(os.getenv("HISTORY_KEEP_TURNS", "2"))  # latest user turns sent verbatim
+TOOL_DIGEST_MIN_CHARS = int(os.getenv("TOOL_DIGEST_MIN_CHARS", "400"))  # older tool results above this are digested
+PROMPT_METRICS_WINDOW = 512
+
+DIGEST_CHARS = 160
+DIGEST_MAX_FIELDS = 8
+SUMMARY_HEADER = "[Earlier in this conversation (compacted)]"
+
+def _clip(text: str, limit: int) -> str:
+    text = " ".join(str(text).split())
+    return text if len(text) <= limit else text[:limit - 1] + "…"
+
+def part_chars(part: types.Part) -> int:
+    if part.text:
+        return len(part.text)
+    if part.function_call:
+        return len(part.function_call.name or "") + len(json.dumps(part.function_call.args or {}, default=str))
+    if part.function_response:
+        return len(json.dumps(part.function_response.response or {}, default=str))
+    if part.inline_data and part.inline_data.data:
+        return 258 * CHARS_PER_TOKEN  # Gemini bills an image as ~258 tokens
+    return 0
+
+def content_tokens(contents: List[types.Content]) -> int:
+    """Estimated tokens of a list of contents (same chars-per-token rule as the KB budget)."""
+    return sum(math.ceil(part_chars(p) / CHARS_PER_TOKEN) for c in contents for p in (c.parts or []))
+
+def digest_response(name: str, response: Dict) -> Dict:
+    """
+    A short stand-in for a large tool result: scalar fields of JSON results
+    (prices, lux, ROI) survive; long text keeps its first line and its size.
+    """
+    value = response.get("result", response) if isinstance(response, dict) and len(response) == 1 else response
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            pass
+    digest: Dict = {"digest": True}
+    if isinstance(value, dict):
+        scalars = {k: v for k, v in value.items() if isinstance(v, (int, float, bool)) or
+                   (isinstance(v, str) and len(v) <= 80)}
+        digest.update(dict(list(scalars.items())[:DIGEST_MAX_FIELDS]))
+        omitted = len(value) - min(len(scalars), DIGEST_MAX_FIELDS)
+        if omitted:
+            digest["omitted_fields"] = omitted
+    else:
+        text = str(value)
+        digest["summary"] = _clip(text.strip().splitlines()[0] if text.strip() else "", DIGEST_CHARS)
+        digest["original_chars"] = len(text)
+    digest["note"] = f"Compacted. Call {name} again if the full result is needed."
+    return digest
+
+def _is_user_turn(content: types.Content) -> bool:
+    """A user message (not a function response) starts a new turn."""
+    return content.role == "user" and any(p.text or p.inline_data for p in (content.parts or []))
+
+def split_turns(contents: List[types.Content]) -> List[List[types.Content]]:
+    turns: List[List[types.Content]] = []
+    for content in contents:
+        if not turns or _is_user_turn(content):
+            turns.append([])
+        turns[-1].append(content)
+    return turns
+
+def summarize_turn(turn: List[types.Content]) -> str:
+    """'- User: <ask> | Tools: a(x=1), b(...) | Answer: <reply>' for one compacted turn."""
+    asked, calls, answer = "", [], ""
+    for content in turn:
+        for part in content.parts or []:
+            if part.function_call:
+                args = ", ".join(f"{k}={_clip(v, 30)}" for k, v in (part.function_call.args or {}).items())
+                calls.append(f"{part.function_call.name}({_clip(args, 80)})")
+            elif part.text and content.role == "user" and not asked:
+                asked = part.text
+            elif part.text and content.role == "model" and not part.thought:
+                answer = part.text
+    line = f"- User: {_clip(asked, 120)}"
+    if calls:
+        line += f" | Tools: {', '.join(calls[:6])}" + (f" (+{len(calls) - 6})" if len(calls) > 6 else "")
+    if answer:
+        line += f" | Answer: {_clip(answer, DIGEST_CHARS)}"
+    return line
+
+def _digested(content: types.Content) -> Tuple[types.Content, bool]:
+    """A copy of the content with large function responses digested (the session event is untouched)."""
+    parts, changed = [], False
+    for part in content.parts or []:
+        response = part.function_response
+        if response is not None and part_chars(part) > TOOL_DIGEST_MIN_CHARS:
+            part = types.Part(function_response=types.FunctionResponse(
+                id=response.id, name=response.name, response=digest_response(response.name, response.response or {})))
+            changed = True
+        parts.append(part)
+    return (types.Content(role=content.role, parts=parts), True) if changed else (content, False)
+
+def compact_contents(contents: List[types.Content], token_budget: int = HISTORY_TOKEN_BUDGET,
+                     keep_turns: int = HISTORY_KEEP_TURNS) -> Tuple[List[types.Content], Dict]:
+    """
+    Bounds the conversation history sent to the model:
+    1. tool results older than the last `keep_turns` user turns are replaced by digests;
+    2. if still over `token_budget`, the oldest turns are folded into a one-line-per-turn
+       summary prepended to the first kept turn (call/response pairs are never split).
+    Returns (new contents, {"digested", "summarized_turns"}). The input is not modified.
+    """
+    turns = split_turns(contents)
+    keep_turns = max(1, keep_turns)  # the current turn is always sent as is
+    old, recent = turns[:-keep_turns], turns[-keep_turns:]
+    info = {"digested": 0, "summarized_turns": 0}
+    if not old:
+        return list(contents), info
+
+    compacted_old = []
+    for turn in old:
+        new_turn = []
+        for content in turn:
+            content, changed = _digested(content)
+            info["digested"] += changed
+            new_turn.append(content)
+        compacted_old.append(new_turn)
+
+    tokens = [content_tokens(t) for t in compacted_old]
+    remaining, budget_left = sum(tokens), token_budget - sum(content_tokens(t) for t in recent)
+    folded = 0
+    if remaining > budget_left:
+        # Folding makes room for the summary too, which is capped at a quarter of the budget
+        summary_budget = token_budget // 4
+        while folded < len(compacted_old) and remaining > budget_left - summary_budget:
+            remaining -= tokens[folded]
+            folded += 1
+    if folded:
+        kept = compacted_old[folded:] + recent
+        lines = [summarize_turn(t) for t in old[:folded]]
+        while len(lines) > 1 and estimate_tokens("\n".join(lines)) + 20 > summary_budget:  # + header/footer
+            lines.pop(0)
+        if len(lines) < folded:
+            lines.insert(0, f"- ({folded - len(lines)} earlier turns omitted)")
+        summary = types.Part(text=SUMMARY_HEADER + "\n" + "\n".join(lines) + "\n[End of summary]")
+        first = kept[0][0]
+        kept[0] = [types.Content(role=first.role, parts=[summary] + list(first.parts or []))] + kept[0][1:]
+        info["summarized_turns"] = folded
+    else:
+        kept = compacted_old + recent
+    return [content for turn in kept for content in turn], info
+
+class HistoryCompactor:
+    """
+    before/after model callbacks that keep the prompt bounded over long
+    (persistent) audit conversations, and record the prompt size of every
+    model call.
+
+    The session keeps the full history; only the request sent to the model
+    is compacted, so a later turn can still ask for a tool result again.
+    Metrics per model call: estimated history tokens before/after compaction,
+    instruction tokens, the model's own prompt_token_count when it reports
+    usage, and the latency to the first response chunk.
+    """
+
+    def __init__(self, token_budget: int = HISTORY_TOKEN_BUDGET, keep_turns: int = HISTORY_KEEP_TURNS,
+                 window: int = PROMPT_METRICS_WINDOW):
+        self.token_budget = token_budget
+        self.keep_turns = keep_turns
+        self._calls: "deque[Dict]" = deque(maxlen=window)
+        self._open: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()  # invocation -> (start, metric)
+        self._lock = threading.Lock()
+        self._totals = {"calls": 0, "compacted_calls": 0, "digested": 0, "summarized_turns": 0}
+
+    def before_model(self, callback_context, llm_request) -> None:
+        contents = list(llm_request.contents or [])
+        before = content_tokens(contents)
+        compacted, info = compact_contents(contents, self.token_budget, self.keep_turns)
+        llm_request.contents = compacted
+        instruction = llm_request.config.system_instruction if llm_request.config else None
+        metric = {
+            "session_id": callback_context.session.id, "invocation_id": callback_context.invocation_id,
+            "contents": len(compacted), "history_tokens_before": before,
+            "history_tokens": content_tokens(compacted),
+            "instruction_tokens": estimate_tokens(instruction) if isinstance(instruction, str) else 0,
+            "prompt_token_count": None, "latency_ms": None, **info,
+        }
+        if info["digested"] or info["summarized_turns"]:
+            print(f"[HISTORY]: Prompt history {before} -> {metric['history_tokens']} tokens "
+                  f"({info['digested']} tool results digested, {info['summarized_turns']} turns summarized).")
+        with self._lock:
+            self._calls.append(metric)
+            self._open[callback_context.invocation_id] = (time.perf_counter(), metric)
+            while len(self._open) > PROMPT_METRICS_WINDOW:
+                self._open.popitem(last=False)
+            self._totals["calls"] += 1
+            self._totals["compacted_calls"] += bool(info["digested"] or info["summarized_turns"])
+            self._totals["digested"] += info["digested"]
+            self._totals["summarized_turns"] += info["summarized_turns"]
+        return None
+
+    def after_model(self, callback_context, llm_response) -> None:
+        with self._lock:
+            opened = self._open.get(callback_context.invocation_id)
+        if opened is None:
+            return None
+        start, metric = opened
+        if metric["latency_ms"] is None:
+            metric["latency_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        usage = llm_response.usage_metadata
+        if usage is not None and usage.prompt_token_count:
+            metric["prompt_token_count"] = usage.prompt_token_count
+        return None
+
+    def prompt_stats(self, last: int = 10) -> Dict:
+        """Totals, average/max history tokens and latency over the window, and the last `last` calls."""
+        with self._lock:
+            calls = list(self._calls)
+            totals = dict(self._totals)
+        sizes = [c["history_tokens"] for c in calls]
+        latencies = [c["latency_ms"] for c in calls if c["latency_ms"] is not None]
+        return dict(totals,
+                    avg_history_tokens=round(sum(sizes) / len(sizes), 1) if sizes else 0.0,
+                    max_history_tokens=max(sizes, default=0),
+                    avg_latency_ms=round(sum(latencies) / len(latencies), 1) if latencies else None,
+                    recent=[dict(c) for c in calls[-last:]])
+
+# Shared by the spatial agent's model callbacks
+history_compactor = HistoryCompactor()
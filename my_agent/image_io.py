@@ -0,0 +1,99 @@
+# my_agent/image_io.py
+import io
+import os
+import math
+from PIL import Image, UnidentifiedImageError
+
+# Upload guards for the vision audit (environment overridable)
+MAX_UPLOAD_BYTES = int(os.getenv("AUDIT_MAX_UPLOAD_BYTES", str(25 * 1024 * 1024)))
+# Photos above this are downscaled before the heatmap/contour pipeline
+MAX_WORKING_MEGAPIXELS = float(os.getenv("AUDIT_MAX_WORKING_MEGAPIXELS", "2.0"))
+# Headers claiming more than this are rejected outright (decompression bombs)
+MAX_DECODE_MEGAPIXELS = float(os.getenv("AUDIT_MAX_DECODE_MEGAPIXELS", "120"))
+
+EXIF_ORIENTATION_TAG = 0x0112
+_ORIENTATION_TRANSPOSE = {
+    2: Image.Transpose.FLIP_LEFT_RIGHT,
+    3: Image.Transpose.ROTATE_180,
+    4: Image.Transpose.FLIP_TOP_BOTTOM,
+    5: Image.Transpose.TRANSPOSE,
+    6: Image.Transpose.ROTATE_270,
+    7: Image.Transpose.TRANSVERSE,
+    8: Image.Transpose.ROTATE_90,
+}
+
+class InvalidImageError(ValueError):
+    """The upload is not a decodable image."""
+
+class ImageTooLargeError(ValueError):
+    """The upload exceeds the byte or pixel limits."""
+
+def _target_size(w: int, h: int, max_megapixels: float) -> tuple:
+    """Largest size with the same aspect ratio that fits in max_megapixels."""
+    max_pixels = max_megapixels * 1e6
+    if w * h <= max_pixels:
+        return w, h
+    scale = math.sqrt(max_pixels / (w * h))
+    return max(1, int(w * scale)), max(1, int(h * scale))
+
+def inspect_image(image_bytes: bytes, max_bytes: int = MAX_UPLOAD_BYTES,
+                  max_decode_megapixels: float = MAX_DECODE_MEGAPIXELS) -> tuple:
+    """
+    Cheap upload validation: checks the byte size and reads only the header.
+    Returns: (width, height, format). Raises ImageTooLargeError / InvalidImageError.
+    """
+    if len(image_bytes) > max_bytes:
+        raise ImageTooLargeError(f"Upload is {len(image_bytes)} bytes; the limit is {max_bytes} bytes.")
+    try:
+        with Image.open(io.BytesIO(image_bytes)) as img:
+            w, h = img.size
+            fmt = img.format
+    except Image.DecompressionBombError as e:
+        raise ImageTooLargeError(str(e))
+    except (UnidentifiedImageError, OSError) as e:
+        raise InvalidImageError(f"Unsupported or corrupt image: {e}")
+
+    if w * h > max_decode_megapixels * 1e6:
+        raise ImageTooLargeError(f"Image is {w * h / 1e6:.1f} MP; the limit is {max_decode_megapixels:g} MP.")
+    return w, h, fmt
+
+def load_working_image(image_bytes: bytes, max_megapixels: float = MAX_WORKING_MEGAPIXELS,
+                       max_bytes: int = MAX_UPLOAD_BYTES,
+                       max_decode_megapixels: float = MAX_DECODE_MEGAPIXELS) -> Image.Image:
+    """
+    Decodes an uploaded photo directly at (about) its working resolution.
+
+    - JPEG: draft mode lets libjpeg decode at 1/2, 1/4 or 1/8 scale (never below target).
+    - Other formats: Image.reduce() by the largest integer factor, which is a cheap box filter.
+    - A final resize lands exactly within max_megapixels.
+    - EXIF orientation is applied once, on the small image.
+
+    Returns: RGB PIL image of at most max_megapixels. Its info["source_size"] is the
+    upload's (width, height) after orientation, to map pixel positions measured on the
+    original photo onto the working image.
+    """
+    inspect_image(image_bytes, max_bytes=max_bytes, max_decode_megapixels=max_decode_megapixels)
+
+    img = Image.open(io.BytesIO(image_bytes))
+    orientation = img.getexif().get(EXIF_ORIENTATION_TAG, 1)
+    source_size = (img.height, img.width) if orientation in (5, 6, 7, 8) else (img.width, img.height)
+    target = _target_size(img.width, img.height, max_megapixels)
+
+    if img.format == "JPEG" and target != img.size:
+        img.draft("RGB", target)
+
+    if img.mode not in ("RGB", "RGBA", "L"):
+        img = img.convert("RGB")
+
+    factor = min(img.width // target[0], img.height // target[1])
+    if factor >= 2:
+        img = img.reduce(factor)
+    if img.width * img.height > max_megapixels * 1e6:
+        img = img.resize(_target_size(img.width, img.height, max_megapixels), Image.Resampling.BILINEAR)
+
+    if orientation in _ORIENTATION_TRANSPOSE:
+        img = img.transpose(_ORIENTATION_TRANSPOSE[orientation])
+
+    working = img.convert("RGB")
+    working.info["source_size"] = source_size
+    return working
@@ -0,0 +1,120 @@
+# my_agent/json_stream.py
+import json
+from typing import Callable, Optional
+
+# Characters a JSON value may contain outside string literals
+_WHITESPACE = frozenset(" \t\r\n")
+_SCALAR_CHARS = frozenset("0123456789-+.eEtrufalsn")
+
+class IncrementalJsonScanner:
+    """
+    Finds the first complete top-level JSON object in streamed text.
+
+    feed() takes text chunks as they arrive and tracks nesting outside of
+    string literals (escapes included), so nothing before the object (markdown
+    fences, prose) matters. When an object closes it is parsed and passed to
+    `validate`; the first object that parses and validates is returned.
+
+    A candidate fails as soon as it cannot be JSON (a "{" not followed by a key,
+    mismatched brackets, prose between the tokens) or when it closes and does
+    not parse or validate. Scanning then restarts at the next "{" after the
+    failed one, so a stray brace in prose ("see {note below}") never hides the
+    object that follows.
+
+        scanner = IncrementalJsonScanner(validate=check_schema)
+        for chunk in stream:
+            obj = scanner.feed(chunk)
+            if obj is not None:
+                break  # stop consuming the stream
+    """
+
+    def __init__(self, validate: Optional[Callable[[dict], Optional[dict]]] = None):
+        self.validate = validate  # returns the (possibly coerced) object, or None to reject it
+        self.result: Optional[dict] = None
+        self.rejected = 0
+        self.chars_seen = 0
+        self._reset()
+
+    def _reset(self):
+        self._buf = []
+        self._stack = []  # open "{" / "[" of the candidate
+        self._in_string = False
+        self._escape = False
+        self._expect_key = False
+
+    def feed(self, chunk: str) -> Optional[dict]:
+        """Consumes a chunk. Returns the first valid object once it is complete, else None."""
+        if self.result is not None:
+            return self.result
+        text, carried, i = chunk, 0, 0  # the first `carried` chars of text were counted before (a rescan)
+        while i < len(text):
+            ch = text[i]
+            if not self._stack:
+                if ch != "{":
+                    i += 1
+                    continue
+                self._buf = []
+            self._buf.append(ch)
+
+            ok = self._step(ch)
+            if not ok:
+                self.rejected += 1
+            elif not self._stack:
+                if self._accept("".join(self._buf)):
+                    self.chars_seen += i + 1 - carried
+                    return self.result
+                ok = False
+            if ok:
+                i += 1
+                continue
+
+            # Restart at the next "{" after the failed start
+            tail = "".join(self._buf)[1:]
+            tail = tail[tail.find("{"):] if "{" in tail else ""
+            self._reset()
+            self.chars_seen += i + 1 - carried
+            text, carried, i = tail + text[i + 1:], len(tail), 0
+        self.chars_seen += len(text) - carried
+        return None
+
+    def _step(self, ch: str) -> bool:
+        """Advances the candidate by one character. False if it can no longer be JSON."""
+        if self._in_string:
+            if self._escape:
+                self._escape = False
+            elif ch == "\\":
+                self._escape = True
+            elif ch == '"':
+                self._in_string = False
+            return True
+        if ch in _WHITESPACE:
+            return True
+        if self._expect_key and ch not in '"}':
+            return False
+        self._expect_key = False
+        if ch == '"':
+            self._in_string = True
+        elif ch in "{[":
+            self._stack.append(ch)
+            self._expect_key = ch == "{"
+        elif ch in "}]":
+            return self._stack.pop() == ("{" if ch == "}" else "[")
+        elif ch == ",":
+            self._expect_key = self._stack[-1] == "{"
+        elif ch != ":" and ch not in _SCALAR_CHARS:
+            return False
+        return True
+
+    def _accept(self, text: str) -> bool:
+        try:
+            obj = json.loads(text)
+        except json.JSONDecodeError:
+            self.rejected += 1
+            return False
+        if self.validate is not None:
+            obj = self.validate(obj)
+        if not isinstance(obj, dict):
+            self.rejected += 1
+            return False
+        self.result = obj
+        return True
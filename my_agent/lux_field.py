@@ -0,0 +1,190 @@
+# my_agent/lux_field.py
+import math
+import threading
+from collections import OrderedDict
+import numpy as np
+
+# Upper bound on elements per (lamps x rows x cols) working block.
+# 2M float64 elements ~ 16 MB per temporary, a handful of temporaries per block.
+DEFAULT_BLOCK_ELEMENTS = 2_000_000
+
+DEFAULT_MOUNTING_HEIGHT = 2.5
+DEFAULT_BEAM_ANGLE = 120.0
+
+def unit_lumen_field(X, Y, height: float, beam_angle_degrees: float) -> np.ndarray:
+    """
+    Illuminance (Lux) produced on the floor by a 1 lm source at (0, 0, height).
+    Same model as the single-lamp heatmap: E = (I / D^2) * cos(theta), with uniform
+    intensity inside the beam and a soft cutoff over the outer 20% of the half-angle.
+    Scale by the real lumen value to get the actual field.
+    """
+    D_sq = X**2 + Y**2 + height**2
+    D_light = np.sqrt(D_sq)
+    cos_theta = height / D_light
+    angle_of_point_rad = np.arccos(cos_theta)
+
+    beam_cutoff_rad = np.radians(beam_angle_degrees / 2)
+    solid_angle = 2 * np.pi * (1 - np.cos(beam_cutoff_rad))
+    start_fade = beam_cutoff_rad * 0.8
+    mask = np.clip((beam_cutoff_rad - angle_of_point_rad) / (beam_cutoff_rad - start_fade), 0, 1)
+
+    return (1.0 / solid_angle) / D_sq * cos_theta * mask
+
+class UnitKernelCache:
+    """
+    LRU-bounded cache of unit-lumen floor fields for a single centered lamp.
+
+    The field scales linearly with lumens, so only (height, beam angle, grid spec)
+    determine its shape. Cached arrays are read-only and can be shared freely
+    across threadpool workers; callers get any lumen value with one multiply.
+    """
+
+    def __init__(self, maxsize: int = 64):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, height: float, beam_angle_degrees: float, half_extent: float = 3.0, points: int = 100):
+        """
+        Returns (X, Y, unit_field) for a square grid of `points` x `points`
+        spanning [-half_extent, half_extent] meters on both axes.
+        """
+        key = (float(height), float(beam_angle_degrees), float(half_extent), int(points))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        # Compute outside the lock; a concurrent miss on the same key only duplicates work
+        axis = np.linspace(-half_extent, half_extent, points)
+        X, Y = np.meshgrid(axis, axis)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            unit = unit_lumen_field(X, Y, height, beam_angle_degrees)
+        for arr in (X, Y, unit):
+            arr.setflags(write=False)
+        entry = (X, Y, unit)
+
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return entry
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+                "size": len(self._entries),
+                "maxsize": self.maxsize
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+# Shared by the heatmap generators
+heatmap_kernel_cache = UnitKernelCache()
+
+def luminaires_to_arrays(luminaires) -> dict:
+    """
+    Normalizes a list of luminaire dicts into column arrays.
+    Each luminaire: {"x": m, "y": m, "lumens": lm, "height": m (opt), "beam_angle": deg (opt)}.
+    """
+    n = len(luminaires)
+    cols = {k: np.empty(n, dtype=np.float64) for k in ("x", "y", "height", "lumens", "beam_angle")}
+    for i, lum in enumerate(luminaires):
+        cols["x"][i] = lum["x"]
+        cols["y"][i] = lum["y"]
+        cols["lumens"][i] = lum["lumens"]
+        cols["height"][i] = lum.get("height", DEFAULT_MOUNTING_HEIGHT)
+        cols["beam_angle"][i] = lum.get("beam_angle", DEFAULT_BEAM_ANGLE)
+    return cols
+
+def compute_illuminance_field(
+    luminaires,
+    room_width: float,
+    room_depth: float,
+    resolution: float = 0.1,
+    block_elements: int = DEFAULT_BLOCK_ELEMENTS
+) -> dict:
+    """
+    Point-by-point illuminance on the floor of a (room_width x room_depth) room,
+    summing the direct contribution of every luminaire.
+
+    Lamps are processed in chunks (and the grid in row blocks) so that no temporary
+    exceeds `block_elements`, which keeps memory bounded for hundreds of lamps
+    on million-cell grids.
+
+    Args:
+        luminaires: List of luminaire dicts (see luminaires_to_arrays) or the
+            column dict it returns.
+        room_width: Room extent along X (meters).
+        room_depth: Room extent along Y (meters).
+        resolution: Grid spacing in meters. Points sit at cell centers.
+        block_elements: Max lamps*rows*cols evaluated at once.
+
+    Returns:
+        dict with "x", "y" (grid coordinates), "field" (Lux, shape [ny, nx]),
+        and the summary metrics "e_avg", "e_min", "e_max", "uniformity" (Emin/Eavg).
+    """
+    if room_width <= 0 or room_depth <= 0 or resolution <= 0:
+        raise ValueError("Room dimensions and resolution must be positive.")
+
+    cols = luminaires if isinstance(luminaires, dict) else luminaires_to_arrays(luminaires)
+
+    nx = max(1, math.ceil(room_width / resolution))
+    ny = max(1, math.ceil(room_depth / resolution))
+    xs = (np.arange(nx) + 0.5) * (room_width / nx)
+    ys = (np.arange(ny) + 0.5) * (room_depth / ny)
+    field = np.zeros((ny, nx), dtype=np.float64)
+
+    n_lamps = len(cols["lumens"])
+    if n_lamps:
+        # Per-lamp constants, computed once
+        height = cols["height"]
+        cutoff = np.radians(cols["beam_angle"] / 2)
+        intensity = cols["lumens"] / (2 * np.pi * (1 - np.cos(cutoff)))
+        fade_width = cutoff - cutoff * 0.8
+
+        rows_per_block = max(1, min(ny, block_elements // nx))
+        lamps_per_chunk = max(1, min(n_lamps, block_elements // (rows_per_block * nx)))
+
+        for r0 in range(0, ny, rows_per_block):
+            r1 = min(ny, r0 + rows_per_block)
+            ys_block = ys[r0:r1]
+            for l0 in range(0, n_lamps, lamps_per_chunk):
+                l1 = min(n_lamps, l0 + lamps_per_chunk)
+                h = height[l0:l1, None, None]
+
+                dx = xs[None, None, :] - cols["x"][l0:l1, None, None]
+                dy = ys_block[None, :, None] - cols["y"][l0:l1, None, None]
+                D_sq = dx * dx + dy * dy + h * h
+                cos_theta = h / np.sqrt(D_sq)
+                mask = np.clip(
+                    (cutoff[l0:l1, None, None] - np.arccos(cos_theta)) / fade_width[l0:l1, None, None], 0, 1
+                )
+                E = intensity[l0:l1, None, None] / D_sq * cos_theta * mask
+                field[r0:r1] += E.sum(axis=0)
+
+    e_avg = float(field.mean())
+    e_min = float(field.min())
+    return {
+        "x": xs,
+        "y": ys,
+        "field": field,
+        "e_avg": e_avg,
+        "e_min": e_min,
+        "e_max": float(field.max()),
+        "uniformity": e_min / e_avg if e_avg > 0 else 0.0
+    }
@@ -1,22 +1,41 @@
 # my_agent/market_agent.py
 import os
-import json
-import re
+import time
+import threading
+import weakref
+from typing import Optional
 from dotenv import load_dotenv
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
 
 load_dotenv()
 
 from google.adk.agents import Agent
-from google.adk.runners import Runner
-from google.adk.sessions import InMemorySessionService
 from google.adk.tools import google_search
 from google.genai import types
 
+from google.adk.agents import RunConfig
+from google.adk.agents.run_config import StreamingMode
+
+try:
+    from .runner_registry import RunnerPool
+    from .market_cache import market_cache, normalize_query, query_kind, FRESH, STALE
+    from .singleflight import SingleFlight
+    from .metrics import LatencyWindow
+    from .json_stream import IncrementalJsonScanner
+except ImportError:
+    from runner_registry import RunnerPool
+    from market_cache import market_cache, normalize_query, query_kind, FRESH, STALE
+    from singleflight import SingleFlight
+    from metrics import LatencyWindow
+    from json_stream import IncrementalJsonScanner
+
 APP_NAME = "market_search_service"
 USER_ID = "spatial_engine_core"
-SESSION_ID = "market_session_v1"
+MARKET_RUNNER_POOL_SIZE = int(os.getenv("MARKET_RUNNER_POOL_SIZE", "4"))
+# Per-call budget: past it, callers get the cached/fallback value and the search finishes in the background
+MARKET_SEARCH_DEADLINE_S = float(os.getenv("MARKET_SEARCH_DEADLINE_S", "15"))
+# Stream the answer (SSE) so the JSON scanner can stop as soon as the object is complete
+MARKET_STREAMING = os.getenv("MARKET_STREAMING", "1") != "0"
 
 FALLBACK_DEFAULTS = {
     "product": {
@@ -91,60 +110,234 @@ market_agent_core = Agent(
     tools=[google_search]
 )
 
-def clean_json_string(text: str) -> dict:
-    """Helper to extract JSON from Markdown blocks or raw text"""
-    try:
-        match = re.search(r"(\{.*\})", text, re.DOTALL)
-        if match:
-            json_str = match.group(1)
-            return json.loads(json_str)
-        else:
-            return json.loads(text)
-    except Exception as e:
-        return {"error": "Failed to parse JSON", "raw_text": text}
+# Fields the rest of the engine relies on: name -> (type, required)
+MARKET_SCHEMAS = {
+    "product": {
+        "name": (str, True), "price_usd": (float, True), "watts": (float, True), "lumens": (float, False),
+        "is_dimmable": (bool, False), "protocol": (str, False), "link": (str, False)
+    },
+    "rate": {
+        "rate_usd_kwh": (float, True), "location": (str, False), "source": (str, False)
+    }
+}
 
-async def _run_market_search(query: str):
-    session_service = InMemorySessionService()
-    session = await session_service.create_session(app_name=APP_NAME, user_id=USER_ID, session_id=SESSION_ID)
-    runner = Runner(agent=market_agent_core, app_name=APP_NAME, session_service=session_service)
-    
+class MarketResponseError(Exception):
+    """The market agent's answer contained no object matching the product/rate schema."""
+
+def _coerce(value, kind):
+    if kind is float:
+        if isinstance(value, bool):
+            raise ValueError("boolean is not a number")
+        if isinstance(value, str):
+            value = value.strip().lstrip("$").replace(",", "")
+        return float(value)
+    if kind is bool:
+        if isinstance(value, str) and value.strip().lower() in ("true", "yes", "false", "no"):
+            return value.strip().lower() in ("true", "yes")
+        if not isinstance(value, bool):
+            raise ValueError("not a boolean")
+        return value
+    return str(value)
+
+def validate_market_record(obj) -> Optional[dict]:
+    """
+    Checks a parsed object against MARKET_SCHEMAS (type inferred from its fields when
+    missing). Returns a copy with numeric/bool strings coerced, or None if it does not fit.
+    """
+    if not isinstance(obj, dict):
+        return None
+    kind = obj.get("type") or ("rate" if "rate_usd_kwh" in obj else "product")
+    schema = MARKET_SCHEMAS.get(kind)
+    if schema is None:
+        return None
+    record = dict(obj, type=kind)
+    for field, (field_type, required) in schema.items():
+        if record.get(field) is None:
+            if required:
+                return None
+            continue
+        try:
+            record[field] = _coerce(record[field], field_type)
+        except (TypeError, ValueError):
+            return None
+    if kind == "product" and "lumens" in record:
+        record["lumens"] = int(record["lumens"])
+    return record
+
+# One RunnerPool per event loop: model clients hold loop-bound HTTP connections.
+_market_pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, RunnerPool]" = weakref.WeakKeyDictionary()
+_market_pools_lock = threading.Lock()
+
+def _market_runners() -> RunnerPool:
+    """Persistent market runners + session service for the running event loop."""
+    loop = asyncio.get_running_loop()
+    with _market_pools_lock:
+        pool = _market_pools.get(loop)
+        if pool is None:
+            pool = RunnerPool(market_agent_core.clone(), APP_NAME, size=MARKET_RUNNER_POOL_SIZE)
+            _market_pools[loop] = pool
+    return pool
+
+async def warm_up_market_search():
+    """Process-start hook: warms the market runners of the running loop."""
+    await _market_runners().warm_up()
+
+async def _run_market_search(query: str) -> dict:
+    """
+    Runs the market agent and returns the first schema-valid JSON object of its answer.
+    Text is scanned incrementally as it streams; the stream is closed as soon as the
+    object is complete, so trailing prose is never waited for.
+    Raises MarketResponseError if the answer holds no valid object.
+    """
+    pool = _market_runners()
     content = types.Content(role='user', parts=[types.Part(text=query)])
-    events = runner.run_async(user_id=USER_ID, session_id=SESSION_ID, new_message=content)
-    
-    final_text = ""
-    async for event in events:
-         if event.content and event.content.parts:
-            for part in event.content.parts:
-                if part.text:
-                    final_text += part.text
-    
-    return final_text
+    run_config = RunConfig(streaming_mode=StreamingMode.SSE) if MARKET_STREAMING else None
+    scanner = IncrementalJsonScanner(validate=validate_market_record)
 
-def _run_in_thread(query: str):
-    """Internal helper to run asyncio.run in a separate thread"""
-    return asyncio.run(_run_market_search(query))
+    # Every query gets a clean context; the runners and session service persist
+    async with pool.ephemeral_session(USER_ID) as session_id:
+        events = pool.run_async(USER_ID, session_id, content, run_config=run_config)
+        streamed = False  # in SSE mode the final event repeats the partial chunks
+        try:
+            async for event in events:
+                if not (event.content and event.content.parts):
+                    continue
+                if not event.partial and streamed:
+                    streamed = False
+                    continue
+                streamed = bool(event.partial)
+                for part in event.content.parts:
+                    if part.text and scanner.feed(part.text) is not None:
+                        _search_stats["early_stops"] += 1
+                        return scanner.result
+        finally:
+            await events.aclose()
 
-def search_product_data(query: str) -> dict:
+    raise MarketResponseError(f"No valid product/rate JSON in the answer ({scanner.rejected} objects rejected).")
+
+def _fallback_for(query: str) -> dict:
+    return dict(FALLBACK_DEFAULTS[query_kind(query)])
+
+_search_stats = {"upstream_calls": 0, "upstream_failures": 0, "revalidations": 0, "timeouts": 0, "early_stops": 0}
+_upstream_latency = LatencyWindow()  # agent runs, success or failure
+_call_latency = LatencyWindow()  # what callers waited, cache hits and timeouts included
+# One upstream agent run per normalized key; concurrent identical queries share it
+_inflight = SingleFlight()
+
+async def _search_upstream(query: str, kind: str, key: str) -> dict:
+    """Runs the market agent, parses its JSON and caches real results. Raises on failure."""
+    _search_stats["upstream_calls"] += 1
+    start = time.perf_counter()
+    try:
+        data = await _run_market_search(query)
+    except Exception:
+        _search_stats["upstream_failures"] += 1
+        raise
+    finally:
+        _upstream_latency.record(time.perf_counter() - start)
+    market_cache.put(key, kind, data, latency_s=time.perf_counter() - start)
+    return data
+
+def _schedule_revalidation(query: str, kind: str, key: str):
+    """Refreshes a stale entry in the background (joins the in-flight search if there is one)."""
+    if _inflight.in_flight(key):
+        return
+    _search_stats["revalidations"] += 1
+
+    def log_failure(future):
+        if future.exception() is not None:
+            print(f"\n[MARKET AGENT]: Background refresh of '{key}' failed ({future.exception()}); keeping the stale entry.")
+
+    _inflight.flight(key, lambda: _search_upstream(query, kind, key)).add_done_callback(log_failure)
+
+async def search_product_data_async(query: str, use_cache: bool = True,
+                                    deadline_s: Optional[float] = MARKET_SEARCH_DEADLINE_S) -> dict:
     """
-    Universal entry point for Market Agent.
+    Universal entry point for Market Agent (async, runs on the caller's event loop).
+    Results are cached by normalized query (rates for longer than products); stale
+    entries are returned immediately and refreshed in the background. Concurrent
+    identical queries share one upstream search.
+    After `deadline_s` (None = no limit) the caller gets the last known cached value,
+    or the fallback, while the search keeps running to fill the cache.
     If search fails, returns default averages.
     """
+    start = time.perf_counter()
+    try:
+        return await _search_with_deadline(query, use_cache, deadline_s)
+    finally:
+        _call_latency.record(time.perf_counter() - start)
+
+async def _search_with_deadline(query: str, use_cache: bool, deadline_s: Optional[float]) -> dict:
+    kind, key = normalize_query(query)
+    if use_cache:
+        cached, state = market_cache.get(key)
+        if state == FRESH:
+            return cached
+        if state == STALE:
+            _schedule_revalidation(query, kind, key)
+            return cached
+
     try:
-        with ThreadPoolExecutor(max_workers=1) as executor:
-            future = executor.submit(_run_in_thread, query)
-            raw_text = future.result()
-        data = clean_json_string(raw_text)
-        if "error" in data:
-            raise Exception("Search API Error")
-        return data
+        # wait_for cancels only this caller's shielded wait; the flight runs on
+        data = await asyncio.wait_for(_inflight.do(key, lambda: _search_upstream(query, kind, key)), deadline_s)
+        return dict(data)  # waiters share one result; hand each a copy
+
+    except asyncio.TimeoutError:
+        _search_stats["timeouts"] += 1
+        last_known = market_cache.peek(key)
+        print(f"\n[⚠️ MARKET AGENT WARNING] Search exceeded {deadline_s}s; "
+              f"using {'last known' if last_known else 'FALLBACK'} values while it finishes in the background.")
+        return last_known or _fallback_for(query)
 
     except Exception as e:
         print(f"\n[⚠️ MARKET AGENT WARNING] Search failed ({str(e)}). Using FALLBACK defaults.")
-        query_lower = query.lower()
-        if "rate" in query_lower or "electricity" in query_lower or "cost" in query_lower:
-            return FALLBACK_DEFAULTS["rate"]
-        else:
-            return FALLBACK_DEFAULTS["product"]
+        return _fallback_for(query)
+
+def market_search_stats() -> dict:
+    """Cache hit rate / saved latency, upstream counters and latency percentiles."""
+    return {
+        "cache": market_cache.stats(),
+        **_search_stats,
+        "single_flight": _inflight.stats(),
+        "upstream_latency": _upstream_latency.summary(),
+        "call_latency": _call_latency.summary()
+    }
+
+class _BackgroundLoop:
+    """One long-lived event loop on a daemon thread, shared by all sync callers."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name=self.name, daemon=True)
+                thread.start()
+                self._loop, self._thread = loop, thread
+            return self._loop
+
+    def run(self, coro):
+        """Runs coro on the background loop and blocks the calling thread for its result."""
+        loop = self._ensure_started()
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError("Blocking call from the background loop itself; await the coroutine instead.")
+        return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+_background_loop = _BackgroundLoop("market-search-loop")
+
+def search_product_data(query: str, deadline_s: Optional[float] = MARKET_SEARCH_DEADLINE_S) -> dict:
+    """
+    Sync wrapper for old callers: runs search_product_data_async on one shared
+    background loop (no thread or event loop is created per query).
+    Async code should await search_product_data_async directly.
+    """
+    return _background_loop.run(search_product_data_async(query, deadline_s=deadline_s))
 
 if __name__ == "__main__":
     # print("Testing Rate Finder...")
@@ -0,0 +1,237 @@
+# my_agent/market_cache.py
+import os
+import re
+import json
+import time
+import sqlite3
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+# Configuration (environment overridable)
+MARKET_CACHE_DB = os.getenv("MARKET_CACHE_DB", os.path.join(tempfile.gettempdir(), "spatial_engine_market_cache.sqlite3"))
+MARKET_CACHE_MEMORY_ENTRIES = int(os.getenv("MARKET_CACHE_MEMORY_ENTRIES", "512"))
+# Rates change at most monthly; product prices and stock move faster
+MARKET_RATE_TTL_S = float(os.getenv("MARKET_RATE_TTL_S", str(30 * 24 * 3600)))
+MARKET_PRODUCT_TTL_S = float(os.getenv("MARKET_PRODUCT_TTL_S", str(24 * 3600)))
+# After the TTL, entries are still served (and revalidated) for another TTL * factor
+MARKET_STALE_FACTOR = float(os.getenv("MARKET_STALE_FACTOR", "1.0"))
+
+FRESH = "fresh"
+STALE = "stale"
+
+# --- Query normalization ---
+RATE_WORDS = {"rate", "rates", "electricity", "kwh", "tariff", "tariffs", "cost", "utility"}
+# A rate question names electricity itself; "cost" or "rate" alone also ask for lamp prices
+ELECTRICITY_WORDS = {"electricity", "kwh", "tariff", "utility"}
+# Lamp terms and brands: with any of these (or a lm/W/K value) the query is about a product
+PRODUCT_WORDS = {
+    "bulb", "lm", "w", "led", "dimmable", "fixture", "fixtures", "downlight", "downlights", "spotlight",
+    "zigbee", "wifi", "bluetooth", "brand", "philips", "hue", "ikea", "cree", "feit", "ge", "innr", "jasco",
+    "lifx", "nanoleaf", "sengled", "sylvania", "wiz", "osram",
+}
+SYNONYMS = {
+    "power": "electricity", "energy": "electricity", "electric": "electricity", "electrical": "electricity",
+    "tariffs": "tariff", "rates": "rate", "prices": "price", "costs": "cost",
+    "lamp": "bulb", "lamps": "bulb", "bulbs": "bulb", "lightbulb": "bulb", "globe": "bulb",
+    "dimable": "dimmable", "lumen": "lm", "lumens": "lm", "watt": "w", "watts": "w",
+    "nyc": "new york", "ny": "new york", "la": "los angeles", "sf": "san francisco",
+}
+STOPWORDS = {
+    "a", "an", "the", "of", "for", "in", "at", "to", "me", "my", "find", "search", "what", "whats", "is",
+    "are", "current", "average", "avg", "please", "get", "show", "price", "per", "how", "much", "does",
+    "residential", "and", "on", "with", "latest", "today", "now",
+}
+# Words that end a location phrase ("rate in new york per kwh")
+LOCATION_STOP = RATE_WORDS | {"per", "price", "average", "residential", "today", "now", "kw", "2023", "2024", "2025", "2026"}
+
+UNITS = {"lm": "lm", "lumen": "lm", "lumens": "lm", "w": "w", "watt": "w", "watts": "w", "k": "k", "kelvin": "k"}
+_UNIT_RE = re.compile(r"(\d+(?:\.\d+)?)\s*(lm|lumens?|w|watts?|kelvin|k)\b")
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:\.[0-9]+)?")
+_LOCATION_RE = re.compile(r"\b(?:in|for|at)\s+([a-z][a-z .'-]*)")
+
+def query_kind(query: str) -> str:
+    """
+    'rate' for electricity-rate questions, else 'product'. A rate question names
+    electricity, kWh, a tariff or a utility and no lamp: "How much does an 800 lm
+    bulb cost in New York" is a product question.
+    """
+    text = query.lower()
+    tokens = set(_TOKEN_RE.findall(text))
+    tokens |= {SYNONYMS.get(t, t) for t in tokens}
+    if tokens & PRODUCT_WORDS or _UNIT_RE.search(text):
+        return "product"
+    return "rate" if tokens & ELECTRICITY_WORDS else "product"
+
+def extract_location(query: str) -> Optional[str]:
+    """Location of a rate query ('Electricity rate in New York?' -> 'new york'), or None."""
+    match = _LOCATION_RE.search(query.lower())
+    if not match:
+        return None
+    words = []
+    for word in match.group(1).replace(".", " ").split():
+        if word in LOCATION_STOP or word.isdigit():
+            break
+        words.append(word)
+    location = SYNONYMS.get(" ".join(words), " ".join(words)).strip(" '-")
+    return location or None
+
+def normalize_query(query: str) -> Tuple[str, str]:
+    """
+    Cache key for a market query: (kind, key).
+
+    Lowercases, collapses whitespace and units ("1500 lumens" -> "1500lm"),
+    maps synonyms, drops filler words and sorts the remaining tokens.
+    Rate queries are keyed by their location when one is found, so
+    "Electricity rate in New York" and "NYC power cost per kWh?" share an entry.
+    """
+    kind = query_kind(query)
+    text = query.lower()
+    if kind == "rate":
+        location = extract_location(text)
+        if location:
+            return kind, f"rate:{location}"
+
+    text = _UNIT_RE.sub(lambda m: m.group(1) + UNITS[m.group(2)], text)
+    tokens = []
+    for token in _TOKEN_RE.findall(text):
+        token = SYNONYMS.get(token, token)
+        if token not in STOPWORDS:
+            tokens.extend(token.split())
+    if kind == "rate":
+        # What is left is the location (years and rate words do not change the answer)
+        tokens = [t for t in tokens if t not in LOCATION_STOP and not t.isdigit()]
+        return kind, "rate:" + " ".join(tokens)
+    return kind, f"{kind}:" + " ".join(sorted(set(tokens)))
+
+class MarketCache:
+    """
+    Two-tier TTL cache for market search results.
+
+    - Tier 1: in-memory LRU (`memory_entries`). Tier 2: SQLite at `db_path`
+      (None = memory only), so results survive restarts and are shared by workers.
+    - TTL depends on the kind: rates (MARKET_RATE_TTL_S) vs products (MARKET_PRODUCT_TTL_S).
+    - get() reports FRESH or STALE; stale entries (past the TTL, within
+      TTL * stale_factor more) should be served while the caller revalidates.
+    - Metrics: hits per tier, stale hits, misses, hit rate, and the upstream
+      latency the hits saved (each entry remembers how long its search took).
+    """
+
+    def __init__(self, db_path: Optional[str] = MARKET_CACHE_DB, memory_entries: int = MARKET_CACHE_MEMORY_ENTRIES,
+                 rate_ttl_s: float = MARKET_RATE_TTL_S, product_ttl_s: float = MARKET_PRODUCT_TTL_S,
+                 stale_factor: float = MARKET_STALE_FACTOR, clock=time.time):
+        self.db_path = db_path
+        self.memory_entries = memory_entries
+        self.ttl_s = {"rate": rate_ttl_s, "product": product_ttl_s}
+        self.stale_factor = stale_factor
+        self._clock = clock
+
+        # key -> (value, stored_at, expires_at, stale_until, latency_s)
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "stale_hits": 0, "misses": 0, "writes": 0,
+                       "saved_latency_s": 0.0}
+
+        self._db = None
+        if db_path:
+            try:
+                self._db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS market_cache (key TEXT PRIMARY KEY, kind TEXT, value TEXT, "
+                    "stored_at REAL, expires_at REAL, stale_until REAL, latency_s REAL)"
+                )
+            except sqlite3.Error as e:
+                print(f"[MARKET CACHE]: SQLite tier unavailable ({e}); using memory only.")
+                self._db = None
+
+    def _remember(self, key: str, entry: tuple):
+        """Inserts into the LRU and trims it. Caller holds the lock."""
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Tuple[Optional[dict], Optional[str]]:
+        """Returns (value, FRESH | STALE), or (None, None) on a miss or a fully expired entry."""
+        now = self._clock()
+        with self._lock:
+            entry = self._memory.get(key)
+            tier = "memory_hits"
+            if entry is not None:
+                self._memory.move_to_end(key)
+            elif self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, stored_at, expires_at, stale_until, latency_s FROM market_cache WHERE key = ?",
+                    (key,)
+                ).fetchone()
+                if row is not None:
+                    entry = (json.loads(row[0]),) + tuple(row[1:])
+                    self._remember(key, entry)
+                    tier = "disk_hits"
+
+            if entry is None or now > entry[3]:
+                self._stats["misses"] += 1
+                return None, None
+
+            value, _, expires_at, _, latency_s = entry
+            self._stats[tier] += 1
+            self._stats["saved_latency_s"] += latency_s
+            if now > expires_at:
+                self._stats["stale_hits"] += 1
+                return dict(value), STALE
+            return dict(value), FRESH
+
+    def peek(self, key: str) -> Optional[dict]:
+        """Last known value regardless of age (deadline fallback); does not count as a hit."""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None and self._db is not None:
+                row = self._db.execute("SELECT value FROM market_cache WHERE key = ?", (key,)).fetchone()
+                return json.loads(row[0]) if row is not None else None
+        return dict(entry[0]) if entry is not None else None
+
+    def put(self, key: str, kind: str, value: dict, latency_s: float = 0.0):
+        """Stores a real (non-fallback) search result with the TTL of its kind."""
+        now = self._clock()
+        ttl = self.ttl_s.get(kind, self.ttl_s["product"])
+        entry = (dict(value), now, now + ttl, now + ttl * (1 + self.stale_factor), float(latency_s))
+        with self._lock:
+            self._remember(key, entry)
+            self._stats["writes"] += 1
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO market_cache VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key, kind, json.dumps(value)) + entry[1:]
+                )
+
+    def purge_expired(self) -> int:
+        """Deletes entries past their stale window from both tiers. Returns rows deleted on disk."""
+        now = self._clock()
+        with self._lock:
+            for key in [k for k, e in self._memory.items() if now > e[3]]:
+                del self._memory[key]
+            if self._db is None:
+                return 0
+            return self._db.execute("DELETE FROM market_cache WHERE stale_until < ?", (now,)).rowcount
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM market_cache")
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits = self._stats["memory_hits"] + self._stats["disk_hits"]
+            lookups = hits + self._stats["misses"]
+            return dict(
+                self._stats,
+                saved_latency_s=round(self._stats["saved_latency_s"], 3),
+                hit_rate=round(hits / lookups, 3) if lookups else 0.0,
+                memory_entries=len(self._memory)
+            )
+
+# Shared by the market search
+market_cache = MarketCache()
@@ -0,0 +1,38 @@
+# my_agent/metrics.py
+import threading
+from collections import deque
+
+import numpy as np
+
+class LatencyWindow:
+    """
+    Rolling window of the last `maxlen` latency samples (seconds), for tuning
+    timeouts and budgets: summary() gives count, mean and p50/p90/p99/max in ms.
+    """
+
+    def __init__(self, maxlen: int = 1024):
+        self._samples = deque(maxlen=maxlen)
+        self._total = 0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+            self._total += 1
+
+    def summary(self) -> dict:
+        with self._lock:
+            samples = np.array(self._samples, dtype=np.float64) * 1000
+            total = self._total
+        if not len(samples):
+            return {"count": total, "window": 0}
+        p50, p90, p99 = np.percentile(samples, [50, 90, 99])
+        return {
+            "count": total,
+            "window": len(samples),
+            "mean_ms": round(float(samples.mean()), 1),
+            "p50_ms": round(float(p50), 1),
+            "p90_ms": round(float(p90), 1),
+            "p99_ms": round(float(p99), 1),
+            "max_ms": round(float(samples.max()), 1)
+        }
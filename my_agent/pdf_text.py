@@ -0,0 +1,229 @@
+# my_agent/pdf_text.py
+import os
+import hashlib
+import itertools
+import threading
+import multiprocessing
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import pypdf
+
+# Configuration (environment overridable)
+PDF_MAX_CHARS = int(os.getenv("PDF_MAX_CHARS", "20000"))  # per read_pdf_file call
+PDF_CACHE_PAGES = int(os.getenv("PDF_CACHE_PAGES", "5000"))  # extracted pages kept in memory
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Below this many uncached pages a process pool costs more than it saves
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "48"))
+PDF_PAGE_BATCH = int(os.getenv("PDF_PAGE_BATCH", "16"))
+
+_HASH_BLOCK = 1 << 20
+
+def file_digest(path: str) -> str:
+    """sha256 of the file's bytes, read in 1 MB blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _extract_batch(path: str, first: int, last: int) -> List[str]:
+    """Process-pool worker: text of pages first..last (1-based, inclusive)."""
+    reader = pypdf.PdfReader(path)
+    return [reader.pages[i - 1].extract_text() for i in range(first, last + 1)]
+
+class PdfTextExtractor:
+    """
+    Page-level PDF text extraction with a content-addressed cache.
+
+    - iter_pages() is a generator: callers that stop early (a char budget)
+      never pay for the pages they did not read.
+    - Extracted pages are cached under the file's sha256, so a datasheet read
+      again, or copied under another name, is not parsed twice; an edited file
+      gets a new hash. The hash itself is remembered per (path, mtime, size).
+    - In runs of >= parallel_min_pages uncached pages (a whole lighting
+      catalog) the first batch is extracted inline and the rest in batches by
+      a process pool, a bounded window ahead of the reader; results still
+      come back in page order. Spawned workers import this module (and the
+      main script): warm_up() pays that once, at process start.
+    """
+
+    def __init__(self, cache_pages: int = PDF_CACHE_PAGES, workers: int = PDF_EXTRACT_WORKERS,
+                 parallel_min_pages: int = PDF_PARALLEL_MIN_PAGES, batch_pages: int = PDF_PAGE_BATCH):
+        self.cache_pages = cache_pages
+        self.workers = workers
+        self.parallel_min_pages = parallel_min_pages
+        self.batch_pages = batch_pages
+        self._pages: "OrderedDict[Tuple[str, int], str]" = OrderedDict()
+        self._page_counts: Dict[str, int] = {}
+        self._digests: Dict[Tuple[str, int, int], str] = {}
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._stats = {"pages_extracted": 0, "page_cache_hits": 0, "parallel_batches": 0}
+
+    # --- Cache ---
+
+    def digest(self, path: str) -> str:
+        st = os.stat(path)
+        key = (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+        digest = self._digests.get(key)
+        if digest is None:
+            digest = file_digest(path)
+            with self._lock:
+                self._digests[key] = digest
+        return digest
+
+    def _cached(self, digest: str, page: int) -> Optional[str]:
+        with self._lock:
+            text = self._pages.get((digest, page))
+            if text is not None:
+                self._pages.move_to_end((digest, page))
+                self._stats["page_cache_hits"] += 1
+            return text
+
+    def _is_cached(self, digest: str, page: int) -> bool:
+        return (digest, page) in self._pages  # no LRU touch: used to measure uncached runs
+
+    def _remember(self, digest: str, first: int, texts: List[str]):
+        with self._lock:
+            for offset, text in enumerate(texts):
+                self._pages[(digest, first + offset)] = text
+                self._pages.move_to_end((digest, first + offset))
+            self._stats["pages_extracted"] += len(texts)
+            while len(self._pages) > self.cache_pages:
+                self._pages.popitem(last=False)
+
+    def page_count(self, path: str) -> int:
+        digest = self.digest(path)
+        count = self._page_counts.get(digest)
+        if count is None:
+            count = len(pypdf.PdfReader(path).pages)
+            self._page_counts[digest] = count
+        return count
+
+    # --- Extraction ---
+
+    def _process_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # spawn: forking a process that runs an event loop and tool threads is unsafe
+                self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                                 mp_context=multiprocessing.get_context("spawn"))
+            return self._pool
+
+    def warm_up(self) -> int:
+        """Process-start hook: spawns the extraction workers (none on a single CPU). Returns their number."""
+        if self.workers <= 1:
+            return 0
+        pool = self._process_pool()
+        # Submitted together, each task finds no idle worker and starts a new one
+        for future in [pool.submit(os.getpid) for _ in range(self.workers)]:
+            future.result()
+        return self.workers
+
+    def iter_pages(self, path: str, first_page: int = 1, last_page: Optional[int] = None) -> Iterator[Tuple[int, str]]:
+        """
+        Yields (page number, text) for pages first_page..last_page (1-based,
+        inclusive, clamped to the document). Raises ValueError past the last page.
+        """
+        digest, count = self.digest(path), self.page_count(path)
+        first = max(first_page, 1)
+        last = count if last_page is None else min(last_page, count)
+        if first > count:
+            raise ValueError(f"'{path}' has {count} pages; page {first} does not exist.")
+
+        reader = None
+        page = first
+        while page <= last:
+            text = self._cached(digest, page)
+            if text is not None:
+                yield page, text
+                page += 1
+                continue
+            run_end = page
+            while run_end < last and not self._is_cached(digest, run_end + 1):
+                run_end += 1
+            inline_end = run_end
+            if self.workers > 1 and run_end - page + 1 >= self.parallel_min_pages:
+                # The first batch inline: a reader that stops within it never waits on the pool
+                inline_end = page + self.batch_pages - 1
+            if reader is None:
+                reader = pypdf.PdfReader(path)
+            for i in range(page, inline_end + 1):
+                text = reader.pages[i - 1].extract_text()
+                self._remember(digest, i, [text])
+                yield i, text
+            if inline_end < run_end:
+                yield from self._iter_parallel(path, digest, inline_end + 1, run_end)
+            page = run_end + 1
+
+    def _iter_parallel(self, path: str, digest: str, first: int, last: int) -> Iterator[Tuple[int, str]]:
+        pool = self._process_pool()
+        batches = ((start, min(start + self.batch_pages - 1, last))
+                   for start in range(first, last + 1, self.batch_pages))
+
+        def submit(start: int, end: int) -> Tuple[int, Future]:
+            def remember(future: Future):
+                # Batches that finish after the reader stopped still land in the cache
+                if not future.cancelled() and future.exception() is None:
+                    self._remember(digest, start, future.result())
+
+            future = pool.submit(_extract_batch, path, start, end)
+            future.add_done_callback(remember)
+            with self._lock:
+                self._stats["parallel_batches"] += 1
+            return start, future
+
+        # Keep a bounded window of batches in flight: an early stop wastes at most the window
+        pending = deque(submit(*batch) for batch in itertools.islice(batches, self.workers * 2))
+        try:
+            while pending:
+                start, future = pending.popleft()
+                texts = future.result()
+                batch = next(batches, None)
+                if batch is not None:
+                    pending.append(submit(*batch))
+                for offset, text in enumerate(texts):
+                    yield start + offset, text
+        finally:
+            for _, future in pending:
+                future.cancel()
+
+    def extract_text(self, path: str, first_page: int = 1, last_page: Optional[int] = None,
+                     max_chars: Optional[int] = None) -> Dict:
+        """
+        Text of a page range as "[Page N]\\n<text>\\n" blocks, stopping at max_chars.
+        Returns {"text", "page_count", "first_page", "last_page" (last page shown),
+        "next_page" (where to continue, or None when the range is complete)}.
+        """
+        parts: List[str] = []
+        used, shown, next_page = 0, None, None
+        pages = self.iter_pages(path, first_page, last_page)
+        try:
+            for page, text in pages:
+                block = f"[Page {page}]\n{text}\n"
+                if max_chars is not None and used + len(block) > max_chars:
+                    if parts:
+                        next_page = page
+                    else:  # the first page alone is over budget: cut it, continue after it
+                        parts.append(block[:max_chars] + " …[page truncated]\n")
+                        shown, next_page = page, page + 1
+                    break
+                parts.append(block)
+                used += len(block)
+                shown = page
+        finally:
+            pages.close()
+        count = self.page_count(path)
+        if next_page is not None and (next_page > count or (last_page is not None and next_page > last_page)):
+            next_page = None
+        return {"text": "".join(parts), "page_count": count, "first_page": max(first_page, 1),
+                "last_page": shown, "next_page": next_page}
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats, cached_pages=len(self._pages), workers=self.workers)
+
+# Shared by read_pdf_file and extract_datasheet_specs
+pdf_text_extractor = PdfTextExtractor()
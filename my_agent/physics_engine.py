@@ -1,6 +1,29 @@
 # my_agent\physics_engine.py
 import math
 import json
+import functools
+from typing import Optional
+
+try:
+    from .lux_field import heatmap_kernel_cache
+    from .colormaps import PLASMA_LUT
+    from .image_io import load_working_image
+    from .tariff_table import tariff_table
+except ImportError:
+    from lux_field import heatmap_kernel_cache
+    from colormaps import PLASMA_LUT
+    from image_io import load_working_image
+    from tariff_table import tariff_table
+
+# "publication": matplotlib contourf with axes, title and colorbar (reports).
+# "fast": quantized plasma raster encoded straight to PNG with PIL (interactive use).
+HEATMAP_RENDER_MODES = ("publication", "fast")
+FAST_HEATMAP_SIZE = 400  # px per side; also the grid resolution of the fast path
+HEATMAP_LEVELS = 20
+OVERLAY_WORK_SIDE = 512  # px; max side of the vision overlay's heatmap grid
+OVERLAY_LAMP_SIGMA = 1 / 5  # per-lamp Gaussian sigma, as a fraction of min(w, h)
+OVERLAY_FFT_MIN_LAMPS = 64  # below this, direct per-lamp summation beats one FFT convolution
+DEFAULT_KWH_COST_USD = 0.17  # US average, when neither a rate nor a known location is given
 
 def calculate_lux_at_point(light_lumens: float, distance_meters: float, beam_angle_degrees: float = 120) -> str:
     """
@@ -31,11 +54,101 @@ def calculate_lux_at_point(light_lumens: float, distance_meters: float, beam_ang
     print(f"[PHYSICS ENGINE]: Result = {result} lux")
     return str(result)
 
-def generate_light_distribution_heatmap(lumens: float, distance_meters: float, beam_angle_degrees: float) -> str:
+def calculate_lux_batch(light_lumens, distance_meters, beam_angle_degrees=120) -> "np.ndarray":
+    """
+    Vectorized version of calculate_lux_at_point for scoring many fixtures at once.
+    Inputs are broadcast against each other, so a scalar beam angle can be combined
+    with arrays of lumens and distances.
+
+    Args:
+        light_lumens: Array-like of luminous flux values (lm).
+        distance_meters: Array-like of distances from source to surface (m).
+        beam_angle_degrees: Array-like (or scalar) of beam angles (default 120).
+
+    Returns:
+        np.ndarray: Unrounded float64 Lux levels. Non-positive distances yield 0.0,
+        matching the scalar API. Rounding to 2 decimals gives the scalar result.
+    """
+    import numpy as np
+
+    lumens = np.asarray(light_lumens, dtype=np.float64)
+    distance = np.asarray(distance_meters, dtype=np.float64)
+    beam = np.asarray(beam_angle_degrees, dtype=np.float64)
+    lumens, distance, beam = np.broadcast_arrays(lumens, distance, beam)
+
+    # Same operation order as the scalar path so both APIs agree to the last digit
+    solid_angle = 2 * np.pi * (1 - np.cos(np.radians(beam) / 2))
+    candela = lumens / solid_angle
+
+    valid = distance > 0
+    lux = np.zeros(distance.shape, dtype=np.float64)
+    np.divide(candela, distance ** 2, out=lux, where=valid)
+    return lux
+
+def calculate_lux_records(records: list) -> "np.ndarray":
+    """
+    Batch Lux calculation over a list of records, e.g.
+    [{"lumens": 800, "distance": 2.0, "angle": 120}, ...].
+    "angle" is optional and defaults to 120 degrees, like the scalar API.
+    """
+    import numpy as np
+
+    n = len(records)
+    lumens = np.empty(n, dtype=np.float64)
+    distance = np.empty(n, dtype=np.float64)
+    beam = np.empty(n, dtype=np.float64)
+    for i, rec in enumerate(records):
+        lumens[i] = rec["lumens"]
+        distance[i] = rec["distance"]
+        beam[i] = rec.get("angle", 120)
+    return calculate_lux_batch(lumens, distance, beam)
+
+def _render_heatmap_fast(illuminance, levels: int = HEATMAP_LEVELS) -> str:
+    """
+    Matplotlib-free heatmap: quantizes the field into the same bands contourf draws
+    (levels from 0 to max), colors each band from the precomputed plasma LUT and
+    encodes a palette PNG with PIL. Row 0 of the field is the lowest Y, so it is flipped.
+    Returns: Base64 encoded PNG string.
+    """
+    import numpy as np
+    import io
+    import base64
+    from PIL import Image
+
+    n_bands = levels - 1
+    field = np.nan_to_num(illuminance)
+    vmax = field.max()
+    if vmax > 0:
+        bands = np.minimum(field * (n_bands / vmax), n_bands - 1).astype(np.uint8)
+    else:
+        bands = np.zeros(field.shape, dtype=np.uint8)
+
+    # Band i is colored at its midpoint, like contourf's filled layers
+    lut_index = np.minimum(((np.arange(n_bands) + 0.5) / n_bands * 256).astype(int), 255)
+    img = Image.fromarray(np.ascontiguousarray(np.flipud(bands)))
+    img.putpalette(PLASMA_LUT[lut_index].tobytes())
+
+    buf = io.BytesIO()
+    img.save(buf, format="PNG", compress_level=1)
+    return base64.b64encode(buf.getvalue()).decode('utf-8')
+
+def generate_light_distribution_heatmap(lumens: float, distance_meters: float, beam_angle_degrees: float,
+                                        render_mode: str = "publication") -> str:
     """
     Generates a visual heatmap of the light distribution on the floor.
+    render_mode: "publication" (matplotlib, axes + colorbar) or "fast" (raster only).
     Returns: Base64 encoded PNG string.
     """
+    if render_mode not in HEATMAP_RENDER_MODES:
+        raise ValueError(f"Unknown render_mode '{render_mode}'. Use one of {HEATMAP_RENDER_MODES}.")
+
+    print(f"[PHYSICS ENGINE]: Generating Heatmap for {lumens}lm ({render_mode})...")
+
+    if render_mode == "fast":
+        _, _, unit_field = heatmap_kernel_cache.get(distance_meters, beam_angle_degrees,
+                                                    half_extent=3.0, points=FAST_HEATMAP_SIZE)
+        return _render_heatmap_fast(unit_field * lumens)
+
     import matplotlib
     matplotlib.use('Agg') # Non-interactive backend
     import matplotlib.pyplot as plt
@@ -43,57 +156,19 @@ def generate_light_distribution_heatmap(lumens: float, distance_meters: float, b
     import io
     import base64
 
-    print(f"[PHYSICS ENGINE]: Generating Heatmap for {lumens}lm...")
-
-    # Grid setup (Floor area 6x6 meters)
-    x = np.linspace(-3, 3, 100)
-    y = np.linspace(-3, 3, 100)
-    X, Y = np.meshgrid(x, y)
-    
-    # Calculate distance from center (0,0) on the floor
-    # We assume the light is at (0,0, distance_meters)
-    # Distance from light point to grid point (x,y,0)
-    # d = sqrt(x^2 + y^2 + h^2)
-    # But for lux simply: E = I / d^2 * cos(theta)
-    # approximate spot logic:
-    
-    R_floor = np.sqrt(X**2 + Y**2) # Distance from center on floor
-    D_light = np.sqrt(R_floor**2 + distance_meters**2) # Slant range
-    
-    # Cosine of angle of incidence (theta)
-    # cos(theta) = adjacent / hypotenuse = distance_meters / D_light
-    cos_theta = distance_meters / D_light
-    
-    # Beam angle cutoff
-    # If angle of point > beam_angle/2, intensity drops (simplified)
-    # angle_of_point = arccos(cos_theta)
-    angle_of_point_rad = np.arccos(cos_theta)
-    beam_cutoff_rad = np.radians(beam_angle_degrees / 2)
-    
-    # Intensity (Candela) distribution (Simplified Lambertian-ish within beam)
-    # I = I0 * cos(angle_of_point) ?? Generic approximation
-    # Let's assume uniform intensity I within beam for simplicity, or slightly peaked.
-    # Solid Angle = 2pi(1 - cos(beam/2))
-    solid_angle = 2 * np.pi * (1 - np.cos(beam_cutoff_rad))
-    I_avg = lumens / solid_angle
-    
-    # Simple falloff model: E = (I / D^2) * cos(theta)
-    # Only if angle_of_point < beam_cutoff
-    
-    Illuminance = (I_avg / (D_light**2)) * cos_theta
-    
-    # Apply cutoff
-    start_fade = beam_cutoff_rad * 0.8
-    # Soft mask
-    mask = np.clip((beam_cutoff_rad - angle_of_point_rad) / (beam_cutoff_rad - start_fade), 0, 1)
-    Illuminance = Illuminance * mask
+    # Grid setup (Floor area 6x6 meters), light at (0,0, distance_meters).
+    # The field is linear in lumens: E = lumens * unit_field(height, beam angle),
+    # with E = (I / D^2) * cos(theta) inside the beam and a soft cutoff at its edge.
+    # The unit field is cached per (height, beam angle, grid), so this is one multiply.
+    X, Y, unit_field = heatmap_kernel_cache.get(distance_meters, beam_angle_degrees, half_extent=3.0, points=100)
+    Illuminance = unit_field * lumens
 
     # Plotting
     fig, ax = plt.subplots(figsize=(6, 5), facecolor='black')
     ax.set_facecolor('black')
     
     # Countourf
-    levels = np.linspace(0, np.max(Illuminance), 20)
+    levels = np.linspace(0, np.max(Illuminance), HEATMAP_LEVELS)
     if np.max(Illuminance) == 0: levels = 10 # avoid error
     
     contour = ax.contourf(X, Y, Illuminance, levels=levels, cmap='plasma')
@@ -263,10 +338,144 @@ def generate_consumption_chart(old_watts: float, new_watts: float, hours_per_day
     
     return base64.b64encode(buf.read()).decode('utf-8')
 
+def _overlay_grid(w: int, h: int, work_side: int) -> tuple:
+    """Working grid for a (w x h) photo: (gw, gh, px_per_cell_x, px_per_cell_y)."""
+    scale = min(1.0, work_side / max(w, h))
+    gw, gh = max(2, round(w * scale)), max(2, round(h * scale))
+    return gw, gh, w / gw, h / gh
+
+def _fft_size(n: int) -> int:
+    """Smallest 2^a * 3^b * 5^c >= n (fast pocketfft lengths)."""
+    while True:
+        m = n
+        for p in (2, 3, 5):
+            while m % p == 0:
+                m //= p
+        if m == 1:
+            return n
+        n += 1
+
+@functools.lru_cache(maxsize=8)
+def _gaussian_kernel_fft(gh: int, gw: int, sigma_y: float, sigma_x: float):
+    """
+    Spectrum of a (2gh-1 x 2gw-1) separable Gaussian (sigma in grid cells), zero-padded
+    for linear (non-circular) convolution with a (gh x gw) impulse grid.
+    Returns: (kernel spectrum, padded shape). Cached: one per working grid/sigma.
+    """
+    import numpy as np
+
+    ky = np.arange(-(gh - 1), gh, dtype=np.float32)
+    kx = np.arange(-(gw - 1), gw, dtype=np.float32)
+    kernel = np.outer(np.exp(-ky**2 / np.float32(2 * sigma_y**2)), np.exp(-kx**2 / np.float32(2 * sigma_x**2)))
+    shape = (_fft_size(3 * gh - 2), _fft_size(3 * gw - 2))
+    spectrum = np.fft.rfft2(kernel, s=shape)
+    spectrum.setflags(write=False)
+    return spectrum, shape
+
+def _lamp_field_fft(w: int, h: int, lamp_px: list, work_side: int = OVERLAY_WORK_SIDE):
+    """
+    Sum of per-lamp Gaussians on the working grid via one FFT convolution:
+    lamps become (bilinearly splatted) impulses, convolved once with the kernel.
+    Cost is independent of the lamp count.
+    """
+    import numpy as np
+
+    gw, gh, px_x, px_y = _overlay_grid(w, h, work_side)
+    sigma = min(w, h) * OVERLAY_LAMP_SIGMA
+
+    coords = np.asarray(lamp_px, dtype=np.float64).reshape(-1, 2)
+    gx = np.clip(coords[:, 0] / px_x, 0, gw - 1)
+    gy = np.clip(coords[:, 1] / px_y, 0, gh - 1)
+    x0 = np.minimum(gx.astype(int), gw - 2)
+    y0 = np.minimum(gy.astype(int), gh - 2)
+    fx, fy = gx - x0, gy - y0
+
+    impulses = np.zeros((gh, gw), dtype=np.float32)
+    np.add.at(impulses, (y0, x0), (1 - fx) * (1 - fy))
+    np.add.at(impulses, (y0, x0 + 1), fx * (1 - fy))
+    np.add.at(impulses, (y0 + 1, x0), (1 - fx) * fy)
+    np.add.at(impulses, (y0 + 1, x0 + 1), fx * fy)
+
+    spectrum, shape = _gaussian_kernel_fft(gh, gw, round(sigma / px_y, 6), round(sigma / px_x, 6))
+    full = np.fft.irfft2(np.fft.rfft2(impulses, s=shape) * spectrum, s=shape)
+    return full[gh - 1:2 * gh - 1, gw - 1:2 * gw - 1].astype(np.float32)
+
+def _lamp_field_direct(w: int, h: int, lamp_px: list, work_side: int = OVERLAY_WORK_SIDE):
+    """Per-lamp summation of separable Gaussians: exact, cost grows with the lamp count."""
+    import numpy as np
+
+    gw, gh, px_x, px_y = _overlay_grid(w, h, work_side)
+    two_sigma_sq = np.float32(2 * (min(w, h) * OVERLAY_LAMP_SIGMA) ** 2)
+    xs = np.arange(gw, dtype=np.float32) * np.float32(px_x)
+    ys = np.arange(gh, dtype=np.float32) * np.float32(px_y)
+
+    field = np.zeros((gh, gw), dtype=np.float32)
+    for lx, ly in lamp_px:
+        field += np.outer(np.exp(-(ys - ly) ** 2 / two_sigma_sq), np.exp(-(xs - lx) ** 2 / two_sigma_sq))
+    return field
+
+def _overlay_heatmap_field(w: int, h: int, lamp_px: list = None, work_side: int = OVERLAY_WORK_SIDE):
+    """
+    Normalized vision-audit heatmap for a (w x h) photo.
+
+    With lamp positions (pixel coordinates), the field is the sum of per-lamp
+    Gaussians, normalized to a peak of 1.0 for the isolux levels. Small scenes are
+    summed directly; from OVERLAY_FFT_MIN_LAMPS lamps on, one FFT convolution keeps
+    the cost flat. Without lamps, it is one broad Gaussian centered on the image.
+
+    Everything lives on a working grid whose longest side is capped at `work_side`;
+    the centered Gaussian is separable, exp(-(dx^2 + dy^2) / 2s^2) = g(dy) * g(dx),
+    so it is an outer product of two float32 vectors. Memory no longer scales with
+    the photo's megapixels.
+    Returns: float32 array of shape (gh, gw), sampled in photo pixel coordinates.
+    """
+    import numpy as np
+
+    if lamp_px:
+        if len(lamp_px) >= OVERLAY_FFT_MIN_LAMPS:
+            field = _lamp_field_fft(w, h, lamp_px, work_side)
+        else:
+            field = _lamp_field_direct(w, h, lamp_px, work_side)
+        peak = field.max()
+        return field / peak if peak > 0 else field
+
+    gw, gh, px_x, px_y = _overlay_grid(w, h, work_side)
+    cy, cx = h // 2, w // 2
+    sigma = min(w, h) / 3
+
+    xs = np.arange(gw, dtype=np.float32) * np.float32(px_x)
+    ys = np.arange(gh, dtype=np.float32) * np.float32(px_y)
+    two_sigma_sq = np.float32(2 * sigma**2)
+    gx = np.exp(-((xs - cx) ** 2) / two_sigma_sq)
+    gy = np.exp(-((ys - cy) ** 2) / two_sigma_sq)
+    return np.outer(gy, gx)
+
 def overlay_heatmap_on_image(image_bytes: bytes, lamp_positions: list = None) -> str:
     """
     Overlays a light distribution heatmap AND a technical measurement grid.
     Matches the style of a CAD/Engineering interface.
+    Decodes the photo at working resolution, then delegates to render_overlay.
+    """
+    import numpy as np
+
+    try:
+        # Load Image at working resolution (draft/reduce decoding, EXIF orientation applied)
+        working = load_working_image(image_bytes)
+        img = np.asarray(working)
+    except Exception as e:
+        print(f"[PHYSICS ENGINE]: Error in overlay - {e}")
+        return ""
+    return render_overlay(img, lamp_positions, source_size=working.info.get("source_size"))
+
+def render_overlay(img, lamp_positions: list = None, source_size: tuple = None) -> str:
+    """
+    Draws the heatmap, isolux contours, lamp markers and tech grid over an
+    already decoded RGB array of shape (h, w, 3). Used directly when the photo
+    is cached, so a re-render costs compositing only.
+
+    lamp_positions: (x, y) pairs, relative (<= 1.0) or in pixels of the original
+    photo. source_size is that photo's (width, height); the working image may be
+    downscaled, so pixel positions are scaled to it (None: already working pixels).
     """
     import matplotlib
     matplotlib.use('Agg')
@@ -274,14 +483,11 @@ def overlay_heatmap_on_image(image_bytes: bytes, lamp_positions: list = None) ->
     import numpy as np
     import io
     import base64
-    from PIL import Image
 
     print(f"[PHYSICS ENGINE]: Processing Vision Audit - Overlaying Heatmap & Tech Grid...")
 
     try:
-        # Load Image
-        img = Image.open(io.BytesIO(image_bytes)).convert("RGB")
-        w, h = img.size
+        h, w = img.shape[:2]
         
         # Create figure matching image aspect ratio
         # DPI = 100 ensures readable font size relative to image
@@ -293,40 +499,38 @@ def overlay_heatmap_on_image(image_bytes: bytes, lamp_positions: list = None) ->
         # We invert Y (h, 0) to match image coordinates (0,0 is top-left)
         ax.imshow(img, extent=[0, w, h, 0])
         
+        # lamp_positions is expected to be a list of (x, y) tuples
+        # If values are <= 1.0, treat as relative coordinates.
+        # If > 1.0, treat as pixel coordinates of the original photo (scaled to the working size).
+        sx, sy = (w / source_size[0], h / source_size[1]) if source_size else (1.0, 1.0)
+        lx_coords = []
+        ly_coords = []
+        for (lx, ly) in (lamp_positions or []):
+            if lx <= 1.0 and ly <= 1.0:
+                lx_coords.append(lx * w)
+                ly_coords.append(ly * h)
+            else:
+                lx_coords.append(lx * sx)
+                ly_coords.append(ly * sy)
+
         # --- 2. Generate Heatmap Logic ---
-        y_indices, x_indices = np.mgrid[0:h, 0:w]
-        cy, cx = h // 2, w // 2
-        dist_sq = (x_indices - cx)**2 + (y_indices - cy)**2
-        sigma = min(w, h) / 3 
-        heatmap_data = np.exp(-dist_sq / (2 * sigma**2))
+        # Sum of per-lamp kernels at the decided positions (centered Gaussian if none).
+        # Low-resolution field; imshow/contour stretch it to the photo extent.
+        heatmap_data = _overlay_heatmap_field(w, h, list(zip(lx_coords, ly_coords)))
         
         # Overlay Heatmap (Transparent)
         ax.imshow(heatmap_data, cmap='plasma', alpha=0.35, extent=[0, w, h, 0])
 
         # Add Contour Lines (Isolux Contour Map)
         # "Isolux" means lines of equal illuminance
+        # origin='upper' keeps row 0 at the top, aligned with the imshow layers
         levels = np.linspace(0.1, 1.0, 10) 
-        CS = ax.contour(heatmap_data, levels=levels, extent=[0, w, h, 0], 
+        CS = ax.contour(heatmap_data, levels=levels, extent=[0, w, h, 0], origin='upper',
                    colors='white', alpha=0.3, linewidths=0.5)
         ax.clabel(CS, inline=True, fontsize=6, fmt='%.1f', colors='white')
         
         # --- 2.1 Draw "Decided" Lamp Positions ---
         if lamp_positions:
-            # lamp_positions is expected to be a list of (x, y) tuples
-            # If values are <= 1.0, treat as relative coordinates.
-            # If > 1.0, treat as pixel coordinates.
-            
-            lx_coords = []
-            ly_coords = []
-            
-            for (lx, ly) in lamp_positions:
-                if lx <= 1.0 and ly <= 1.0:
-                    lx_coords.append(lx * w)
-                    ly_coords.append(ly * h)
-                else:
-                    lx_coords.append(lx)
-                    ly_coords.append(ly)
-            
             # Draw markers
             # 'x' marker, yellow color, with a slight glow effect (halo)
             # Halo
@@ -375,26 +579,56 @@ def overlay_heatmap_on_image(image_bytes: bytes, lamp_positions: list = None) ->
         print(f"[PHYSICS ENGINE]: Error in overlay - {e}")
         return ""
 
-def generate_optimization_report(room_area_sqm: float, target_lux: int, current_lumens: int) -> str:
+def generate_optimization_report(
+    room_area_sqm: float,
+    target_lux: int,
+    current_lumens: int,
+    measured_avg_lux: Optional[float] = None,
+    measured_min_lux: Optional[float] = None
+) -> str:
     """
     Analyzes the gap between current lighting and required standards.
     Returns a structured dictionary for the engineering report.
+
+    Args:
+        room_area_sqm: Floor area.
+        target_lux: Required average illuminance.
+        current_lumens: Total installed luminous flux.
+        measured_avg_lux: Optional point-by-point Eavg (e.g. from the room state).
+            When given, it replaces the lumens/area estimate and the lumen deficit
+            is scaled by how much of the installed flux actually reaches the floor.
+        measured_min_lux: Optional point-by-point Emin, reported with uniformity.
     """
     print(f"\n[PHYSICS ENGINE]: Generating Report for {room_area_sqm}m2, Target: {target_lux} lux...")
 
-    required_total_lumens = room_area_sqm * target_lux
-    deficiency = required_total_lumens - current_lumens
+    if measured_avg_lux is None:
+        current_lux_avg = current_lumens / room_area_sqm
+        deficiency = room_area_sqm * target_lux - current_lumens
+    else:
+        current_lux_avg = measured_avg_lux
+        # Share of the installed lumens landing on the floor (1.0 if unknown)
+        utilization = 1.0
+        if current_lumens > 0 and measured_avg_lux > 0:
+            utilization = (measured_avg_lux * room_area_sqm) / current_lumens
+        deficiency = (target_lux - measured_avg_lux) * room_area_sqm / utilization
     
     # How many more 800lm bulbs do we need?
     bulbs_needed = math.ceil(max(0, deficiency) / 800)
+
+    analysis = {
+        "current_lux_avg": round(current_lux_avg, 1),
+        "target_lux": target_lux,
+        "room_area": room_area_sqm,
+        "method": "lumen_average" if measured_avg_lux is None else "point_by_point"
+    }
+    if measured_min_lux is not None:
+        analysis["current_lux_min"] = round(measured_min_lux, 1)
+        if current_lux_avg > 0:
+            analysis["uniformity"] = round(measured_min_lux / current_lux_avg, 2)
     
     data = {
         "status": "Optimization Required" if deficiency > 0 else "Optimal",
-        "analysis": {
-             "current_lux_avg": round(current_lumens / room_area_sqm, 1),
-             "target_lux": target_lux,
-             "room_area": room_area_sqm
-        },
+        "analysis": analysis,
         "deficiency_lumens": round(max(0, deficiency), 1),
         "engineering_recommendation": f"CRITICAL DEFICIT. You need {bulbs_needed} more light sources (approx 800lm each) to reach safe working standards."
     }
@@ -407,8 +641,9 @@ def calculate_roi_and_savings(
     new_watts: float,
     new_bulb_price: float = 0.0,
     hours_per_day: float = 5.0,
-    kwh_cost_usd: float = 0.17,
-    count: int = 1
+    kwh_cost_usd: Optional[float] = None,
+    count: int = 1,
+    location: Optional[str] = None
 ) -> str:
     """
     Calculates energy savings and ROI for switching to efficient lighting for multiple bulbs.
@@ -419,13 +654,25 @@ def calculate_roi_and_savings(
         new_watts: Wattage of the replacement bulb (e.g., 9W LED).
         new_bulb_price: Price of ONE replacement bulb.
         hours_per_day: Average usage hours.
-        kwh_cost_usd: Cost of electricity per kWh (default $0.17).
+        kwh_cost_usd: Cost of electricity per kWh. If omitted, looked up for `location`
+            in the local tariff table (default $0.17).
         count: Number of bulbs to replace.
+        location: City / state / country of the site (e.g., "Springfield, MA"), used when
+            kwh_cost_usd is not given.
         
     Returns:
         JSON string with annual savings and ROI analysis.
     """
     print(f"\n[PHYSICS ENGINE]: Calculating ROI (Old: {old_watts}W vs New: {new_watts}W, Count: {count})...")
+
+    rate_source = "Given"
+    if kwh_cost_usd is None:
+        tariff = tariff_table.resolve(location) if location else None
+        if tariff is not None:
+            kwh_cost_usd = tariff["rate_usd_kwh"]
+            rate_source = f"{tariff['location']} ({tariff['source']}, {tariff['effective_date']})"
+        else:
+            kwh_cost_usd, rate_source = DEFAULT_KWH_COST_USD, "US average default"
     
     # Calculate the difference in consumption (kW) for ONE bulb
     watts_saved_per_bulb = old_watts - new_watts
@@ -451,6 +698,8 @@ def calculate_roi_and_savings(
         "co2_reduction_kg": round(co2_saved_kg_total, 1),
         "lamp_count": count,
         "total_investment": round(total_investment, 2),
+        "kwh_cost_usd": kwh_cost_usd,
+        "rate_source": rate_source,
         "message": f"Replacing {count} bulbs saves ${round(money_saved_annual_total, 2)} per year and reduces CO2 by {round(co2_saved_kg_total, 1)}kg."
     }
     
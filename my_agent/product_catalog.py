@@ -0,0 +1,425 @@
+# my_agent/product_catalog.py
+import os
+import re
+import time
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from .fixture_schedule import iter_records
+    from .market_cache import STOPWORDS, SYNONYMS
+    from .metrics import LatencyWindow
+except ImportError:
+    from fixture_schedule import iter_records
+    from market_cache import STOPWORDS, SYNONYMS
+    from metrics import LatencyWindow
+
+# Configuration (environment overridable)
+PRODUCT_CATALOG_PATH = os.getenv(
+    "PRODUCT_CATALOG_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "product_catalog.csv")
+)
+# "1500 lm" / "9W" in a query match products within +-15% of the value
+CATALOG_SPEC_TOLERANCE = float(os.getenv("CATALOG_SPEC_TOLERANCE", "0.15"))
+CATALOG_LOAD_BATCH_SIZE = 5000
+CATALOG_SOURCE = "Local product catalog"
+
+# Columns with a sorted index (range filters); NaN = unknown, never matches a range
+RANGE_COLUMNS = ("lumens", "watts", "price_usd")
+
+# Feed column aliases (lowercased header -> catalog field)
+FIELD_ALIASES = {
+    "sku": "sku", "id": "sku", "product_id": "sku",
+    "name": "name", "title": "name", "product": "name",
+    "brand": "brand", "manufacturer": "brand",
+    "price_usd": "price_usd", "price": "price_usd", "usd": "price_usd",
+    "lumens": "lumens", "lm": "lumens", "lumen": "lumens",
+    "watts": "watts", "w": "watts", "wattage": "watts",
+    "is_dimmable": "is_dimmable", "dimmable": "is_dimmable",
+    "protocol": "protocol", "connectivity": "protocol",
+    "link": "link", "url": "link",
+}
+PROTOCOLS = {
+    "zigbee": "Zigbee", "wifi": "WiFi", "wi-fi": "WiFi", "bluetooth": "Bluetooth", "ble": "Bluetooth",
+    "matter": "Matter", "thread": "Thread", "zwave": "Z-Wave", "z-wave": "Z-Wave", "none": "None", "": "None",
+}
+BOOLEANS = {"true": True, "yes": True, "y": True, "1": True, "false": False, "no": False, "n": False, "0": False, "": False}
+# Incandescent equivalents on packaging ("60W equivalent" = 800 lm)
+WATT_EQUIVALENT_LUMENS = {25: 250, 40: 450, 60: 800, 75: 1100, 100: 1600, 150: 2600}
+# Query words that add nothing once the specs are parsed
+GENERIC_WORDS = {
+    "bulb", "led", "light", "lights", "lighting", "smart", "product", "products", "cheap", "cheapest",
+    "best", "buy", "good", "need", "want", "i", "which", "one", "recommend", "equivalent", "replacement",
+    "w", "lm", "usd", "dollars", "bucks", "from", "by", "or", "that", "than", "cost", "between", "around", "about",
+}
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_CMP = r"(?:(?P<cmp>under|below|less than|at most|max|up to|over|above|more than|at least|min)\s+)?"
+_MAX_WORDS = {"under", "below", "less than", "at most", "max", "up to"}
+_PRICE_RANGE_RE = re.compile(r"\$\s*(\d+(?:\.\d+)?)\s*(?:-|to)\s*\$?\s*(\d+(?:\.\d+)?)")
+_PRICE_RE = re.compile(_CMP + r"(?:\$\s*(?P<a>\d+(?:\.\d+)?)|(?P<b>\d+(?:\.\d+)?)\s*(?:dollars|usd|bucks)\b)")
+_EQUIVALENT_RE = re.compile(r"(\d+)\s*w(?:atts?)?\s+(?:equivalent|equiv|replacement)\b")
+_SPEC_RE = re.compile(_CMP + r"(?P<n>\d+(?:\.\d+)?)(?P<plus>\+)?\s*(?P<unit>lm|lumens?|w|watts?)\b")
+_DIMMABLE_RE = re.compile(r"\b(?P<neg>non-?\s*|not\s+)?dimm?able\b")
+
+class ProductFeedError(ValueError):
+    """A product feed row is malformed (missing name/price/watts or bad values)."""
+
+def _protocol(value) -> str:
+    text = str(value or "").strip()
+    return PROTOCOLS.get(text.lower().replace(" ", ""), text)
+
+def normalize_product(raw: Dict, line: int = 0) -> Dict:
+    """
+    Maps one feed row onto catalog fields. `name`, `price_usd` and `watts` are
+    required (as in the market product schema); unknown lumens stay NaN and
+    missing dimmability counts as non-dimmable.
+    """
+    row = {}
+    for key, value in raw.items():
+        field = FIELD_ALIASES.get(str(key).strip().lower())
+        if field is None or value is None:
+            continue
+        if field in RANGE_COLUMNS:
+            if value == "":
+                continue
+            try:
+                value = float(str(value).strip().lstrip("$").replace(",", ""))
+            except ValueError:
+                raise ProductFeedError(f"Row {line}: '{key}' is not a number ({value!r}).")
+        elif field == "is_dimmable":
+            if not isinstance(value, bool):
+                if str(value).strip().lower() not in BOOLEANS:
+                    raise ProductFeedError(f"Row {line}: '{key}' is not a boolean ({value!r}).")
+                value = BOOLEANS[str(value).strip().lower()]
+        elif field == "protocol":
+            value = _protocol(value)
+        else:
+            value = str(value).strip()
+        row[field] = value
+
+    if not row.get("name") or "price_usd" not in row or "watts" not in row:
+        raise ProductFeedError(f"Row {line}: 'name', 'price_usd' and 'watts' are required.")
+    row.setdefault("lumens", np.nan)
+    row.setdefault("is_dimmable", False)
+    row.setdefault("protocol", "None")
+    for field in ("sku", "brand", "link"):
+        row.setdefault(field, "")
+    return row
+
+def iter_product_rows(source, fmt: Optional[str] = None) -> Iterable[Dict]:
+    """Streams normalized product rows from a CSV or JSON (array / JSON Lines) feed."""
+    return iter_records(source, normalize_product, fmt, error=ProductFeedError)
+
+def _band(value: float, tolerance: float) -> Tuple[float, float]:
+    return value * (1 - tolerance), value * (1 + tolerance)
+
+def parse_product_query(query: str, tolerance: float = CATALOG_SPEC_TOLERANCE) -> Dict:
+    """
+    Turns a product question into catalog filters:
+    "dimmable 1500 lm Zigbee bulb under $10" ->
+    {"lumens": (1275, 1725), "near_lumens": 1500, "price_usd": (None, 10), "is_dimmable": True,
+     "protocol": "Zigbee", "terms": []}.
+    "terms" are the leftover words (brands, model names) for the catalog to resolve.
+    """
+    text = query.lower().replace("wi-fi", "wifi").replace("z-wave", "zwave")
+    filters: Dict = {}
+
+    def price(match):
+        value = float(match.group("a") or match.group("b"))
+        cmp = match.group("cmp")
+        if cmp and cmp not in _MAX_WORDS:
+            filters["price_usd"] = (value, None)
+        else:
+            filters["price_usd"] = (None, value)  # a bare "$10" is a budget
+        return " "
+
+    def price_range(match):
+        filters["price_usd"] = (float(match.group(1)), float(match.group(2)))
+        return " "
+
+    def equivalent(match):
+        lumens = WATT_EQUIVALENT_LUMENS.get(int(match.group(1)))
+        if lumens is not None:
+            filters["lumens"] = _band(lumens, tolerance)
+            filters["near_lumens"] = float(lumens)
+        return " "
+
+    def spec(match):
+        column = "lumens" if match.group("unit").startswith("l") else "watts"
+        value = float(match.group("n"))
+        cmp = match.group("cmp")
+        if match.group("plus"):
+            filters[column] = (value, None)
+        elif cmp is None:
+            filters[column] = _band(value, tolerance)
+            if column == "lumens":
+                filters["near_lumens"] = value
+        elif cmp in _MAX_WORDS:
+            filters[column] = (None, value)
+        else:
+            filters[column] = (value, None)
+        return " "
+
+    def dimmable(match):
+        filters["is_dimmable"] = match.group("neg") is None
+        return " "
+
+    text = _PRICE_RANGE_RE.sub(price_range, text)
+    text = _PRICE_RE.sub(price, text)
+    text = _EQUIVALENT_RE.sub(equivalent, text)
+    text = _SPEC_RE.sub(spec, text)
+    text = _DIMMABLE_RE.sub(dimmable, text)
+
+    terms = []
+    for word in _WORD_RE.findall(text):
+        word = SYNONYMS.get(word, word)
+        if word in PROTOCOLS and word != "none":
+            filters["protocol"] = PROTOCOLS[word]
+        elif word not in STOPWORDS and word not in GENERIC_WORDS:
+            terms.append(word)
+    filters["terms"] = terms
+    return filters
+
+def _top(rows: np.ndarray, primary: np.ndarray, secondary: np.ndarray, limit: int) -> np.ndarray:
+    """First `limit` rows by (primary, secondary): partition out the leaders, then sort only those."""
+    if len(rows) > limit:
+        leaders = primary <= np.partition(primary, limit - 1)[limit - 1]
+        rows, primary, secondary = rows[leaders], primary[leaders], secondary[leaders]
+    return rows[np.lexsort((secondary, primary))][:limit]
+
+class ProductCatalog:
+    """
+    Offline, indexed lamp catalog for structured product questions.
+
+    - Columnar storage: numpy arrays for lumens/watts/price_usd, a bool column
+      for dimmability, protocol codes, and plain lists for the text fields.
+    - Indexes (rebuilt lazily after loads): a sorted index per range column
+      (binary search -> contiguous row range), bitmaps for dimmable and each
+      protocol, and an inverted index of brand/name words.
+    - find() starts from the smallest candidate set (narrowest range or
+      keyword posting list) and filters it with vectorized predicates, so a
+      lookup over 100k SKUs stays well under a millisecond.
+    - lookup() answers a free-text question, or returns None when the question
+      does not reduce to filters the catalog can answer (the caller goes remote).
+    """
+
+    def __init__(self, feed: Optional[str] = None):
+        self.feed = feed  # loaded on first use
+        self._feed_loaded = feed is None
+        self._count = 0
+        self._text: Dict[str, List[str]] = {"sku": [], "name": [], "brand": [], "link": []}
+        self._chunks: Dict[str, List[np.ndarray]] = {c: [] for c in RANGE_COLUMNS + ("is_dimmable", "protocol")}
+        self._protocols: List[str] = []  # protocol code -> label
+        self._protocol_codes: Dict[str, int] = {}
+        self._columns: Dict[str, np.ndarray] = {}
+        self._sorted: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}  # column -> (row order, sorted values)
+        self._bitmaps: Dict[str, np.ndarray] = {}
+        self._postings: Dict[str, np.ndarray] = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._latency = LatencyWindow()
+        self._stats = {"lookups": 0, "hits": 0, "no_match": 0, "unanswerable": 0}
+
+    def __len__(self) -> int:
+        self._ensure_ready()
+        return self._count
+
+    def warm_up(self) -> int:
+        """Process-start hook: loads the feed and builds the indexes. Returns the product count."""
+        return len(self)
+
+    # --- Loading ---
+
+    def add_products(self, rows: Iterable[Dict]) -> int:
+        """Bulk append of normalized rows (see normalize_product). Returns the number added."""
+        rows = list(rows)
+        if not rows:
+            return 0
+        with self._lock:
+            for field, values in self._text.items():
+                values.extend(r.get(field, "") for r in rows)
+            for c in RANGE_COLUMNS:
+                self._chunks[c].append(np.array([r.get(c, np.nan) for r in rows], dtype=np.float64))
+            self._chunks["is_dimmable"].append(np.array([bool(r.get("is_dimmable")) for r in rows], dtype=bool))
+            codes = []
+            for r in rows:
+                label = _protocol(r.get("protocol"))
+                code = self._protocol_codes.get(label)
+                if code is None:
+                    code = self._protocol_codes[label] = len(self._protocols)
+                    self._protocols.append(label)
+                codes.append(code)
+            self._chunks["protocol"].append(np.array(codes, dtype=np.int16))
+            self._count += len(rows)
+            self._dirty = True
+        return len(rows)
+
+    def load(self, source, fmt: Optional[str] = None, batch_size: int = CATALOG_LOAD_BATCH_SIZE) -> int:
+        """Streams a CSV/JSON product feed into the catalog in batches. Returns the number loaded."""
+        batch, loaded = [], 0
+        for row in iter_product_rows(source, fmt):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                loaded += self.add_products(batch)
+                batch = []
+        loaded += self.add_products(batch)
+        print(f"[PRODUCT CATALOG]: Loaded {loaded} products.")
+        return loaded
+
+    def _ensure_ready(self):
+        """Loads the configured feed once and rebuilds the indexes after any load."""
+        if not self._feed_loaded:
+            with self._load_lock:
+                if not self._feed_loaded:
+                    if os.path.exists(self.feed):
+                        self.load(self.feed)
+                    else:
+                        print(f"[PRODUCT CATALOG]: Feed '{self.feed}' not found; product queries go to the market search.")
+                    self._feed_loaded = True
+        if self._dirty:
+            with self._lock:
+                if self._dirty:
+                    self._build_indexes()
+                    self._dirty = False
+
+    def _build_indexes(self):
+        for c, chunks in self._chunks.items():
+            if len(chunks) > 1:
+                chunks[:] = [np.concatenate(chunks)]
+            self._columns[c] = chunks[0]
+
+        for c in RANGE_COLUMNS:
+            order = np.argsort(self._columns[c], kind="stable")  # NaN sorts last
+            self._sorted[c] = (order, self._columns[c][order])
+
+        dimmable = self._columns["is_dimmable"]
+        self._bitmaps = {"dimmable": dimmable, "non_dimmable": ~dimmable}
+        for label, code in self._protocol_codes.items():
+            self._bitmaps[f"protocol:{label}"] = self._columns["protocol"] == code
+
+        postings: Dict[str, List[int]] = {}
+        for row, (brand, name) in enumerate(zip(self._text["brand"], self._text["name"])):
+            for word in set(_WORD_RE.findall(f"{brand} {name}".lower())):
+                postings.setdefault(word, []).append(row)
+        self._postings = {w: np.array(rows, dtype=np.int64) for w, rows in postings.items()}
+
+    # --- Queries ---
+
+    def _range_rows(self, column: str, bounds: Tuple[Optional[float], Optional[float]]) -> np.ndarray:
+        """Row ids with lo <= value <= hi, in ascending order of the column (binary search)."""
+        order, values = self._sorted[column]
+        lo, hi = bounds
+        start = 0 if lo is None else np.searchsorted(values, lo, side="left")
+        end = np.searchsorted(values, np.inf if hi is None else hi, side="right")
+        return order[start:end]
+
+    def find(self, lumens: Optional[Tuple] = None, watts: Optional[Tuple] = None, price_usd: Optional[Tuple] = None,
+             is_dimmable: Optional[bool] = None, protocol: Optional[str] = None, keywords: Iterable[str] = (),
+             near_lumens: Optional[float] = None, limit: int = 5) -> List[Dict]:
+        """
+        Products matching every filter, cheapest first (closest to `near_lumens` first when given).
+
+        Args:
+            lumens, watts, price_usd: (min, max) bounds, inclusive; None on either side = open.
+            is_dimmable: True/False to require (non-)dimmable products.
+            protocol: Zigbee, WiFi, Bluetooth, Matter, Thread, Z-Wave or None.
+            keywords: Words that must appear in the brand or name.
+        """
+        self._ensure_ready()
+        if self._count == 0:
+            return []
+        ranges = {c: b for c, b in (("lumens", lumens), ("watts", watts), ("price_usd", price_usd)) if b is not None}
+
+        # Start from the smallest candidate set
+        sources = [(c, self._range_rows(c, b)) for c, b in ranges.items()]
+        for word in keywords:
+            sources.append((None, self._postings.get(word.lower(), np.empty(0, dtype=np.int64))))
+        if sources:
+            start_column, rows = min(sources, key=lambda s: len(s[1]))
+        else:
+            start_column, rows = "price_usd", self._sorted["price_usd"][0]
+
+        keep = np.ones(len(rows), dtype=bool)
+        for c, (lo, hi) in ranges.items():
+            if c == start_column:
+                continue
+            values = self._columns[c][rows]
+            if lo is not None:
+                keep &= values >= lo
+            if hi is not None:
+                keep &= values <= hi
+        if is_dimmable is not None:
+            keep &= self._bitmaps["dimmable" if is_dimmable else "non_dimmable"][rows]
+        if protocol is not None:
+            bitmap = self._bitmaps.get(f"protocol:{_protocol(protocol)}")
+            if bitmap is None:
+                return []
+            keep &= bitmap[rows]
+        for word in keywords:
+            posting = self._postings.get(word.lower())
+            if posting is None:
+                return []
+            member = np.zeros(self._count, dtype=bool)
+            member[posting] = True
+            keep &= member[rows]
+        rows = rows[keep]
+
+        prices = self._columns["price_usd"][rows]
+        if near_lumens is not None:
+            rows = _top(rows, np.abs(self._columns["lumens"][rows] - near_lumens), prices, limit)
+        elif start_column != "price_usd":
+            rows = _top(rows, prices, rows, limit)
+        return [self._record(int(i)) for i in rows[:limit]]
+
+    def _record(self, i: int) -> Dict:
+        """One product in the market agent's product schema."""
+        record = {
+            "type": "product",
+            "name": self._text["name"][i],
+            "price_usd": float(self._columns["price_usd"][i]),
+            "watts": float(self._columns["watts"][i]),
+            "is_dimmable": bool(self._columns["is_dimmable"][i]),
+            "protocol": self._protocols[self._columns["protocol"][i]],
+            "link": self._text["link"][i],
+            "sku": self._text["sku"][i],
+            "brand": self._text["brand"][i],
+            "source": CATALOG_SOURCE
+        }
+        lumens = self._columns["lumens"][i]
+        if not np.isnan(lumens):
+            record["lumens"] = int(lumens)
+        return record
+
+    def lookup(self, query: str) -> Optional[Dict]:
+        """
+        Best local answer to a product question, or None if the catalog cannot
+        answer it: no usable filter, a word the catalog has never seen (a model
+        or attribute it does not index), or no product matches.
+        """
+        start = time.perf_counter()
+        self._ensure_ready()
+        self._stats["lookups"] += 1
+        try:
+            filters = parse_product_query(query)
+            terms = filters.pop("terms")
+            if any(t not in self._postings for t in terms) or not (filters or terms):
+                self._stats["unanswerable"] += 1
+                return None
+            results = self.find(keywords=terms, limit=1, **filters)
+            if not results:
+                self._stats["no_match"] += 1
+                return None
+            self._stats["hits"] += 1
+            return results[0]
+        finally:
+            self._latency.record(time.perf_counter() - start)
+
+    def stats(self) -> dict:
+        return dict(self._stats, products=self._count, latency=self._latency.summary())
+
+# Shared by the market tool
+product_catalog = ProductCatalog(feed=PRODUCT_CATALOG_PATH)
@@ -0,0 +1,262 @@
+# my_agent/runner_registry.py
+import os
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncGenerator, Dict, Iterator, List, Optional
+
+from google.adk.agents import LlmAgent, RunConfig
+from google.adk.runners import Runner
+from google.adk.sessions import BaseSessionService, InMemorySessionService
+from google.adk.sessions.sqlite_session_service import SqliteSessionService
+from google.adk.sessions.base_session_service import GetSessionConfig
+from google.genai import types
+
+# Configuration (environment overridable)
+RUNNER_POOL_SIZE = int(os.getenv("RUNNER_POOL_SIZE", "4"))
+RUNNER_POOL_MAX_USERS = int(os.getenv("RUNNER_POOL_MAX_USERS", "10000"))  # current sessions remembered, LRU
+# Conversations survive restarts (resumed on request); set to "" for in-memory sessions
+AGENT_SESSION_DB = os.getenv(
+    "AGENT_SESSION_DB",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "agent_sessions.sqlite3")
+)
+WARMUP_USER_ID = "__warmup__"
+
+def make_session_service(db_path: Optional[str] = AGENT_SESSION_DB) -> BaseSessionService:
+    """SQLite-backed sessions at db_path, or in-memory ones when db_path is empty."""
+    if not db_path:
+        return InMemorySessionService()
+    return SqliteSessionService(db_path)
+
+def _pin_models(agent):
+    """
+    Resolves string model names to one shared BaseLlm per agent.
+
+    LlmAgent.canonical_model builds a fresh model object (and, for Gemini, a fresh
+    genai Client and HTTP connection pool) on every LLM call when `model` is a
+    string. Pinning the instance lets every turn reuse the client.
+    """
+    if isinstance(agent, LlmAgent) and isinstance(agent.model, str) and agent.model:
+        agent.model = agent.canonical_model
+    for sub_agent in agent.sub_agents:
+        _pin_models(sub_agent)
+
+class RunnerPool:
+    """
+    Long-lived runners for one ADK app, sharing one session service.
+
+    - Runners are built once and handed out least-busy first, instead of a fresh
+      session service + session + Runner per request.
+    - Each user gets a real session id (UUID from the session service) that is
+      reused across calls, so conversation state carries over. A user without
+      a current session in this process gets a new one, unless the caller
+      asks to resume their most recently updated stored session.
+    - warm_up() pins the agent's model client and exercises the session path
+      before the first request.
+    - The user -> session map and the set of sessions known to exist are LRU
+      bounded by `max_users`; a forgotten entry only costs a session-service
+      lookup. Concurrent calls for the same user are serialized, so two first
+      requests share one new session.
+
+    Runners and sessions are meant to live on one event loop (the serving loop).
+    """
+
+    def __init__(self, agent, app_name: str, session_service: Optional[BaseSessionService] = None,
+                 size: int = RUNNER_POOL_SIZE, max_users: int = RUNNER_POOL_MAX_USERS):
+        self.agent = agent
+        self.app_name = app_name
+        self.session_service = session_service or InMemorySessionService()
+        self.size = max(1, size)
+        self.max_users = max(1, max_users)
+
+        self._runners: List[Runner] = []
+        self._in_flight: List[int] = []
+        self._user_sessions: "OrderedDict[str, str]" = OrderedDict()  # user_id -> current session id, LRU
+        self._known_sessions: "OrderedDict[tuple, None]" = OrderedDict()  # (user_id, session_id) confirmed to exist
+        self._user_locks: Dict[str, list] = {}  # user_id -> [asyncio.Lock, callers], while any caller holds or waits
+        self._lock = threading.Lock()
+        self._stats = {"runs": 0, "sessions_created": 0, "sessions_reused": 0, "sessions_resumed": 0, "warmups": 0}
+
+    def _ensure_runners(self):
+        with self._lock:
+            while len(self._runners) < self.size:
+                self._runners.append(Runner(agent=self.agent, app_name=self.app_name,
+                                            session_service=self.session_service))
+                self._in_flight.append(0)
+
+    @contextmanager
+    def runner(self) -> Iterator[Runner]:
+        """Checks out the least busy runner (runners are safe to share; this spreads load)."""
+        self._ensure_runners()
+        with self._lock:
+            index = min(range(len(self._runners)), key=self._in_flight.__getitem__)
+            self._in_flight[index] += 1
+        try:
+            yield self._runners[index]
+        finally:
+            with self._lock:
+                self._in_flight[index] -= 1
+
+    @asynccontextmanager
+    async def _user_lock(self, user_id: str):
+        """Serializes session lookup/creation per user; the lock is dropped once nobody holds or waits for it."""
+        entry = self._user_locks.setdefault(user_id, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._user_locks[user_id]
+
+    def _remember(self, user_id: str, session_id: str):
+        """Makes session_id the user's current, known session; forgets the least recently used beyond max_users."""
+        self._user_sessions[user_id] = session_id
+        self._user_sessions.move_to_end(user_id)
+        self._known_sessions[(user_id, session_id)] = None
+        self._known_sessions.move_to_end((user_id, session_id))
+        while len(self._user_sessions) > self.max_users:
+            self._user_sessions.popitem(last=False)
+        while len(self._known_sessions) > self.max_users:
+            self._known_sessions.popitem(last=False)
+
+    def _forget(self, user_id: str):
+        """Drops the user's current session from both maps."""
+        session_id = self._user_sessions.pop(user_id, None)
+        self._known_sessions.pop((user_id, session_id), None)
+
+    async def session_id_for(self, user_id: str, session_id: Optional[str] = None, resume: bool = False) -> str:
+        """
+        Returns a live session id for the user: the given one (created if unknown),
+        else the user's current session, else (with resume=True) their latest
+        stored session, else a new one with a generated id.
+        """
+        async with self._user_lock(user_id):
+            session_id = session_id or self._user_sessions.get(user_id)
+            if session_id is None and resume:
+                session_id = await self._latest_session(user_id)
+            if session_id is not None:
+                if (user_id, session_id) in self._known_sessions:
+                    self._stats["sessions_reused"] += 1
+                    self._remember(user_id, session_id)
+                    return session_id
+                existing = await self.session_service.get_session(
+                    app_name=self.app_name, user_id=user_id, session_id=session_id,
+                    config=GetSessionConfig(num_recent_events=1)
+                )
+                if existing is not None:
+                    self._stats["sessions_reused"] += 1
+                    self._remember(user_id, session_id)
+                    return session_id
+
+            return await self._create_session(user_id, session_id)
+
+    async def _create_session(self, user_id: str, session_id: Optional[str] = None) -> str:
+        session = await self.session_service.create_session(
+            app_name=self.app_name, user_id=user_id, session_id=session_id
+        )
+        self._stats["sessions_created"] += 1
+        self._remember(user_id, session.id)
+        return session.id
+
+    async def _latest_session(self, user_id: str) -> Optional[str]:
+        """The user's most recently updated stored session (from an earlier process), if any."""
+        response = await self.session_service.list_sessions(app_name=self.app_name, user_id=user_id)
+        if not response.sessions:
+            return None
+        latest = max(response.sessions, key=lambda s: s.last_update_time)
+        self._stats["sessions_resumed"] += 1
+        return latest.id
+
+    async def new_session(self, user_id: str) -> str:
+        """Starts a fresh conversation for the user and makes it their current session."""
+        async with self._user_lock(user_id):
+            self._forget(user_id)
+            return await self._create_session(user_id)
+
+    @asynccontextmanager
+    async def ephemeral_session(self, user_id: str):
+        """A throwaway session (fresh context per request), deleted afterwards. Yields its id."""
+        session = await self.session_service.create_session(app_name=self.app_name, user_id=user_id)
+        try:
+            yield session.id
+        finally:
+            await self.session_service.delete_session(app_name=self.app_name, user_id=user_id,
+                                                      session_id=session.id)
+
+    async def run_async(self, user_id: str, session_id: str, new_message: types.Content,
+                        run_config: Optional[RunConfig] = None) -> AsyncGenerator:
+        """Runner.run_async on a pooled runner."""
+        self._stats["runs"] += 1
+        with self.runner() as runner:
+            async for event in runner.run_async(user_id=user_id, session_id=session_id, new_message=new_message,
+                                                run_config=run_config):
+                yield event
+
+    async def warm_up(self):
+        """
+        Builds the runners, pins the model client and round-trips a throwaway
+        session, so the first real request pays none of it.
+        """
+        start = time.perf_counter()
+        self._ensure_runners()
+        _pin_models(self.agent)
+        client = getattr(self.agent, "model", None)
+        try:
+            getattr(client, "api_client", None)  # cached_property on Gemini: builds the genai Client
+        except Exception as e:
+            print(f"[RUNNER REGISTRY]: Model client warm-up skipped for '{self.app_name}' ({e}).")
+
+        session = await self.session_service.create_session(app_name=self.app_name, user_id=WARMUP_USER_ID)
+        await self.session_service.delete_session(app_name=self.app_name, user_id=WARMUP_USER_ID,
+                                                  session_id=session.id)
+        self._stats["warmups"] += 1
+        print(f"[RUNNER REGISTRY]: '{self.app_name}' warm ({self.size} runners, "
+              f"{(time.perf_counter() - start) * 1000:.1f} ms).")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats, runners=len(self._runners), in_flight=sum(self._in_flight),
+                        users=len(self._user_sessions))
+
+class RunnerRegistry:
+    """Process-wide registry of RunnerPools, one per ADK app name."""
+
+    def __init__(self):
+        self._pools: Dict[str, RunnerPool] = {}
+        self._lock = threading.Lock()
+
+    def register(self, app_name: str, agent, session_service: Optional[BaseSessionService] = None,
+                 size: int = RUNNER_POOL_SIZE) -> RunnerPool:
+        """Registers (or returns the already registered) pool for app_name."""
+        with self._lock:
+            pool = self._pools.get(app_name)
+            if pool is None:
+                pool = RunnerPool(agent, app_name, session_service=session_service, size=size)
+                self._pools[app_name] = pool
+            return pool
+
+    def get(self, app_name: str) -> RunnerPool:
+        with self._lock:
+            pool = self._pools.get(app_name)
+        if pool is None:
+            raise KeyError(f"No runner pool registered for app '{app_name}'.")
+        return pool
+
+    async def warm_up(self):
+        """Process-start hook: warms every registered pool."""
+        with self._lock:
+            pools = list(self._pools.values())
+        for pool in pools:
+            await pool.warm_up()
+
+    def stats(self) -> dict:
+        with self._lock:
+            pools = dict(self._pools)
+        return {name: pool.stats() for name, pool in pools.items()}
+
+# Shared by the agent entry points
+runner_registry = RunnerRegistry()
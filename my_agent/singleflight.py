@@ -0,0 +1,65 @@
+# my_agent/singleflight.py
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls: per key, only the first caller (the
+    leader) starts the work; everyone who arrives while it is in flight awaits
+    the same outcome, result or exception.
+
+    - The work runs as its own task, so a cancelled caller never cancels it for
+      the others (and it can finish after the caller has stopped waiting).
+    - Outcomes live in a concurrent.futures.Future, so callers on other event
+      loops/threads (e.g. the sync wrapper's background loop) join the same flight.
+    """
+
+    def __init__(self):
+        self._flights: Dict[str, Future] = {}
+        self._tasks = set()  # strong refs to running work
+        self._lock = threading.Lock()
+        self._stats = {"flights": 0, "coalesced": 0}
+
+    def in_flight(self, key: str) -> bool:
+        with self._lock:
+            return key in self._flights
+
+    def flight(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Future:
+        """Joins or starts the flight for key. Must be called on a running event loop."""
+        with self._lock:
+            future = self._flights.get(key)
+            if future is not None:
+                self._stats["coalesced"] += 1
+                return future
+            future = Future()
+            self._flights[key] = future
+            self._stats["flights"] += 1
+
+        task = asyncio.get_running_loop().create_task(self._run(key, future, fn))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return future
+
+    async def _run(self, key: str, future: Future, fn: Callable[[], Awaitable[Any]]):
+        try:
+            result = await fn()
+        except BaseException as e:
+            with self._lock:
+                self._flights.pop(key, None)
+            future.set_exception(e)
+            if not isinstance(e, Exception):
+                raise
+        else:
+            with self._lock:
+                self._flights.pop(key, None)
+            future.set_result(result)
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]):
+        """Awaits the (possibly shared) outcome of fn() for key."""
+        return await asyncio.shield(asyncio.wrap_future(self.flight(key, fn)))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats, in_flight=len(self._flights))
@@ -1,6 +1,37 @@
 # spatial_state.py
-from typing import List, Dict
+from typing import Dict, Iterable, List, Optional
 import json
+import math
+import zlib
+import struct
+import numpy as np
+
+try:
+    from .lux_field import compute_illuminance_field, DEFAULT_MOUNTING_HEIGHT, DEFAULT_BEAM_ANGLE
+    from .fixture_schedule import iter_fixture_rows
+except ImportError:
+    from lux_field import compute_illuminance_field, DEFAULT_MOUNTING_HEIGHT, DEFAULT_BEAM_ANGLE
+    from fixture_schedule import iter_fixture_rows
+
+# Per-source numeric columns; x/y are NaN for unpositioned sources (e.g. windows)
+SOURCE_COLUMNS = ("lumens", "x", "y", "height", "beam_angle")
+SUMMARY_MAX_SOURCES = 10  # sources listed by name in get_summary before truncating
+# get_summary computes the point-by-point field only up to this many lamp x grid-point
+# evaluations (~30 ms), coarsening the grid down to SUMMARY_FIELD_MAX_RESOLUTION first
+SUMMARY_FIELD_MAX_WORK = 2_000_000
+SUMMARY_FIELD_MAX_RESOLUTION = 1.0  # meters
+IMPORT_BATCH_SIZE = 5000
+
+# Binary snapshot: magic, version, then a zlib-compressed body of
+# header (area, reflection, width, depth as float64; count as uint32),
+# uint32 name lengths, UTF-8 names, and the float64 columns in SOURCE_COLUMNS order.
+SNAPSHOT_MAGIC = b"SPST"
+SNAPSHOT_VERSION = 1
+_SNAPSHOT_HEADER = struct.Struct("<ddddI")
+
+def _format_lumens(value: float) -> str:
+    value = round(float(value), 1)
+    return str(int(value)) if value.is_integer() else str(value)
 
 class SpatialState:
     def __init__(self, area_sqm: float = 0.0, wall_reflection: float = 0.5):
@@ -10,19 +41,300 @@ class SpatialState:
         """
         self.area_sqm = area_sqm
         self.wall_reflection = wall_reflection
-        # List of dictionaries: [{'name': 'Ceiling Lamp', 'lumens': 800}, ...]
-        self.light_sources: List[Dict] = [] 
+        # Optional floor plan (meters). Needed for point-by-point illuminance.
+        self.width_m: Optional[float] = None
+        self.depth_m: Optional[float] = None
+        # Columnar source store: names plus one float64 array per column,
+        # grown geometrically; only the first `_count` rows are live.
+        self._names: List[str] = []
+        self._columns: Dict[str, np.ndarray] = {c: np.empty(0) for c in SOURCE_COLUMNS}
+        self._count = 0
+        # Running aggregates, updated on add/remove/update
+        self._total_lumens = 0.0
+        self._positioned = 0
+        self._field_cache: Optional[Dict] = None
 
     def update_geometry(self, area: float):
-        """Update room area"""
+        """Update room area. A floor plan that no longer matches the area is cleared."""
         self.area_sqm = area
+        if self.width_m and self.depth_m and not math.isclose(area, self.width_m * self.depth_m, rel_tol=1e-6):
+            print(f"[State Update] Floor plan {self.width_m}x{self.depth_m} m cleared (area changed)")
+            self.width_m = self.depth_m = None
+        self._field_cache = None
         print(f"[State Update] Room area set to {self.area_sqm} sqm")
 
-    def add_light_source(self, name: str, lumens: float):
-        """Add a light source (lamp or window)"""
-        self.light_sources.append({"name": name, "lumens": lumens})
+    def set_dimensions(self, width_m: float, depth_m: float):
+        """Set the floor plan (meters). Also updates the area."""
+        self.width_m = width_m
+        self.depth_m = depth_m
+        self.update_geometry(width_m * depth_m)
+
+    # --- Source store ---
+
+    @property
+    def source_count(self) -> int:
+        return self._count
+
+    @property
+    def total_lumens(self) -> float:
+        return self._total_lumens
+
+    @property
+    def light_sources(self) -> List[Dict]:
+        """
+        Sources as a list of dicts (read-only snapshot, O(n)):
+        [{'name': 'Ceiling Lamp', 'lumens': 800}, ...]. Positioned sources also
+        carry 'x', 'y', 'height' and 'beam_angle'.
+        """
+        cols = {c: self._columns[c][:self._count].tolist() for c in SOURCE_COLUMNS}
+        sources = []
+        for i, name in enumerate(self._names):
+            source = {"name": name, "lumens": cols["lumens"][i]}
+            if not math.isnan(cols["x"][i]):
+                source.update({"x": cols["x"][i], "y": cols["y"][i],
+                               "height": cols["height"][i], "beam_angle": cols["beam_angle"][i]})
+            sources.append(source)
+        return sources
+
+    def source_names(self) -> List[str]:
+        return list(self._names)
+
+    def _reserve(self, extra: int):
+        """Grows the column arrays (amortized doubling) to fit `extra` more rows."""
+        needed = self._count + extra
+        capacity = len(self._columns["lumens"])
+        if needed <= capacity:
+            return
+        capacity = max(needed, 2 * capacity, 16)
+        for c in SOURCE_COLUMNS:
+            grown = np.empty(capacity)
+            grown[:self._count] = self._columns[c][:self._count]
+            self._columns[c] = grown
+
+    def _append(self, names: List[str], values: Dict[str, np.ndarray]):
+        n = len(names)
+        self._reserve(n)
+        lo, hi = self._count, self._count + n
+        for c in SOURCE_COLUMNS:
+            self._columns[c][lo:hi] = values[c]
+        self._names.extend(names)
+        self._count = hi
+        self._total_lumens += float(values["lumens"].sum())
+        self._positioned += int(np.count_nonzero(~np.isnan(values["x"])))
+        self._field_cache = None
+
+    def add_light_source(self, name: str, lumens: float, x: Optional[float] = None, y: Optional[float] = None,
+                         height: float = DEFAULT_MOUNTING_HEIGHT, beam_angle: float = DEFAULT_BEAM_ANGLE):
+        """Add a light source (lamp or window). Pass x/y (meters) to place it on the floor plan."""
+        positioned = x is not None and y is not None
+        self._append([name], {
+            "lumens": np.array([lumens], dtype=np.float64),
+            "x": np.array([x if positioned else np.nan]),
+            "y": np.array([y if positioned else np.nan]),
+            "height": np.array([height], dtype=np.float64),
+            "beam_angle": np.array([beam_angle], dtype=np.float64)
+        })
         print(f"[State Update] Added source: {name} ({lumens} lm)")
 
+    def add_light_sources(self, sources: Iterable[Dict]) -> int:
+        """
+        Bulk add. Each source: {"name", "lumens", "x" (opt), "y" (opt), "height" (opt), "beam_angle" (opt)}.
+        Returns the number of sources added.
+        """
+        sources = list(sources)
+        if not sources:
+            return 0
+        n = len(sources)
+        values = {c: np.empty(n) for c in SOURCE_COLUMNS}
+        names = []
+        for i, src in enumerate(sources):
+            names.append(src["name"])
+            values["lumens"][i] = src["lumens"]
+            positioned = src.get("x") is not None and src.get("y") is not None
+            values["x"][i] = src["x"] if positioned else np.nan
+            values["y"][i] = src["y"] if positioned else np.nan
+            values["height"][i] = src.get("height", DEFAULT_MOUNTING_HEIGHT)
+            values["beam_angle"][i] = src.get("beam_angle", DEFAULT_BEAM_ANGLE)
+        self._append(names, values)
+        print(f"[State Update] Added {n} sources ({float(values['lumens'].sum()):.0f} lm)")
+        return n
+
+    def remove_light_sources(self, names: Iterable[str]) -> int:
+        """Removes every source whose name is in `names`. Returns the number removed."""
+        targets = set(names)
+        keep = np.fromiter((name not in targets for name in self._names), dtype=bool, count=self._count)
+        removed = self._count - int(keep.sum())
+        if not removed:
+            return 0
+
+        gone = ~keep
+        self._total_lumens -= float(self._columns["lumens"][:self._count][gone].sum())
+        self._positioned -= int(np.count_nonzero(~np.isnan(self._columns["x"][:self._count][gone])))
+        for c in SOURCE_COLUMNS:
+            live = self._columns[c][:self._count][keep]
+            self._columns[c][:len(live)] = live
+        self._names = [name for name, k in zip(self._names, keep) if k]
+        self._count -= removed
+        if not self._count:
+            self._total_lumens = 0.0
+        self._field_cache = None
+        print(f"[State Update] Removed {removed} sources")
+        return removed
+
+    def remove_light_source(self, name: str) -> int:
+        """Removes all sources named `name`. Returns the number removed."""
+        return self.remove_light_sources([name])
+
+    def update_light_sources(self, updates: Dict[str, Dict]) -> int:
+        """
+        Bulk update: {name: {"lumens": ..., "x": ..., "y": ..., "height": ..., "beam_angle": ...}}.
+        Only the given fields change; every source with a matching name is updated.
+        Returns the number of sources updated. Every update is validated before
+        any is applied: on ValueError the room is unchanged.
+        """
+        unknown = {f for fields in updates.values() for f in fields} - set(SOURCE_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown source fields: {sorted(unknown)}")
+
+        cols = self._columns
+        pending = []
+        for i, name in enumerate(self._names):
+            fields = updates.get(name)
+            if not fields:
+                continue
+            new = {c: cols[c][i] for c in SOURCE_COLUMNS}
+            try:
+                new.update({c: np.nan if v is None else float(v) for c, v in fields.items()})
+            except (TypeError, ValueError):
+                raise ValueError(f"Source '{name}': field values must be numbers or None ({fields}).")
+            if math.isnan(new["x"]) != math.isnan(new["y"]):
+                raise ValueError(f"Source '{name}': set x and y together (or both to None).")
+            pending.append((i, new))
+
+        for i, new in pending:
+            self._total_lumens += new["lumens"] - cols["lumens"][i]
+            self._positioned += int(not math.isnan(new["x"])) - int(not math.isnan(cols["x"][i]))
+            for c, value in new.items():
+                cols[c][i] = value
+        if pending:
+            self._field_cache = None
+        return len(pending)
+
+    def import_fixture_schedule(self, source, fmt: Optional[str] = None,
+                                batch_size: int = IMPORT_BATCH_SIZE) -> int:
+        """
+        Streams a CSV/JSON fixture schedule (path or open file) into the room in
+        batches of `batch_size`, so large schedules never sit in memory as dicts.
+        Returns the number of sources imported.
+        """
+        total = 0
+        batch = []
+        for row in iter_fixture_rows(source, fmt):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                total += self.add_light_sources(batch)
+                batch = []
+        if batch:
+            total += self.add_light_sources(batch)
+        return total
+
+    def positioned_arrays(self) -> Optional[Dict[str, np.ndarray]]:
+        """Column arrays of the positioned sources (lux_field input), or None if there are none."""
+        if not self._positioned:
+            return None
+        mask = ~np.isnan(self._columns["x"][:self._count])
+        return {c: self._columns[c][:self._count][mask] for c in SOURCE_COLUMNS}
+
+    def calculate_illuminance_field(self, resolution: float = 0.1) -> Optional[Dict]:
+        """
+        Point-by-point illuminance over the real floor plan from all positioned sources.
+        Returns the lux_field result (field + Eavg/Emin/Emax/uniformity), or None when
+        the room has no dimensions or no positioned sources.
+        """
+        if not self.width_m or not self.depth_m:
+            return None
+        positioned = self.positioned_arrays()
+        if positioned is None:
+            return None
+
+        if self._field_cache is None or self._field_cache["resolution"] != resolution:
+            result = compute_illuminance_field(positioned, self.width_m, self.depth_m, resolution=resolution)
+            result["resolution"] = resolution
+            self._field_cache = result
+        return self._field_cache
+
+    def _summary_field(self):
+        """
+        (field, skipped) for get_summary with bounded cost: a cached field is reused as
+        is; otherwise the grid is coarsened until lamps x points fits SUMMARY_FIELD_MAX_WORK.
+        Rooms too large for that even at SUMMARY_FIELD_MAX_RESOLUTION are skipped.
+        """
+        if not self.width_m or not self.depth_m or not self._positioned:
+            return None, False
+        if self._field_cache is not None:
+            return self._field_cache, False
+        resolution = 0.1
+        points = math.ceil(self.width_m / resolution) * math.ceil(self.depth_m / resolution)
+        if self._positioned * points > SUMMARY_FIELD_MAX_WORK:
+            resolution = math.sqrt(self.width_m * self.depth_m * self._positioned / SUMMARY_FIELD_MAX_WORK)
+            resolution = math.ceil(resolution * 10) / 10  # round up to 0.1 m steps
+            if resolution > SUMMARY_FIELD_MAX_RESOLUTION:
+                return None, True
+        return self.calculate_illuminance_field(resolution), False
+
+    def memory_bytes(self) -> int:
+        """Approximate footprint: column arrays, names and the cached field."""
+        total = sum(col.nbytes for col in self._columns.values())
+        total += sum(len(name) + 50 for name in self._names)  # str object overhead
+        if self._field_cache is not None:
+            total += self._field_cache["field"].nbytes
+        return total
+
+    def to_bytes(self) -> bytes:
+        """Compact binary snapshot (see SNAPSHOT_MAGIC). The illuminance cache is not included."""
+        encoded = [name.encode("utf-8") for name in self._names]
+        body = b"".join([
+            _SNAPSHOT_HEADER.pack(
+                self.area_sqm, self.wall_reflection,
+                np.nan if self.width_m is None else self.width_m,
+                np.nan if self.depth_m is None else self.depth_m,
+                self._count
+            ),
+            np.fromiter(map(len, encoded), dtype="<u4", count=self._count).tobytes(),
+            b"".join(encoded),
+            *(self._columns[c][:self._count].astype("<f8").tobytes() for c in SOURCE_COLUMNS)
+        ])
+        return SNAPSHOT_MAGIC + bytes([SNAPSHOT_VERSION]) + zlib.compress(body, 1)
+
+    @classmethod
+    def from_bytes(cls, blob: bytes) -> "SpatialState":
+        """Restores a to_bytes() snapshot. Raises ValueError for foreign or corrupt data."""
+        if blob[:4] != SNAPSHOT_MAGIC or blob[4:5] != bytes([SNAPSHOT_VERSION]):
+            raise ValueError("Not a SpatialState snapshot (or unsupported version).")
+        try:
+            body = zlib.decompress(blob[5:])
+            area, reflection, width, depth, count = _SNAPSHOT_HEADER.unpack_from(body)
+            offset = _SNAPSHOT_HEADER.size
+            lengths = np.frombuffer(body, dtype="<u4", count=count, offset=offset)
+            offset += lengths.nbytes
+            names = []
+            for length in lengths.tolist():
+                names.append(body[offset:offset + length].decode("utf-8"))
+                offset += length
+            columns = {}
+            for c in SOURCE_COLUMNS:
+                columns[c] = np.frombuffer(body, dtype="<f8", count=count, offset=offset).astype(np.float64)
+                offset += 8 * count
+        except (zlib.error, struct.error, ValueError) as e:
+            raise ValueError(f"Corrupt SpatialState snapshot: {e}")
+
+        state = cls(area_sqm=area, wall_reflection=reflection)
+        state.width_m = None if math.isnan(width) else width
+        state.depth_m = None if math.isnan(depth) else depth
+        if count:
+            state._append(names, columns)
+        return state
+
     def calculate_current_lux(self) -> float:
         """
         Simple physics engine (simplified):
@@ -31,7 +343,7 @@ class SpatialState:
         if self.area_sqm <= 0:
             return 0.0
         
-        total_lumens = sum(src['lumens'] for src in self.light_sources)
+        total_lumens = self._total_lumens
         
         # Simple formula with reflection factor (Room Cavity Ratio simplified)
         # If walls are white, more light.
@@ -43,9 +355,27 @@ class SpatialState:
     def get_summary(self) -> str:
         """Generate text description for AI Agent"""
         lux = self.calculate_current_lux()
-        sources_desc = ", ".join([f"{s['name']} ({s['lumens']}lm)" for s in self.light_sources])
+        # Large inventories are truncated: the summary cost does not grow with the room
+        shown = min(self._count, SUMMARY_MAX_SOURCES)
+        lumens = self._columns["lumens"]
+        sources_desc = ", ".join(f"{self._names[i]} ({_format_lumens(lumens[i])}lm)" for i in range(shown))
+        if self._count > shown:
+            sources_desc += (f" ... and {self._count - shown} more "
+                             f"({self._count} sources, {_format_lumens(self._total_lumens)}lm total)")
         if not sources_desc:
             sources_desc = "None"
+
+        spatial_desc = ""
+        field, skipped = self._summary_field()
+        if field:
+            spatial_desc = (
+                f"Floor Illuminance (point-by-point, {field['resolution']:g} m grid): Eavg {field['e_avg']:.1f} / "
+                f"Emin {field['e_min']:.1f} / Emax {field['e_max']:.1f} LUX "
+                f"(Uniformity {field['uniformity']:.2f})\n"
+            )
+        elif skipped:
+            spatial_desc = (f"Floor Illuminance (point-by-point): not computed for {self._positioned} "
+                            f"positioned sources in the summary\n")
             
         return (
             f"--- ROOM STATE ---\n"
@@ -53,6 +383,7 @@ class SpatialState:
             f"Wall Reflection: {self.wall_reflection}\n"
             f"Active Sources: {sources_desc}\n"
             f"Current Light Level: {lux} LUX\n"
+            f"{spatial_desc}"
             f"------------------"
         )
 
@@ -0,0 +1,209 @@
+# my_agent/spec_extractor.py
+import os
+import re
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+try:
+    from .pdf_text import PdfTextExtractor, pdf_text_extractor
+except ImportError:
+    from pdf_text import PdfTextExtractor, pdf_text_extractor
+
+# Configuration (environment overridable)
+SPEC_MAX_PAGES = int(os.getenv("SPEC_MAX_PAGES", "10"))  # datasheets put the specs up front
+SPEC_BULK_WORKERS = int(os.getenv("SPEC_BULK_WORKERS", str(min(4, os.cpu_count() or 1))))
+SPEC_MIN_CONFIDENCE = 0.7  # below this, the agent should confirm against the page text
+
+FIELDS = ("lumens", "watts", "cct_kelvin", "cri", "beam_angle_deg")
+UNITS = {"lumens": "lm", "watts": "W", "cct_kelvin": "K", "cri": "Ra", "beam_angle_deg": "deg"}
+PLAUSIBLE = {"lumens": (10, 200_000), "watts": (0.1, 2_000), "cct_kelvin": (1_000, 10_000),
+             "cri": (20, 100), "beam_angle_deg": (1, 360)}
+EFFICACY_LM_PER_W = (5, 250)  # outside this, lumens or watts were misread
+
+_NUM = r"(?P<value>\d{1,3}(?:,\d{3})+|\d+(?:\.\d+)?)"
+_PAREN = r"(?:\s*\([^)\n]{0,20}\))?"  # "Color Rendering Index (CRI):"
+_SEP = r"\s*[:=]?\s*(?:approx\.?\s*|~\s*|up\s+to\s+)?"
+_LM = r"\s*(?:lm|lumens?)\b"
+_W = r"\s*(?:w|watts?)\b"
+_DEG = r"\s*(?:°|º|deg(?:rees?)?\b)"
+_KELVIN = (r"(?P<value>\d{4})\s*(?:k(?:elvin)?\b)?"
+           r"(?:\s*(?:-|–|to|~)\s*(?P<high>\d{4}))?\s*k(?:elvin)?\b")
+# A number that is something else: "220-240V", "50/60 Hz", "80%"
+_NOT_OTHER_UNIT = r"(?!\s*(?:v|hz|%|ma|a|k|mm|cm|m|h|hrs?|hours|years)\b)(?!\d|[,.]\d)"
+
+def _pattern(regex: str) -> "re.Pattern":
+    return re.compile(regex, re.IGNORECASE)
+
+# Per field, most specific first: (pattern, confidence). A labeled value with its unit is
+# near-certain; a bare "1500 lm" somewhere on the page could be another product's.
+PATTERNS: Dict[str, List[Tuple["re.Pattern", float]]] = {
+    "lumens": [
+        (_pattern(r"\b(?:luminous\s+flux|light\s+output|lumen\s+output|brightness|lumens?)" + _PAREN + _SEP + _NUM + _LM), 0.95),
+        (_pattern(r"\b(?:luminous\s+flux|lumen\s+output|lumens)" + _PAREN + _SEP + _NUM + _NOT_OTHER_UNIT), 0.85),
+        (_pattern(r"\b" + _NUM + _LM), 0.6),
+    ],
+    "watts": [
+        (_pattern(r"\b(?:power\s+consumption|rated\s+power|input\s+power|power\s+draw|wattage|power)" + _PAREN + _SEP + _NUM + _W), 0.95),
+        (_pattern(r"\b(?:power\s+consumption|rated\s+power|wattage)" + _PAREN + _SEP + _NUM + _NOT_OTHER_UNIT), 0.85),
+        (_pattern(r"\b" + _NUM + _W), 0.5),
+    ],
+    "cct_kelvin": [
+        (_pattern(r"\b(?:colou?r\s+temperature|cct)" + _PAREN + _SEP + _KELVIN), 0.95),
+        (_pattern(r"\b" + _KELVIN), 0.6),
+    ],
+    "cri": [
+        (_pattern(r"\b(?:colou?r\s+rendering\s+index|cri)" + _PAREN + _SEP + r"(?P<qual>>=?|≥|min\.?\s*|over\s+|above\s+)?\s*"
+                  r"(?P<value>\d{2,3})(?P<plus>\+)?" + _NOT_OTHER_UNIT), 0.95),
+        (_pattern(r"\bRa\s*(?P<qual>>=?|≥)?\s*(?P<value>\d{2,3})(?P<plus>\+)?\b"), 0.8),
+    ],
+    "beam_angle_deg": [
+        (_pattern(r"\b(?:beam\s+angle|beam\s+spread|beam)" + _PAREN + _SEP + _NUM + _DEG), 0.95),
+        (_pattern(r"\b(?:beam\s+angle|beam\s+spread)" + _PAREN + _SEP + _NUM + _NOT_OTHER_UNIT), 0.85),
+        (_pattern(r"\b" + _NUM + _DEG + r"\s*beam"), 0.75),
+    ],
+}
+# "Replaces standard 100W incandescent bulb", "60W equivalent": a comparison, not this lamp
+_EQUIVALENCE_BEFORE = _pattern(r"(?:replac\w*|equivalent\s+to|equals?|=|vs\.?|like\s+a)\s*(?:standard\s+|an?\s+|old\s+)?$")
+_EQUIVALENCE_AFTER = _pattern(r"^\s*(?:equivalent|equiv\b|eq\b|incandescent|halogen|replacement|bulb\s+equivalent|cfl)")
+
+Page = Tuple[int, str]
+
+def _number(text: str) -> float:
+    return float(text.replace(",", ""))
+
+def _is_comparison(text: str, start: int, end: int) -> bool:
+    return bool(_EQUIVALENCE_BEFORE.search(text[max(0, start - 24):start])
+                or _EQUIVALENCE_AFTER.match(text[end:end + 24]))
+
+def find_candidates(text: str, page: int = 1) -> Dict[str, List[Dict]]:
+    """
+    Every plausible reading of each field on one page:
+    {"lumens": [{"value", "confidence", "page", "evidence", ...}], ...}.
+    A number claimed by a more specific pattern is not counted again by a looser one.
+    """
+    found: Dict[str, List[Dict]] = {field: [] for field in FIELDS}
+    for field, patterns in PATTERNS.items():
+        claimed = set()
+        low, high = PLAUSIBLE[field]
+        for pattern, confidence in patterns:
+            for match in pattern.finditer(text):
+                span = match.span("value")
+                if span in claimed:
+                    continue
+                claimed.add(span)
+                if field in ("lumens", "watts") and _is_comparison(text, match.start(), match.end()):
+                    continue
+                value = _number(match.group("value"))
+                if not low <= value <= high:
+                    continue
+                candidate = {"value": value, "confidence": confidence, "page": page,
+                             "evidence": " ".join(match.group(0).split())[:80]}
+                groups = match.groupdict()
+                if groups.get("high"):
+                    candidate["range"] = [value, _number(groups["high"])]
+                if groups.get("qual") or groups.get("plus"):
+                    candidate["qualifier"] = "min"
+                found[field].append(candidate)
+    return found
+
+def _choose(candidates: List[Dict]) -> Optional[Dict]:
+    """
+    The best-supported value: highest pattern confidence, small bonus for
+    repeats; a competing value of similar confidence cuts it to 60%.
+    """
+    if not candidates:
+        return None
+    by_value: Dict[float, List[Dict]] = {}
+    for c in candidates:
+        by_value.setdefault(c["value"], []).append(c)
+    ranked = sorted(by_value.values(), key=lambda cs: (-max(c["confidence"] for c in cs), -len(cs), cs[0]["page"]))
+    best_group = ranked[0]
+    best = dict(max(best_group, key=lambda c: c["confidence"]))
+    confidence = min(best["confidence"] + 0.02 * (len(best_group) - 1), 0.99)
+    rivals = [g[0]["value"] for g in ranked[1:] if max(c["confidence"] for c in g) >= best["confidence"] - 0.1]
+    if rivals:
+        confidence *= 0.6
+        best["alternatives"] = rivals[:3]
+    best["confidence"] = round(confidence, 2)
+    return best
+
+def extract_specs(pages: Union[str, Iterable[Page]]) -> Dict:
+    """
+    Photometric specs from datasheet text (a string, or (page, text) pairs):
+    {"specs": {field: {"value", "unit", "confidence", "page", "evidence", ...}},
+     "missing": [fields not found], "needs_review": [fields below SPEC_MIN_CONFIDENCE], "warnings": [...]}.
+    """
+    if isinstance(pages, str):
+        pages = [(1, pages)]
+    candidates: Dict[str, List[Dict]] = {field: [] for field in FIELDS}
+    for page, text in pages:
+        for field, found in find_candidates(text, page).items():
+            candidates[field].extend(found)
+
+    specs, warnings = {}, []
+    for field in FIELDS:
+        best = _choose(candidates[field])
+        if best is not None:
+            specs[field] = dict(best, unit=UNITS[field])
+    if "lumens" in specs and "watts" in specs:
+        efficacy = specs["lumens"]["value"] / specs["watts"]["value"]
+        low, high = EFFICACY_LM_PER_W
+        if not low <= efficacy <= high:
+            warnings.append(f"Implausible efficacy {efficacy:.0f} lm/W: check lumens and watts against the page.")
+            for field in ("lumens", "watts"):
+                specs[field]["confidence"] = round(specs[field]["confidence"] * 0.6, 2)
+        else:
+            specs["efficacy_lm_per_w"] = {"value": round(efficacy, 1), "unit": "lm/W", "derived": True}
+    for field in FIELDS:
+        if field in specs and "alternatives" in specs[field]:
+            warnings.append(f"Conflicting {field} values: {specs[field]['value']:g} vs "
+                            f"{', '.join(f'{v:g}' for v in specs[field]['alternatives'])}.")
+    return {"specs": specs, "missing": [f for f in FIELDS if f not in specs],
+            "needs_review": [f for f in FIELDS if f in specs and specs[f]["confidence"] < SPEC_MIN_CONFIDENCE],
+            "warnings": warnings}
+
+def extract_pdf_specs(path: str, max_pages: int = SPEC_MAX_PAGES,
+                      extractor: Optional[PdfTextExtractor] = None) -> Dict:
+    """extract_specs over the first max_pages of a PDF (page text comes from the shared, cached extractor)."""
+    extractor = extractor or pdf_text_extractor
+    pages = extractor.iter_pages(path, 1, max_pages)
+    try:
+        result = extract_specs(pages)
+    finally:
+        pages.close()
+    return dict(file=path, pages_scanned=min(max_pages, extractor.page_count(path)), **result)
+
+def _bulk_worker(path: str, max_pages: int) -> Dict:
+    try:
+        # One sequential extractor per worker process: the bulk run is already parallel
+        return extract_pdf_specs(path, max_pages, PdfTextExtractor(workers=1))
+    except Exception as e:
+        return {"file": path, "error": f"{type(e).__name__}: {e}"}
+
+def iter_pdf_paths(directory: str, recursive: bool = False) -> Iterator[str]:
+    for root, dirs, files in os.walk(directory):
+        for name in sorted(files):
+            if name.lower().endswith(".pdf"):
+                yield os.path.join(root, name)
+        if not recursive:
+            break
+        dirs.sort()
+
+def extract_many(paths: Iterable[str], workers: int = SPEC_BULK_WORKERS,
+                 max_pages: int = SPEC_MAX_PAGES) -> Iterator[Dict]:
+    """
+    extract_pdf_specs over many PDFs in worker processes, yielded as they finish.
+    A file that fails yields {"file", "error"} instead of stopping the run.
+    """
+    paths = list(paths)
+    if workers <= 1 or len(paths) <= 1:
+        for path in paths:
+            yield _bulk_worker(path, max_pages)
+        return
+    # spawn, as for the PDF pool: callers (the agent, a test runner) may already run threads
+    with ProcessPoolExecutor(max_workers=min(workers, len(paths)),
+                             mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = [pool.submit(_bulk_worker, path, max_pages) for path in paths]
+        for future in as_completed(futures):
+            yield future.result()
@@ -0,0 +1,203 @@
+# my_agent/standards_kb.py
+import os
+import re
+import math
+import threading
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Configuration (environment overridable)
+KB_PATH = os.getenv(
+    "STANDARDS_KB_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "smart_home_standards.md")
+)
+KB_TOP_K = int(os.getenv("STANDARDS_KB_TOP_K", "3"))
+KB_TOKEN_BUDGET = int(os.getenv("STANDARDS_KB_TOKEN_BUDGET", "600"))  # per answer, estimated
+CHARS_PER_TOKEN = 4  # rough estimate for English markdown
+
+# BM25 parameters; heading words count HEADING_WEIGHT times (a section is mostly about its title)
+BM25_K1 = 1.2
+BM25_B = 0.75
+HEADING_WEIGHT = 2
+
+_HEADING_RE = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+_FENCE_RE = re.compile(r"^\s*(```|~~~)")
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+)*")
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "for", "from", "how", "i", "if", "in",
+    "is", "it", "my", "of", "on", "or", "the", "to", "what", "when", "which", "with", "will", "you", "your",
+}
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+def _stem(word: str) -> str:
+    """Plural folding only ("hubs" -> "hub", "switches" -> "switch"); keeps "ss"/"us" words intact."""
+    if len(word) > 4 and word.endswith(("ches", "shes", "sses", "xes", "zes")):
+        return word[:-2]
+    if len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased, stopword-free, plural-folded terms. "Wi-Fi" yields "wifi", "wi" and "fi"."""
+    terms = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        if "-" in token:
+            parts = token.split("-")
+            terms.append("".join(parts))
+            terms.extend(p for p in parts if p not in STOPWORDS)
+        elif token not in STOPWORDS:
+            terms.append(token)
+    return [_stem(t) for t in terms]
+
+def parse_sections(lines) -> List[Dict]:
+    """
+    Splits markdown into heading-delimited sections:
+    [{"title": "Zigbee", "path": "Knowledge Base > 1. Protocols > Zigbee", "text": "..."}].
+    Headings inside fenced code blocks do not split; sections without body text
+    (a heading directly followed by a sub-heading) are dropped, their titles live
+    on in the children's paths. Text before the first heading is a section too.
+    """
+    sections, stack, body, in_fence = [], [], [], False
+
+    def flush():
+        text = "\n".join(body).strip()
+        if text:
+            titles = [t for _, t in stack]
+            sections.append({"title": titles[-1] if titles else "", "path": " > ".join(titles), "text": text})
+        body.clear()
+
+    for line in lines:
+        line = line.rstrip("\n")
+        if _FENCE_RE.match(line):
+            in_fence = not in_fence
+        match = None if in_fence else _HEADING_RE.match(line)
+        if match is None:
+            body.append(line)
+            continue
+        flush()
+        level = len(match.group(1))
+        while stack and stack[-1][0] >= level:
+            stack.pop()
+        stack.append((level, match.group(2)))
+    flush()
+    return sections
+
+class StandardsKB:
+    """
+    Sectioned BM25 retrieval over the standards knowledge base (markdown).
+
+    - The file is parsed once into heading-delimited sections and indexed;
+      every call costs one stat(), and the index is rebuilt only when the
+      file's mtime or size changes.
+    - Index: per-term posting arrays (section ids, term frequencies) scored
+      with BM25 in numpy; heading-path words are weighted HEADING_WEIGHT times.
+    - search() returns the top-k sections for a topic that fit a token budget
+      (the best section is truncated rather than dropped if it alone is too long).
+    """
+
+    def __init__(self, path: str = KB_PATH):
+        self.path = path
+        self._signature: Optional[Tuple[int, int]] = None
+        # (sections, postings: term -> (section ids, term frequencies), section lengths), swapped as one
+        self._index: Tuple[List[Dict], Dict[str, Tuple[np.ndarray, np.ndarray]], np.ndarray] = ([], {}, np.zeros(0))
+        self._lock = threading.Lock()
+        self._stats = {"loads": 0, "queries": 0}
+
+    def _ensure_fresh(self):
+        """Re-parses and re-indexes when the file changed since the last load. Raises FileNotFoundError."""
+        st = os.stat(self.path)
+        signature = (st.st_mtime_ns, st.st_size)
+        if signature == self._signature:
+            return
+        with self._lock:
+            if signature == self._signature:
+                return
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._index = self._build(parse_sections(f))
+            self._signature = signature
+            self._stats["loads"] += 1
+
+    @staticmethod
+    def _build(sections: List[Dict]) -> Tuple:
+        doc_ids: Dict[str, List[int]] = {}
+        doc_tfs: Dict[str, List[int]] = {}
+        lengths = np.zeros(len(sections))
+        for i, section in enumerate(sections):
+            terms = Counter(tokenize(section["text"]))
+            for term in tokenize(section["path"]):
+                terms[term] += HEADING_WEIGHT
+            lengths[i] = sum(terms.values())
+            for term, tf in terms.items():
+                doc_ids.setdefault(term, []).append(i)
+                doc_tfs.setdefault(term, []).append(tf)
+        postings = {t: (np.array(ids, dtype=np.int64), np.array(doc_tfs[t], dtype=np.float64))
+                    for t, ids in doc_ids.items()}
+        return sections, postings, lengths
+
+    @staticmethod
+    def _scores(index: Tuple, topic: str) -> np.ndarray:
+        sections, postings, lengths = index
+        n = len(sections)
+        scores = np.zeros(n)
+        if n == 0:
+            return scores
+        avgdl = max(float(lengths.mean()), 1.0)
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths / avgdl)
+        for term in set(tokenize(topic)):
+            posting = postings.get(term)
+            if posting is None:
+                continue
+            ids, tf = posting
+            idf = math.log(1 + (n - len(ids) + 0.5) / (len(ids) + 0.5))
+            scores[ids] += idf * tf * (BM25_K1 + 1) / (tf + norm[ids])
+        return scores
+
+    def search(self, topic: str, top_k: int = KB_TOP_K, token_budget: int = KB_TOKEN_BUDGET) -> List[Dict]:
+        """
+        Best sections for `topic`, highest score first, within `token_budget`.
+        Each: {"path", "text", "score", "tokens"}. Empty if no section matches.
+        """
+        self._ensure_fresh()
+        self._stats["queries"] += 1
+        index = self._index
+        sections, scores = index[0], self._scores(index, topic)
+        matched = np.flatnonzero(scores > 0)
+        if len(matched) > top_k:
+            matched = matched[np.argpartition(-scores[matched], top_k - 1)[:top_k]]
+        order = matched[np.lexsort((matched, -scores[matched]))]
+
+        results, used = [], 0
+        for i in order:
+            text = sections[i]["text"]
+            tokens = estimate_tokens(sections[i]["path"]) + estimate_tokens(text)
+            if used + tokens > token_budget:
+                if results:
+                    continue  # a smaller, lower-ranked section may still fit
+                text = text[:max(token_budget - estimate_tokens(sections[i]["path"]), 0) * CHARS_PER_TOKEN] + " …[truncated]"
+                tokens = token_budget
+            results.append({"path": sections[i]["path"], "text": text, "score": round(float(scores[i]), 3),
+                            "tokens": tokens})
+            used += tokens
+        return results
+
+    def outline(self, token_budget: int = KB_TOKEN_BUDGET) -> List[str]:
+        """Section paths (table of contents), cut at the token budget."""
+        self._ensure_fresh()
+        paths, used = [], 0
+        for section in self._index[0]:
+            used += estimate_tokens(section["path"]) + 1
+            if used > token_budget:
+                break
+            paths.append(section["path"])
+        return paths
+
+    def stats(self) -> dict:
+        sections, postings, _ = self._index
+        return dict(self._stats, sections=len(sections), terms=len(postings))
+
+# Shared by consult_standards_kb
+standards_kb = StandardsKB()
@@ -0,0 +1,244 @@
+# my_agent/state_store.py
+import os
+import time
+import sqlite3
+import itertools
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+try:
+    from .spatial_state import SpatialState
+except ImportError:
+    from spatial_state import SpatialState
+
+# Configuration (environment overridable)
+STATE_STORE_MAX_SESSIONS = int(os.getenv("STATE_STORE_MAX_SESSIONS", "1000"))
+STATE_STORE_TTL_S = float(os.getenv("STATE_STORE_TTL_S", "3600"))
+STATE_STORE_MEMORY_MB = float(os.getenv("STATE_STORE_MEMORY_MB", "256"))
+
+class _Entry:
+    __slots__ = ("state", "lock", "last_used", "in_use", "nbytes", "version")
+
+    def __init__(self, state: SpatialState, now: float, version: int):
+        self.state = state
+        self.version = version
+        self.lock = threading.RLock()
+        self.last_used = now
+        self.in_use = 0
+        self.nbytes = state.memory_bytes()
+
+class SessionStateStore:
+    """
+    Session-keyed SpatialState store for concurrent agent sessions.
+
+    - Each session has its own room and its own lock: tools of one session are
+      serialized, different sessions never wait on each other.
+    - Idle sessions expire after `ttl_s`; beyond `max_sessions` or `memory_mb`
+      the least recently used idle sessions are evicted. Sessions inside
+      `session()` and the most recently used one are never evicted.
+    - snapshot()/restore() move a session between workers as compact bytes
+      (SpatialState.to_bytes).
+    - Every write checkout gives the session a new version number (versions
+      are never reused, even after expiry or restore), so a result computed
+      from the room can be cached under (session, version).
+    """
+
+    def __init__(self, max_sessions: int = STATE_STORE_MAX_SESSIONS, ttl_s: float = STATE_STORE_TTL_S,
+                 memory_mb: float = STATE_STORE_MEMORY_MB, clock: Callable[[], float] = time.monotonic):
+        self.max_sessions = max_sessions
+        self.ttl_s = ttl_s
+        self.memory_budget = int(memory_mb * 1024 * 1024)
+        self._clock = clock
+
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self._versions = itertools.count(1)
+        self._stats = {"created": 0, "restored": 0, "expired": 0, "evicted": 0}
+
+    def _checkout(self, session_id: str, state: Optional[SpatialState] = None) -> _Entry:
+        """Finds or creates the entry, marks it in use and most recently used. Caller holds the lock."""
+        now = self._clock()
+        entry = self._entries.get(session_id)
+        if entry is not None and entry.in_use == 0 and now - entry.last_used > self.ttl_s:
+            self._drop(session_id)
+            self._stats["expired"] += 1
+            entry = None
+        if entry is None:
+            entry = _Entry(state if state is not None else SpatialState(), now, next(self._versions))
+            self._entries[session_id] = entry
+            self._memory_bytes += entry.nbytes
+            self._stats["created"] += 1
+        self._entries.move_to_end(session_id)
+        entry.last_used = now
+        entry.in_use += 1
+        return entry
+
+    def _release(self, entry: _Entry, changed: bool = True):
+        """Re-measures the session after use (and bumps its version if it was writable), then enforces the limits."""
+        with self._lock:
+            entry.in_use -= 1
+            if changed:
+                entry.version = next(self._versions)
+            entry.last_used = self._clock()
+            nbytes = entry.state.memory_bytes()
+            self._memory_bytes += nbytes - entry.nbytes
+            entry.nbytes = nbytes
+            self._evict()
+
+    def _drop(self, session_id: str):
+        entry = self._entries.pop(session_id)
+        self._memory_bytes -= entry.nbytes
+
+    def _evict(self):
+        """Expires idle sessions past the TTL, then evicts LRU idle sessions over the caps. Caller holds the lock."""
+        now = self._clock()
+        for session_id, entry in list(self._entries.items()):
+            if entry.in_use == 0 and now - entry.last_used > self.ttl_s:
+                self._drop(session_id)
+                self._stats["expired"] += 1
+
+        # LRU first; the most recently used session always stays
+        for session_id, entry in list(self._entries.items())[:-1]:
+            if len(self._entries) <= self.max_sessions and self._memory_bytes <= self.memory_budget:
+                break
+            if entry.in_use == 0:
+                self._drop(session_id)
+                self._stats["evicted"] += 1
+
+    @contextmanager
+    def session(self, session_id: str, readonly: bool = False) -> Iterator[SpatialState]:
+        """
+        Exclusive access to a session's room (created on first use):
+
+            with store.session(session_id) as room:
+                room.add_light_source(...)
+
+        Pass readonly=True when the room is only read: its version stays the same.
+        """
+        with self._lock:
+            entry = self._checkout(session_id)
+        try:
+            with entry.lock:
+                yield entry.state
+        finally:
+            self._release(entry, changed=not readonly)
+
+    def version(self, session_id: str) -> int:
+        """
+        The session's state version. An unknown session gets a number never used
+        before: its room may yet be created or restored, so nothing is current for it.
+        """
+        with self._lock:
+            entry = self._entries.get(session_id)
+            return entry.version if entry is not None else next(self._versions)
+
+    def __contains__(self, session_id: str) -> bool:
+        with self._lock:
+            return session_id in self._entries
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def drop(self, session_id: str) -> bool:
+        """Forgets a session. Returns False if it was unknown; raises if it is in use."""
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None:
+                return False
+            if entry.in_use:
+                raise RuntimeError(f"Session '{session_id}' is in use; cannot drop it.")
+            self._drop(session_id)
+            return True
+
+    def snapshot(self, session_id: str) -> Optional[bytes]:
+        """Binary snapshot of a session's room, or None if the session is unknown."""
+        with self._lock:
+            if session_id not in self._entries:
+                return None
+            entry = self._checkout(session_id)
+        try:
+            with entry.lock:
+                return entry.state.to_bytes()
+        finally:
+            self._release(entry, changed=False)
+
+    def restore(self, session_id: str, blob: bytes):
+        """Installs a snapshot as the session's room, replacing any current one."""
+        state = SpatialState.from_bytes(blob)
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is not None:
+                if entry.in_use:
+                    raise RuntimeError(f"Session '{session_id}' is in use; cannot restore over it.")
+                self._drop(session_id)
+            entry = self._checkout(session_id, state)
+            self._stats["restored"] += 1
+        self._release(entry, changed=False)
+
+    def evict_expired(self):
+        with self._lock:
+            self._evict()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(
+                self._stats,
+                sessions=len(self._entries),
+                max_sessions=self.max_sessions,
+                memory_mb=round(self._memory_bytes / 1024 / 1024, 2),
+                memory_budget_mb=round(self.memory_budget / 1024 / 1024, 2)
+            )
+
+class RoomSnapshotStore:
+    """
+    Latest room snapshot per session key, in an SQLite table at `db_path`
+    (None or "" = nothing is kept).
+
+    One row per room, overwritten on every write, so a room outlives the
+    process without its snapshot piling up in the session's event history.
+    The table lives beside the sessions (AGENT_SESSION_DB); the database is
+    opened on first use.
+    """
+
+    def __init__(self, db_path: Optional[str]):
+        self.db_path = db_path
+        self._db = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        """Opens the table on first use. Caller holds the lock."""
+        if self._db is None and self.db_path:
+            try:
+                self._db = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+                self._db.execute("CREATE TABLE IF NOT EXISTS room_snapshots (key TEXT PRIMARY KEY, blob BLOB, "
+                                 "updated_at REAL)")
+            except sqlite3.Error as e:
+                print(f"[STATE STORE]: Room snapshots unavailable ({e}); rooms will not survive a restart.")
+                self.db_path = None
+                self._db = None
+        return self._db
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            db = self._connection()
+            row = db.execute("SELECT blob FROM room_snapshots WHERE key = ?", (key,)).fetchone() if db else None
+        return bytes(row[0]) if row is not None else None
+
+    def put(self, key: str, blob: bytes):
+        with self._lock:
+            db = self._connection()
+            if db is not None:
+                db.execute("INSERT OR REPLACE INTO room_snapshots VALUES (?, ?, ?)", (key, blob, time.time()))
+
+    def delete(self, key: str):
+        with self._lock:
+            db = self._connection()
+            if db is not None:
+                db.execute("DELETE FROM room_snapshots WHERE key = ?", (key,))
+
+# Shared by the agent tools
+state_store = SessionStateStore()
@@ -0,0 +1,255 @@
+# my_agent/tariff_table.py
+import os
+import re
+import threading
+from typing import Dict, List, Optional
+
+try:
+    from .fixture_schedule import iter_records
+except ImportError:
+    from fixture_schedule import iter_records
+
+# Configuration (environment overridable)
+TARIFF_TABLE_PATH = os.getenv(
+    "TARIFF_TABLE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "electricity_tariffs.csv")
+)
+TARIFF_PREFIX_MIN_CHARS = 4  # "calif" -> California, but never "new" -> New York
+TARIFF_RESOLVE_CACHE_SIZE = 4096
+
+# Most specific first: a city rate beats its state's average, a state beats its country
+LEVELS = ("city", "state", "country")
+
+_WORD_RE = re.compile(r"[a-z0-9&'-]+")
+_CODE_RE = re.compile(r"\b[A-Z]{2}\b")
+
+class TariffTableError(ValueError):
+    """A tariff table row is malformed (no location or a bad rate)."""
+
+def normalize_location(text: str) -> str:
+    """'Washington, D.C.' -> 'washington dc'."""
+    return " ".join(_WORD_RE.findall(text.lower().replace(".", "")))
+
+def normalize_tariff(raw: Dict, line: int = 0) -> Dict:
+    row = {k: str(v or "").strip() for k, v in raw.items() if k}
+    try:
+        rate = float(row.get("rate_usd_kwh", ""))
+    except ValueError:
+        raise TariffTableError(f"Row {line}: 'rate_usd_kwh' is not a number ({row.get('rate_usd_kwh')!r}).")
+    if not row.get("country"):
+        raise TariffTableError(f"Row {line}: 'country' is required.")
+    level = "city" if row.get("city") else "state" if row.get("state") else "country"
+    return {
+        "country": row["country"], "state": row.get("state", ""), "city": row.get("city", ""),
+        "level": level, "name": row[level] if level != "country" else row["country"],
+        "code": row.get("code", "").upper(),
+        "aliases": [a for a in (normalize_location(a) for a in row.get("aliases", "").split("|")) if a],
+        "rate_usd_kwh": rate, "effective_date": row.get("effective_date", ""), "source": row.get("source", "")
+    }
+
+class _TrieNode:
+    __slots__ = ("children", "ids", "under")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.ids: List[int] = []  # entries whose name/alias ends here
+        self.under = set()  # entries whose name/alias passes through here (prefix completion)
+
+class TariffTable:
+    """
+    Local electricity tariffs (country / state / city -> USD per kWh, with an
+    effective date) and a resolver from free-text locations to entries.
+
+    - Names and aliases ("NYC", "Calif", "D.C.") live in a character trie; the
+      resolver walks it from every word of the text, keeping the longest match,
+      so "rate in San Francisco, California" finds both places in one pass.
+      Uppercase two-letter codes ("Portland, OR") are matched separately.
+    - A partial word (>= TARIFF_PREFIX_MIN_CHARS) with a unique completion
+      counts only when nothing matched exactly.
+    - The most specific match wins; a city consistent with a state/country
+      also named in the text beats a same-named city elsewhere
+      ("Springfield, MA" vs "Springfield, IL").
+    - Resolutions are cached, so bulk runs over thousands of sites repeat no work.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path  # loaded on first use
+        self._loaded = path is None
+        self._entries: List[Dict] = []
+        self._root = _TrieNode()
+        self._codes: Dict[str, List[int]] = {}
+        self._cache: Dict[str, Optional[int]] = {}
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._stats = {"resolved": 0, "unresolved": 0, "cache_hits": 0}
+
+    # --- Loading ---
+
+    def add_entries(self, entries) -> int:
+        count = 0
+        with self._lock:
+            for entry in entries:
+                i = len(self._entries)
+                self._entries.append(entry)
+                for name in {normalize_location(entry["name"]), *entry["aliases"]}:
+                    self._insert(name, i)
+                if entry["code"]:
+                    self._codes.setdefault(entry["code"], []).append(i)
+                count += 1
+            self._cache.clear()
+        return count
+
+    def load(self, source, fmt: Optional[str] = None) -> int:
+        """Loads a CSV/JSON tariff table (country, state, city, code, aliases, rate_usd_kwh, effective_date, source)."""
+        loaded = self.add_entries(iter_records(source, normalize_tariff, fmt, error=TariffTableError))
+        print(f"[TARIFF TABLE]: Loaded {loaded} tariffs.")
+        return loaded
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._load_lock:
+            if self._loaded:
+                return
+            if os.path.exists(self.path):
+                self.load(self.path)
+            else:
+                print(f"[TARIFF TABLE]: Table '{self.path}' not found; rates come from the market search.")
+            self._loaded = True
+
+    def warm_up(self) -> int:
+        """Process-start hook: loads the table. Returns the number of tariffs."""
+        self._ensure_loaded()
+        return len(self._entries)
+
+    def _insert(self, name: str, i: int):
+        node = self._root
+        node.under.add(i)
+        for ch in name:
+            node = node.children.setdefault(ch, _TrieNode())
+            node.under.add(i)
+        node.ids.append(i)
+
+    def _walk(self, node: _TrieNode, text: str) -> Optional[_TrieNode]:
+        for ch in text:
+            node = node.children.get(ch)
+            if node is None:
+                return None
+        return node
+
+    # --- Resolution ---
+
+    def _matches(self, text: str) -> List[int]:
+        """Entry ids named in the text: longest exact matches, codes, else unique prefix completions."""
+        words = normalize_location(text).split()
+        found: List[int] = []
+        i = 0
+        while i < len(words):
+            node, best_end, best_ids = self._root, i, None
+            for j in range(i, len(words)):
+                node = self._walk(node, words[j] if j == i else " " + words[j])
+                if node is None:
+                    break
+                if node.ids:
+                    best_end, best_ids = j + 1, node.ids
+            if best_ids:
+                found.extend(best_ids)
+                i = best_end
+            else:
+                i += 1
+        if not text.isupper():  # in "RATE IN OHIO" every word looks like a code
+            named_countries = {self._entries[i]["country"] for i in found}
+            for code in _CODE_RE.findall(text):
+                found.extend(self._code_reading(code, named_countries))
+        if found:
+            return found
+
+        for word in words:
+            if len(word) >= TARIFF_PREFIX_MIN_CHARS:
+                node = self._walk(self._root, word)
+                if node is not None and len(node.under) == 1:
+                    found.extend(node.under)
+        return found
+
+    def _code_reading(self, code: str, named_countries: set) -> List[int]:
+        """
+        Entries of a two-letter code. CA, DE and IN are both a state and a country:
+        the country only when a place in it is also named ("Toronto, CA"), else the state.
+        """
+        ids = self._codes.get(code, [])
+        countries = [i for i in ids if self._entries[i]["level"] == "country"]
+        if len(countries) == len(ids):
+            return ids
+        if any(self._entries[i]["country"] in named_countries for i in countries):
+            return [i for i in countries if self._entries[i]["country"] in named_countries]
+        return [i for i in ids if self._entries[i]["level"] != "country"]
+
+    def _choose(self, ids: List[int]) -> Optional[int]:
+        """Most specific entry, preferring cities/states whose parents are also named."""
+        entries = self._entries
+        states = {entries[i]["state"] for i in ids if entries[i]["level"] == "state"}
+        countries = {entries[i]["country"] for i in ids if entries[i]["level"] == "country"}
+
+        def consistent(i: int) -> bool:
+            entry = entries[i]
+            if states and entry["level"] == "city" and entry["state"] not in states:
+                return False
+            return not countries or entry["country"] in countries
+
+        for level in LEVELS:
+            candidates = [i for i in ids if entries[i]["level"] == level]
+            if not candidates:
+                continue
+            matching = [i for i in candidates if consistent(i)]
+            if matching and level == "state":
+                # "Kansas City, Missouri": the state in the "City, State" position, i.e. named last
+                return max(matching, key=lambda i: max(k for k, j in enumerate(ids) if j == i))
+            if matching:
+                return min(matching)  # table order breaks ties
+            if level == "city" and states:
+                continue  # "Springfield, Ohio" with no such city: fall back to the state
+            return min(candidates)
+        return None
+
+    def resolve(self, location: str) -> Optional[Dict]:
+        """
+        Tariff for a free-text location ("Springfield, MA", "nyc", "rates in calif"), or None.
+        Returns a copy of the entry with a display `location`.
+        """
+        self._ensure_loaded()
+        key = normalize_location(location) + "|" + " ".join(_CODE_RE.findall(location))
+        if key in self._cache:
+            self._stats["cache_hits"] += 1
+            i = self._cache[key]
+        else:
+            i = self._choose(self._matches(location))
+            with self._lock:
+                if len(self._cache) >= TARIFF_RESOLVE_CACHE_SIZE:
+                    self._cache.clear()
+                self._cache[key] = i
+        if i is None:
+            self._stats["unresolved"] += 1
+            return None
+        self._stats["resolved"] += 1
+        entry = self._entries[i]
+        return dict(entry, aliases=list(entry["aliases"]),
+                    location=", ".join(p for p in (entry["city"], entry["state"], entry["country"]) if p))
+
+    def lookup(self, query: str) -> Optional[Dict]:
+        """A rate question ("Electricity rate in New York?") as a market rate record, or None."""
+        entry = self.resolve(query)
+        if entry is None:
+            return None
+        return {
+            "type": "rate",
+            "location": entry["location"],
+            "rate_usd_kwh": entry["rate_usd_kwh"],
+            "source": f"Local tariff table: {entry['source']}",
+            "effective_date": entry["effective_date"]
+        }
+
+    def stats(self) -> dict:
+        return dict(self._stats, entries=len(self._entries), cached=len(self._cache))
+
+# Shared by the market tool and the ROI calculator
+tariff_table = TariffTable(path=TARIFF_TABLE_PATH)
@@ -0,0 +1,54 @@
+# my_agent/tool_executor.py
+import os
+import asyncio
+import functools
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+# Configuration (environment overridable)
+TOOL_EXECUTOR_WORKERS = int(os.getenv("TOOL_EXECUTOR_WORKERS", "4"))
+
+# Shared by every offloaded agent tool: bounds how many blocking tools run at once
+tool_executor = ThreadPoolExecutor(max_workers=TOOL_EXECUTOR_WORKERS, thread_name_prefix="agent-tool")
+
+_stats = {"calls": 0, "running": 0, "max_running": 0}
+_stats_lock = threading.Lock()
+
+def offload(fn: Callable) -> Callable:
+    """
+    Async adapter for a blocking (I/O-heavy) tool: calls run on the bounded
+    `tool_executor` instead of the event loop.
+
+    ADK already gathers the function calls of one model turn (results keep
+    the order of the calls), but a sync tool runs on the loop and blocks the
+    others; offloaded, it overlaps with them. The wrapper keeps the name,
+    docstring and signature (tool_context included), so the declaration the
+    model sees does not change. Context variables (tracing) are carried over.
+
+    Keep tools that mutate or read the room state inline: inline sync tools
+    run one after another in call order, which is what dependent calls expect.
+    """
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        call = functools.partial(contextvars.copy_context().run, _tracked, fn, *args, **kwargs)
+        return await asyncio.get_running_loop().run_in_executor(tool_executor, call)
+
+    return wrapper
+
+def _tracked(fn: Callable, *args, **kwargs):
+    with _stats_lock:
+        _stats["calls"] += 1
+        _stats["running"] += 1
+        _stats["max_running"] = max(_stats["max_running"], _stats["running"])
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        with _stats_lock:
+            _stats["running"] -= 1
+
+def tool_executor_stats() -> dict:
+    """Offloaded calls so far and the peak number running at once."""
+    with _stats_lock:
+        return dict(_stats, workers=TOOL_EXECUTOR_WORKERS)
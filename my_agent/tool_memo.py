@@ -0,0 +1,121 @@
+# my_agent/tool_memo.py
+import os
+import copy
+import json
+import inspect
+import functools
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+from google.adk.tools import ToolContext
+
+# Configuration (environment overridable)
+TOOL_MEMO_ENTRIES = int(os.getenv("TOOL_MEMO_ENTRIES", "2048"))  # results kept, across all tools and sessions
+
+def _no_session(tool_context: Optional[ToolContext]) -> str:
+    return ""
+
+def _normalized(value):
+    """Hashable form of an argument: 60 and 60.0 are one key, dicts ignore key order."""
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, (int, float, str)):
+        return value
+    return json.dumps(value, sort_keys=True, default=str)
+
+class ToolMemo:
+    """
+    Per-session result cache for deterministic agent tools.
+
+    The model often repeats a call with the same arguments within one
+    conversation (re-checking lux after a summary, re-running the ROI for the
+    final report). A memoized tool answers those from the cache without
+    running the tool, so its physics and its console output are skipped.
+
+    Key: (tool, session, state version, normalized arguments). Arguments are
+    bound to the signature with defaults applied, so `f(800, 2)` and
+    `f(light_lumens=800.0, distance_meters=2, beam_angle_degrees=120)` share
+    an entry. Tools that read the room pass `state_version`, and any change
+    to the room makes their old entries unreachable. Entries are bounded by
+    `max_entries`, least recently used first.
+    """
+
+    def __init__(self, max_entries: int = TOOL_MEMO_ENTRIES):
+        self.max_entries = max_entries
+        self._results: "OrderedDict[tuple, object]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def memoize(self, fn: Callable, session_key: Callable[[Optional[ToolContext]], str] = _no_session,
+                state_version: Optional[Callable[[str], int]] = None) -> Callable:
+        """
+        Wraps a sync tool. `session_key(tool_context)` scopes the entries;
+        `state_version(session)` is part of the key for tools whose result
+        depends on session state. The declaration the model sees is unchanged:
+        tool_context is added to the wrapper's signature only if the tool
+        lacks it, and ADK never declares it.
+        """
+        if inspect.iscoroutinefunction(fn):
+            raise TypeError(f"memoize expects a sync tool; '{fn.__name__}' is async.")
+        signature = inspect.signature(fn)
+        takes_context = "tool_context" in signature.parameters
+        name = fn.__name__
+        self._stats.setdefault(name, {"hits": 0, "misses": 0})
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            tool_context = kwargs.get("tool_context") if takes_context else kwargs.pop("tool_context", None)
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            session = session_key(tool_context)
+            arguments = tuple((k, _normalized(v)) for k, v in bound.arguments.items() if k != "tool_context")
+            key = (name, session, state_version(session) if state_version else 0, arguments)
+
+            with self._lock:
+                if key in self._results:
+                    self._results.move_to_end(key)
+                    self._stats[name]["hits"] += 1
+                    return _copied(self._results[key])
+                self._stats[name]["misses"] += 1
+
+            result = fn(*args, **kwargs)
+            with self._lock:
+                self._results[key] = _copied(result)
+                while len(self._results) > self.max_entries:
+                    self._results.popitem(last=False)
+            return result
+
+        if not takes_context:
+            context = inspect.Parameter("tool_context", inspect.Parameter.KEYWORD_ONLY,
+                                        default=None, annotation=Optional[ToolContext])
+            wrapper.__signature__ = signature.replace(parameters=[*signature.parameters.values(), context])
+        return wrapper
+
+    def clear(self):
+        with self._lock:
+            self._results.clear()
+
+    def stats(self) -> dict:
+        """Hits and misses per memoized tool, and the number of cached results."""
+        with self._lock:
+            tools = {name: dict(counts) for name, counts in self._stats.items()}
+            entries = len(self._results)
+        hits = sum(c["hits"] for c in tools.values())
+        calls = hits + sum(c["misses"] for c in tools.values())
+        return {"hits": hits, "calls": calls, "hit_rate": round(hits / calls, 3) if calls else 0.0,
+                "entries": entries, "max_entries": self.max_entries, "tools": tools}
+
+def _copied(result):
+    """Strings (every tool here) are immutable; anything else is copied so callers cannot edit the cache."""
+    return result if isinstance(result, (str, int, float, bool, type(None))) else copy.deepcopy(result)
+
+# Shared by the agent's memoized tools
+tool_memo = ToolMemo()
+
+def memoize_tool(fn: Callable, session_key: Callable[[Optional[ToolContext]], str] = _no_session,
+                 state_version: Optional[Callable[[str], int]] = None) -> Callable:
+    """tool_memo.memoize(...): memoizes a deterministic tool in the shared cache."""
+    return tool_memo.memoize(fn, session_key, state_version)
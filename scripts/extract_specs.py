@@ -0,0 +1,47 @@
+# extract_specs.py
+"""
+Bulk photometric spec extraction over a directory of lamp datasheet PDFs,
+in parallel worker processes. Writes one JSON object per file (JSON Lines).
+
+Usage: python scripts/extract_specs.py DIRECTORY [-o specs.jsonl] [--workers N] [--max-pages N] [--recursive]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "my_agent"))
+
+from spec_extractor import extract_many, iter_pdf_paths, SPEC_BULK_WORKERS, SPEC_MAX_PAGES
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Extract lumens, watts, CCT, CRI and beam angle from datasheet PDFs.")
+    parser.add_argument("directory")
+    parser.add_argument("-o", "--output", help="JSON Lines file (default: stdout)")
+    parser.add_argument("--workers", type=int, default=SPEC_BULK_WORKERS)
+    parser.add_argument("--max-pages", type=int, default=SPEC_MAX_PAGES)
+    parser.add_argument("--recursive", action="store_true")
+    args = parser.parse_args(argv)
+
+    paths = list(iter_pdf_paths(args.directory, args.recursive))
+    if not paths:
+        print(f"⚠️ No PDF files in '{args.directory}'.", file=sys.stderr)
+        return 1
+
+    start, failed, review = time.perf_counter(), 0, 0
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        for result in extract_many(paths, workers=args.workers, max_pages=args.max_pages):
+            failed += "error" in result
+            review += bool(result.get("missing") or result.get("needs_review"))
+            out.write(json.dumps(result) + "\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"✅ {len(paths)} datasheets in {time.perf_counter() - start:.1f} s ({args.workers} workers): "
+          f"{failed} failed, {review} with missing or low-confidence fields.", file=sys.stderr)
+    return 0 if not failed else 2
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+from unittest import mock
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, os.path.join(parent_dir, 'my_agent'))
+
+from google.adk.agents import Agent
+from google.adk.models import BaseLlm, LlmResponse
+from google.genai import types
+
+from runner_registry import RunnerPool, make_session_service
+from state_store import RoomSnapshotStore
+from history_compaction import (HistoryCompactor, compact_contents, content_tokens, digest_response,
+                                split_turns, SUMMARY_HEADER)
+
+PAGE_TEXT = "--- Content of catalog.pdf (pages 1-5 of 300) ---\n" + "SKU-1 LED A19 800 lm 9 W 2700K CRI 90\n" * 120
+
+def user(text):
+    return types.Content(role="user", parts=[types.Part(text=text)])
+
+def model_text(text):
+    return types.Content(role="model", parts=[types.Part(text=text)])
+
+def tool_turn(i):
+    """One audit turn: ask, call read_pdf_file, its large result, the answer."""
+    return [
+        user(f"question {i}: read the catalog"),
+        types.Content(role="model", parts=[types.Part(function_call=types.FunctionCall(
+            id=f"call-{i}", name="read_pdf_file", args={"file_path": "catalog.pdf"}))]),
+        types.Content(role="user", parts=[types.Part(function_response=types.FunctionResponse(
+            id=f"call-{i}", name="read_pdf_file", response={"result": PAGE_TEXT}))]),
+        model_text(f"answer {i}: the catalog lists 800 lm lamps"),
+    ]
+
+class CatalogLlm(BaseLlm):
+    """Offline model: reads the catalog once per user message, then answers. Records each prompt's size."""
+    prompt_tokens: list = []
+
+    async def generate_content_async(self, llm_request, stream=False):
+        self.prompt_tokens.append(content_tokens(llm_request.contents))
+        if llm_request.contents[-1].parts[0].function_response is None:
+            call = types.FunctionCall(name="read_catalog", args={"page": len(self.prompt_tokens)})
+            yield LlmResponse(content=types.Content(role="model", parts=[types.Part(function_call=call)]))
+            return
+        yield LlmResponse(content=model_text("The catalog lists 800 lm lamps."),
+                          usage_metadata=types.GenerateContentResponseUsageMetadata(prompt_token_count=123))
+
+class RoomLlm(BaseLlm):
+    """Offline model: calls the tool named by the user message (with `args`), then answers."""
+    args: dict = {}
+
+    async def generate_content_async(self, llm_request, stream=False):
+        last = llm_request.contents[-1].parts[0]
+        if last.function_response is not None:
+            yield LlmResponse(content=model_text("ok"))
+            return
+        call = types.FunctionCall(name=last.text, args=self.args.get(last.text, {}))
+        yield LlmResponse(content=types.Content(role="model", parts=[types.Part(function_call=call)]))
+
+def read_catalog(page: int) -> str:
+    """Reads catalog pages."""
+    return PAGE_TEXT
+
+class TestHistoryCompaction(unittest.IsolatedAsyncioTestCase):
+
+    # Test 1: Old tool results become digests
+    def test_digests_old_tool_results(self):
+        """Check: tool results before the kept turns are digested, call/response ids stay paired, input untouched."""
+        contents = [c for i in range(4) for c in tool_turn(i)]
+        compacted, info = compact_contents(contents, token_budget=100_000, keep_turns=2)
+        self.assertEqual((len(split_turns(contents)), info["digested"], info["summarized_turns"]), (4, 2, 0))
+        old = compacted[2].parts[0].function_response
+        self.assertEqual((old.id, old.name, old.response["original_chars"]), ("call-0", "read_pdf_file", len(PAGE_TEXT)))
+        self.assertTrue(old.response["summary"].startswith("--- Content of catalog.pdf"))
+        self.assertEqual(compacted[-2].parts[0].function_response.response["result"], PAGE_TEXT)  # recent: verbatim
+        self.assertEqual(contents[2].parts[0].function_response.response["result"], PAGE_TEXT)
+        self.assertLess(content_tokens(compacted), content_tokens(contents) * 0.6)  # 2 of 4 results digested
+
+        digest = digest_response("search_market_tool", {"result": json.dumps(
+            {"name": "Bulb", "price_usd": 4.5, "watts": 9.0, "specs": ["x"] * 50, "notes": "n" * 500})})
+        self.assertEqual((digest["price_usd"], digest["watts"], digest["omitted_fields"]), (4.5, 9.0, 2))
+
+    # Test 2: Over budget, the oldest turns are summarized
+    def test_summarizes_beyond_budget(self):
+        """Check: turns beyond the budget fold into a summary on the first kept user message."""
+        contents = [c for i in range(30) for c in tool_turn(i)]
+        compacted, info = compact_contents(contents, token_budget=4000, keep_turns=2)
+        self.assertLessEqual(content_tokens(compacted), 4000)
+        self.assertGreater(info["summarized_turns"], 20)
+        summary = compacted[0].parts[0].text
+        self.assertTrue(summary.startswith(SUMMARY_HEADER))
+        self.assertIn("read_pdf_file(file_path=catalog.pdf)", summary)
+        self.assertEqual(compacted[0].parts[1].text, f"question {info['summarized_turns']}: read the catalog")
+        self.assertEqual(compacted[0].role, "user")
+
+    # Test 3: Persistent sessions with flat prompts
+    async def test_persistent_session_flat_prompt(self):
+        """Check: a long SQLite-backed conversation keeps prompts bounded, is measured, and resumes after restart."""
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        db_path = os.path.join(tmp.name, "sessions.sqlite3")
+        model = CatalogLlm(model="stub")
+        compactor = HistoryCompactor(token_budget=3000, keep_turns=2)
+        agent = Agent(name="audit_agent", model=model, instruction="Audit.", tools=[read_catalog],
+                      before_model_callback=compactor.before_model, after_model_callback=compactor.after_model)
+
+        pool = RunnerPool(agent, "history_test", session_service=make_session_service(db_path))
+        with mock.patch("sys.stdout"):
+            for i in range(12):
+                session_id = await pool.session_id_for("alice")
+                async for _ in pool.run_async("alice", session_id, user(f"question {i}")):
+                    pass
+
+        uncompacted = [c["history_tokens_before"] for c in compactor.prompt_stats(last=24)["recent"]]
+        self.assertGreater(uncompacted[-1], 10_000)
+        self.assertLessEqual(max(model.prompt_tokens[4:]), 3000)
+        stats = compactor.prompt_stats()
+        self.assertEqual(stats["calls"], 24)
+        self.assertEqual(stats["recent"][-1]["prompt_token_count"], 123)
+        self.assertIsNotNone(stats["avg_latency_ms"])
+
+        restarted = RunnerPool(agent, "history_test", session_service=make_session_service(db_path))
+        self.assertEqual(await restarted.session_id_for("alice", resume=True), session_id)
+        session = await restarted.session_service.get_session(app_name="history_test", user_id="alice",
+                                                              session_id=session_id)
+        self.assertEqual(len(session.events), 12 * 4)  # full history stays in the store
+        self.assertEqual(restarted.stats()["sessions_resumed"], 1)
+
+        # Without resume=True a new process starts a new conversation
+        fresh = RunnerPool(agent, "history_test", session_service=make_session_service(db_path))
+        self.assertNotEqual(await fresh.session_id_for("alice"), session_id)
+        self.assertEqual(fresh.stats()["sessions_resumed"], 0)
+
+    # Test 4: The room is resumed with its conversation
+    async def test_room_survives_restart(self):
+        """Check: after a restart (rooms lost from memory), a resumed session gets its room back; events carry no snapshot."""
+        import agent
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        db_path = os.path.join(tmp.name, "sessions.sqlite3")
+        model = RoomLlm(model="stub", args={"add_light_to_room": {"name": "Desk Lamp", "lumens": 800}})
+        room_agent = Agent(name="room_agent", model=model, instruction="Audit.",
+                           tools=[agent.add_light_to_room, agent.get_room_state])
+
+        async def call(pool, tool):
+            session_id = await pool.session_id_for("dana", resume=True)
+            results = []
+            async for event in pool.run_async("dana", session_id, user(tool)):
+                results += [r.response["result"] for r in event.get_function_responses()]
+            return session_id, results[0]
+
+        with mock.patch("sys.stdout"), mock.patch.object(agent, "room_snapshots", RoomSnapshotStore(db_path)):
+            pool = RunnerPool(room_agent, "room_test", session_service=make_session_service(db_path))
+            session_id, _ = await call(pool, "add_light_to_room")
+            self.assertTrue(agent.state_store.drop(f"dana:{session_id}"))  # the process restarts
+            agent.room_snapshots = RoomSnapshotStore(db_path)
+            resumed_id, summary = await call(RunnerPool(room_agent, "room_test",
+                                                        session_service=make_session_service(db_path)), "get_room_state")
+        self.assertEqual(resumed_id, session_id)
+        self.assertIn("Desk Lamp (800lm)", summary)
+        session = await pool.session_service.get_session(app_name="room_test", user_id="dana", session_id=session_id)
+        self.assertFalse(any(event.actions.state_delta for event in session.events))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+import sys
+import os
+import io
+from PIL import Image
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, os.path.join(parent_dir, 'my_agent'))
+
+from image_io import load_working_image, inspect_image, InvalidImageError, ImageTooLargeError
+
+def _encode(img: Image.Image, fmt: str, **kwargs) -> bytes:
+    buf = io.BytesIO()
+    img.save(buf, format=fmt, **kwargs)
+    return buf.getvalue()
+
+class TestImageIO(unittest.TestCase):
+
+    # Test 1: Large JPEG is decoded near the working size
+    def test_jpeg_downscaled(self):
+        """Check: a 12 MP JPEG comes back within the megapixel cap, same aspect ratio."""
+        data = _encode(Image.new("RGB", (4000, 3000), (90, 90, 90)), "JPEG")
+        img = load_working_image(data, max_megapixels=1.0)
+        self.assertLessEqual(img.width * img.height, 1_000_000)
+        self.assertAlmostEqual(img.width / img.height, 4 / 3, places=2)
+        self.assertEqual(img.mode, "RGB")
+
+    # Test 2: Non-JPEG path (reduce + resize)
+    def test_png_downscaled(self):
+        """Check: palette PNGs are converted and reduced too."""
+        data = _encode(Image.new("P", (3000, 1000)), "PNG")
+        img = load_working_image(data, max_megapixels=0.5)
+        self.assertLessEqual(img.width * img.height, 500_000)
+        self.assertEqual(img.mode, "RGB")
+
+    # Test 3: Small images untouched
+    def test_small_image_kept(self):
+        """Check: images under the cap keep their size."""
+        data = _encode(Image.new("RGB", (800, 600)), "PNG")
+        self.assertEqual(load_working_image(data, max_megapixels=2.0).size, (800, 600))
+
+    # Test 4: EXIF orientation
+    def test_exif_orientation_applied(self):
+        """Check: orientation 6 (rotate 90 CW) swaps width and height."""
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        data = _encode(Image.new("RGB", (1600, 1200)), "JPEG", exif=exif)
+        img = load_working_image(data, max_megapixels=0.5)
+        self.assertGreater(img.height, img.width)
+        self.assertEqual(img.info["source_size"], (1200, 1600))  # original size, oriented
+
+    # Test 5: Guards
+    def test_limits(self):
+        """Check: oversized uploads and non-images are rejected."""
+        data = _encode(Image.new("RGB", (400, 300)), "PNG")
+        with self.assertRaises(ImageTooLargeError):
+            inspect_image(data, max_bytes=100)
+        with self.assertRaises(ImageTooLargeError):
+            inspect_image(data, max_decode_megapixels=0.1)
+        with self.assertRaises(InvalidImageError):
+            inspect_image(b"not an image")
+
+    # Test 6: Pixel lamp positions on a downscaled photo
+    def test_pixel_positions_scaled(self):
+        """Check: lamp positions in original-photo pixels land at the same place on the downscaled working image."""
+        from unittest import mock
+        import physics_engine
+        data = _encode(Image.new("RGB", (4000, 3000), (60, 60, 60)), "JPEG")  # 12 MP, worked at <= 2 MP
+        with mock.patch.object(physics_engine, "_overlay_heatmap_field",
+                               wraps=physics_engine._overlay_heatmap_field) as field, mock.patch("sys.stdout"):
+            self.assertTrue(physics_engine.overlay_heatmap_on_image(data, lamp_positions=[(3000, 1500), (0.25, 0.5)]))
+        w, h, lamps = field.call_args.args
+        self.assertLessEqual(w * h, 2_000_000)
+        self.assertAlmostEqual(lamps[0][0] / w, 0.75, places=2)
+        self.assertAlmostEqual(lamps[0][1] / h, 0.5, places=2)
+        self.assertEqual(lamps[1], (0.25 * w, 0.5 * h))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+import sys
+import os
+import io
+import tempfile
+from unittest import mock
+from PIL import Image
+
+# Ensure project root is in path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.image_store import ImageStore
+from my_agent.image_io import load_working_image
+
+def _photo(color) -> bytes:
+    buf = io.BytesIO()
+    Image.new("RGB", (640, 480), color).save(buf, format="PNG")
+    return buf.getvalue()
+
+class TestImageStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    # Test 1: Upload once, decode once
+    def test_same_upload_decoded_once(self):
+        """Check: identical bytes map to the same content-hash id and are decoded once."""
+        store = ImageStore(directory=self.tmp.name)
+        first = store.put(_photo((10, 20, 30)))
+        second = store.put(_photo((10, 20, 30)))
+        self.assertEqual(first, second)
+        self.assertEqual(store.stats()["decodes"], 1)
+
+        image = store.get(first)
+        self.assertEqual(image.shape, (480, 640, 3))
+        self.assertEqual(tuple(image[0, 0]), (10, 20, 30))
+
+    # Test 2: Memory eviction falls back to disk
+    def test_disk_tier(self):
+        """Check: entries evicted from memory are served from the disk tier."""
+        store = ImageStore(memory_mb=1.0, directory=self.tmp.name)  # room for one 640x480 RGB array
+        a = store.put(_photo((255, 0, 0)))
+        store.put(_photo((0, 255, 0)))
+        self.assertEqual(store.stats()["memory_entries"], 1)
+
+        image = store.get(a)
+        self.assertEqual(tuple(image[0, 0]), (255, 0, 0))
+        self.assertEqual(store.stats()["disk_hits"], 1)
+
+    # Test 3: Disk tier survives a restart
+    def test_disk_persistence(self):
+        """Check: a new store instance finds photos written by a previous one."""
+        image_id = ImageStore(directory=self.tmp.name).put(_photo((1, 2, 3)))
+        restarted = ImageStore(directory=self.tmp.name)
+        self.assertIsNotNone(restarted.get(image_id))
+        self.assertIsNone(restarted.get("0" * 32))
+
+    # Test 4: The original size travels with the downscaled photo
+    def test_source_size_kept(self):
+        """Check: a photo decoded below its upload size reports the original size, also from disk after a restart."""
+        buf = io.BytesIO()
+        Image.new("RGB", (2400, 1800), (5, 5, 5)).save(buf, format="PNG")
+        with mock.patch("backend.image_store.load_working_image",
+                        lambda data: load_working_image(data, max_megapixels=1.0)):
+            image_id = ImageStore(directory=self.tmp.name).put(buf.getvalue())
+        restarted = ImageStore(directory=self.tmp.name)
+        image = restarted.get(image_id)
+        self.assertLessEqual(image.shape[0] * image.shape[1], 1_000_000)
+        self.assertEqual(restarted.source_size(image_id), (2400, 1800))
+        self.assertEqual(ImageStore(directory=self.tmp.name).source_size(image_id), (2400, 1800))
+        self.assertIsNone(restarted.source_size("0" * 32))
+
+if __name__ == '__main__':
+    unittest.main()
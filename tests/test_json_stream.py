@@ -0,0 +1,65 @@
+import unittest
+import sys
+import os
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, os.path.join(parent_dir, 'my_agent'))
+
+from json_stream import IncrementalJsonScanner
+from market_agent import validate_market_record
+
+class TestIncrementalJsonScanner(unittest.TestCase):
+
+    # Test 1: Object split across arbitrary chunks
+    def test_chunked_object(self):
+        """Check: braces and quotes inside strings do not confuse the scanner, at any chunk size."""
+        text = 'Here you go:\n```json\n{"name": "Lamp {A}", "note": "say \\"}\\" twice", "nested": {"x": [1, {"y": 2}]}}\n``` more {'
+        for size in (1, 3, 7, len(text)):
+            scanner = IncrementalJsonScanner()
+            result = None
+            for i in range(0, len(text), size):
+                result = scanner.feed(text[i:i + size])
+                if result is not None:
+                    break
+            self.assertEqual(result, {"name": "Lamp {A}", "note": 'say "}" twice', "nested": {"x": [1, {"y": 2}]}})
+            self.assertEqual(scanner.chars_seen, text.index("\n```", 20))
+
+    # Test 2: Schema validation skips non-matching objects
+    def test_schema_validation(self):
+        """Check: invalid or off-schema objects are skipped; the first valid one is coerced and returned."""
+        scanner = IncrementalJsonScanner(validate=validate_market_record)
+        stream = ['{"draft": true} {broken json} ', '{"type": "product", "name": "A19", "price_usd": "$6.99", ',
+                  '"watts": 9, "lumens": 800.0, "is_dimmable": "yes"}']
+        results = [scanner.feed(chunk) for chunk in stream]
+        self.assertEqual(results[:2], [None, None])
+        self.assertEqual(results[2], {"type": "product", "name": "A19", "price_usd": 6.99, "watts": 9.0,
+                                      "lumens": 800, "is_dimmable": True})
+        self.assertEqual(scanner.rejected, 2)
+
+        self.assertIsNone(validate_market_record({"type": "rate", "location": "Ohio"}))
+        self.assertIsNone(validate_market_record({"type": "product", "name": "A19", "price_usd": True, "watts": 9}))
+        self.assertEqual(validate_market_record({"rate_usd_kwh": 0.2})["type"], "rate")
+
+    # Test 3: Stray braces in prose
+    def test_unbalanced_brace_in_prose(self):
+        """Check: an unclosed or failed candidate does not hide the object after it, at any chunk size."""
+        record = '{"type": "product", "name": "A19", "price_usd": 5.99, "watts": 9, "lumens": 800}'
+        for prose in ("(see {note below): ", '(see {"note" below): ', "{\"a\": {x} ", "a {b} and {"):
+            text = prose + record + " done"
+            for size in (1, 5, len(text)):
+                scanner = IncrementalJsonScanner(validate=validate_market_record)
+                result = None
+                for i in range(0, len(text), size):
+                    result = scanner.feed(text[i:i + size])
+                    if result is not None:
+                        break
+                self.assertEqual(result["price_usd"], 5.99, prose)
+                self.assertEqual(scanner.chars_seen, len(prose) + len(record))
+
+        # A failed object restarts inside itself: the valid record nested in it is found
+        scanner = IncrementalJsonScanner(validate=validate_market_record)
+        self.assertEqual(scanner.feed('{"draft": ' + record + '}')["name"], "A19")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+import unittest
+import sys
+import os
+import numpy as np
+from unittest import mock
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, os.path.join(parent_dir, 'my_agent'))
+
+from lux_field import compute_illuminance_field, unit_lumen_field, UnitKernelCache
+from spatial_state import SpatialState
+from physics_engine import generate_optimization_report
+
+def original_heatmap_field(lumens, distance_meters, beam_angle_degrees):
+    """The heatmap field as generate_light_distribution_heatmap computed it before the kernel cache."""
+    x = np.linspace(-3, 3, 100)
+    y = np.linspace(-3, 3, 100)
+    X, Y = np.meshgrid(x, y)
+    R_floor = np.sqrt(X**2 + Y**2)
+    D_light = np.sqrt(R_floor**2 + distance_meters**2)
+    cos_theta = distance_meters / D_light
+    angle_of_point_rad = np.arccos(cos_theta)
+    beam_cutoff_rad = np.radians(beam_angle_degrees / 2)
+    solid_angle = 2 * np.pi * (1 - np.cos(beam_cutoff_rad))
+    I_avg = lumens / solid_angle
+    Illuminance = (I_avg / (D_light**2)) * cos_theta
+    start_fade = beam_cutoff_rad * 0.8
+    mask = np.clip((beam_cutoff_rad - angle_of_point_rad) / (beam_cutoff_rad - start_fade), 0, 1)
+    return Illuminance * mask
+
+class TestIlluminanceField(unittest.TestCase):
+
+    # Test 1: One lamp reproduces the single-lamp model
+    def test_single_lamp_matches_unit_field(self):
+        """Check: one luminaire equals the unit-lumen field scaled by its lumens."""
+        lamp = {"x": 2.0, "y": 1.5, "lumens": 1200, "height": 2.4, "beam_angle": 90}
+        result = compute_illuminance_field([lamp], 4.0, 3.0, resolution=0.1)
+
+        X, Y = np.meshgrid(result["x"] - 2.0, result["y"] - 1.5)
+        expected = unit_lumen_field(X, Y, 2.4, 90) * 1200
+        np.testing.assert_allclose(result["field"], expected, rtol=1e-12)
+
+    # Test 2: Chunking does not change the result
+    def test_chunked_equals_unchunked(self):
+        """Check: tiny blocks (many lamp chunks and row blocks) give the same field."""
+        rng = np.random.default_rng(0)
+        lamps = [
+            {"x": x, "y": y, "lumens": lm, "height": 2.7, "beam_angle": 110}
+            for x, y, lm in zip(rng.uniform(0, 8, 40), rng.uniform(0, 5, 40), rng.uniform(400, 2000, 40))
+        ]
+        full = compute_illuminance_field(lamps, 8.0, 5.0, resolution=0.1)
+        chunked = compute_illuminance_field(lamps, 8.0, 5.0, resolution=0.1, block_elements=500)
+        np.testing.assert_allclose(chunked["field"], full["field"], rtol=1e-12)
+        self.assertAlmostEqual(chunked["e_avg"], full["e_avg"])
+
+    # Test 3: Summary metrics
+    def test_metrics_and_grid_size(self):
+        """Check: grid covers the real room and Emin <= Eavg <= Emax."""
+        result = compute_illuminance_field([{"x": 1.0, "y": 1.0, "lumens": 800}], 6.0, 3.0, resolution=0.5)
+        self.assertEqual(result["field"].shape, (6, 12))
+        self.assertTrue(result["e_min"] <= result["e_avg"] <= result["e_max"])
+        self.assertAlmostEqual(result["uniformity"], result["e_min"] / result["e_avg"])
+
+    # Test 4: SpatialState exposes point-by-point illuminance
+    def test_spatial_state_field(self):
+        """Check: positioned sources feed the summary; unpositioned rooms and changed areas keep the old summary."""
+        room = SpatialState(wall_reflection=0.5)
+        room.set_dimensions(4.0, 5.0)
+        room.add_light_source("Desk Lamp", 800)
+        self.assertIsNone(room.calculate_illuminance_field())
+
+        room.add_light_source("Ceiling", 1500, x=2.0, y=2.5, height=2.6)
+        field = room.calculate_illuminance_field()
+        self.assertGreater(field["e_avg"], 0)
+        self.assertIn("Eavg", room.get_summary())
+
+        # A new area without a new floor plan drops the stale plan (and its field)
+        room.update_geometry(20.0)
+        self.assertIsNotNone(room.calculate_illuminance_field())
+        room.update_geometry(30.0)
+        self.assertEqual((room.width_m, room.depth_m), (None, None))
+        self.assertIsNone(room.calculate_illuminance_field())
+        self.assertNotIn("Eavg", room.get_summary())
+
+    # Test 5: Report uses measured illuminance when given
+    def test_report_with_measured_lux(self):
+        """Check: measured Eavg replaces the lumens/area estimate."""
+        import json
+        data = json.loads(generate_optimization_report(20, 500, 4000, measured_avg_lux=120.0, measured_min_lux=60.0))
+        self.assertEqual(data["analysis"]["current_lux_avg"], 120.0)
+        self.assertEqual(data["analysis"]["uniformity"], 0.5)
+        # 120 lux from 4000 lm over 20 m2 -> 60% utilization; (500-120)*20/0.6 lm missing
+        self.assertAlmostEqual(data["deficiency_lumens"], 12666.7, delta=0.1)
+
+class TestUnitKernelCache(unittest.TestCase):
+
+    # Test 1: Hits, misses and LRU bound
+    def test_counters_and_eviction(self):
+        """Check: repeated keys hit, new keys miss, size stays within maxsize."""
+        cache = UnitKernelCache(maxsize=2)
+        cache.get(2.0, 120)
+        cache.get(2.0, 120)
+        cache.get(2.5, 120)
+        cache.get(3.0, 120)
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["size"]), (1, 3, 2))
+
+    # Test 2: The cached-kernel heatmap reproduces the original inline computation
+    def test_scaled_kernel_matches_direct(self):
+        """Check: the field the heatmap plots equals the pre-cache meshgrid/sqrt/arccos/mask computation."""
+        import matplotlib
+        matplotlib.use("Agg")
+        from matplotlib.axes import Axes
+        from physics_engine import generate_light_distribution_heatmap
+
+        plotted = []
+        contourf = Axes.contourf
+
+        def recording_contourf(ax, X, Y, Z, *args, **kwargs):
+            plotted.append(np.array(Z))
+            return contourf(ax, X, Y, Z, *args, **kwargs)
+
+        for lumens, height, beam in ((1500, 2.2, 90), (800, 3.0, 120), (3000, 1.5, 36)):
+            with mock.patch.object(Axes, "contourf", recording_contourf), mock.patch("sys.stdout"):
+                generate_light_distribution_heatmap(lumens, height, beam)
+            np.testing.assert_allclose(plotted[-1], original_heatmap_field(lumens, height, beam), rtol=1e-12, atol=1e-12)
+
+        _, _, unit = UnitKernelCache().get(2.2, 90, half_extent=3.0, points=50)
+        self.assertFalse(unit.flags.writeable)
+
+    # Test 3: Shared across threads
+    def test_concurrent_access(self):
+        """Check: concurrent readers all get identical kernels and counters add up."""
+        from concurrent.futures import ThreadPoolExecutor
+        cache = UnitKernelCache()
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda _: cache.get(2.0, 60)[2], range(64)))
+        for unit in results[1:]:
+            np.testing.assert_array_equal(unit, results[0])
+        stats = cache.stats()
+        self.assertEqual(stats["hits"] + stats["misses"], 64)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,215 @@
+import unittest
+import sys
+import os
+import json
+import time
+import asyncio
+import threading
+from unittest import mock
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, os.path.join(parent_dir, 'my_agent'))
+
+from google.adk.agents import Agent
+from google.adk.models import BaseLlm, LlmResponse
+from google.genai import types
+
+import market_agent
+from market_agent import search_product_data, search_product_data_async, FALLBACK_DEFAULTS
+from market_cache import MarketCache
+
+class StubMarketLlm(BaseLlm):
+    """Offline market model: answers after `delay` seconds, or fails for queries containing 'broken'."""
+    delay: float = 0.0
+    threads: list = []
+
+    async def generate_content_async(self, llm_request, stream=False):
+        self.threads.append(threading.current_thread().name)
+        query = llm_request.contents[-1].parts[0].text
+        await asyncio.sleep(self.delay)
+        if "broken" in query:
+            raise RuntimeError("search backend down")
+        answer = {"type": "rate", "location": "New York", "rate_usd_kwh": 0.25, "source": "stub"}
+        yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text=json.dumps(answer))]))
+
+class StreamingMarketLlm(BaseLlm):
+    """Offline model that streams a rate object, then keeps writing prose for a while."""
+    chunks_sent: int = 0
+
+    async def generate_content_async(self, llm_request, stream=False):
+        chunks = ["Sure! ```json\n{", '"type": "rate", "location": "Ohio {north}", ', '"rate_usd_kwh": "0.16"}\n```']
+        chunks += [f" Note {i}: rates vary by season and provider." for i in range(10)]
+        for chunk in chunks:
+            await asyncio.sleep(0.05)
+            self.chunks_sent += 1
+            yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text=chunk)]), partial=True)
+        yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text="".join(chunks))]))
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def stub_market_agent(delay: float = 0.0) -> Agent:
+    return Agent(name="market_agent", model=StubMarketLlm(model="stub", delay=delay, threads=[]),
+                 instruction="Return JSON.")
+
+class TestMarketSearch(unittest.TestCase):
+
+    def setUp(self):
+        market_agent._market_pools.clear()
+        self.clock = FakeClock()
+        cache = MarketCache(db_path=None, rate_ttl_s=100, product_ttl_s=10, clock=self.clock)
+        patcher = mock.patch.object(market_agent, "market_cache", cache)
+        self.cache = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    # Test 1: Async path overlaps on the caller's loop with persistent runners
+    def test_async_search_overlaps(self):
+        """Check: concurrent async searches share one pool, overlap, and leave no sessions behind."""
+        agent = stub_market_agent(delay=0.3)
+        with mock.patch.object(market_agent, "market_agent_core", agent):
+            async def run():
+                start = time.perf_counter()
+                cities = ["Boston", "Denver", "Austin", "Seattle", "Miami"]
+                results = await asyncio.gather(*(search_product_data_async(f"Electricity rate in {city}")
+                                                 for city in cities))
+                elapsed = time.perf_counter() - start
+                pool = market_agent._market_runners()
+                left = await pool.session_service.list_sessions(app_name=market_agent.APP_NAME,
+                                                                user_id=market_agent.USER_ID)
+                return results, elapsed, pool, left.sessions
+
+            results, elapsed, pool, leftover_sessions = asyncio.run(run())
+
+        self.assertTrue(all(r["rate_usd_kwh"] == 0.25 for r in results))
+        self.assertLess(elapsed, 1.0)  # 5 x 0.3 s would be 1.5 s if serialized
+        self.assertEqual(pool.stats()["runs"], 5)
+        self.assertEqual(leftover_sessions, [])
+
+    # Test 2: Sync wrapper and fallback
+    def test_sync_wrapper_and_fallback(self):
+        """Check: sync callers share one background loop; failures return a copy of the fallback."""
+        agent = stub_market_agent()
+        with mock.patch.object(market_agent, "market_agent_core", agent):
+            first = search_product_data("Electricity rate in New York")
+            second = search_product_data("Electricity rate in Boston")
+            with mock.patch("sys.stdout"):
+                fallback = search_product_data("broken electricity rate")
+
+        self.assertEqual(first["location"], "New York")
+        self.assertEqual(second["type"], "rate")
+        self.assertEqual(fallback, FALLBACK_DEFAULTS["rate"])
+        self.assertIsNot(fallback, FALLBACK_DEFAULTS["rate"])
+        self.assertEqual(set(agent.model.threads), {"market-search-loop"})
+
+    # Test 3: Cached and stale-while-revalidate lookups
+    def test_cache_stale_while_revalidate(self):
+        """Check: equivalent queries hit the cache; stale entries are served while a refresh runs."""
+        agent = stub_market_agent(delay=0.05)
+        with mock.patch.object(market_agent, "market_agent_core", agent):
+            async def run():
+                await search_product_data_async("Electricity rate in New York")
+                await search_product_data_async("NYC power cost per kWh?")
+                calls_after_hit = len(agent.model.threads)
+
+                self.clock.now += 150  # past the 100 s rate TTL, inside the stale window
+                start = time.perf_counter()
+                stale = await search_product_data_async("electricity rate in new york")
+                stale_ms = (time.perf_counter() - start) * 1000
+                await asyncio.gather(*market_agent._inflight._tasks)
+                return calls_after_hit, stale, stale_ms
+
+            calls_after_hit, stale, stale_ms = asyncio.run(run())
+
+        self.assertEqual(calls_after_hit, 1)
+        self.assertEqual(stale["location"], "New York")
+        self.assertLess(stale_ms, 40)  # served without waiting for the 50 ms search
+        self.assertEqual(len(agent.model.threads), 2)  # the background refresh
+        self.assertEqual(self.cache.get("rate:new york")[1], "fresh")
+        stats = self.cache.stats()
+        self.assertEqual((stats["stale_hits"], stats["writes"]), (1, 2))
+        self.assertGreater(stats["saved_latency_s"], 0)
+
+    # Test 4: Single-flight coalescing
+    def test_concurrent_identical_queries_coalesce(self):
+        """Check: N concurrent identical queries (async and sync callers) cause exactly one upstream call."""
+        agent = stub_market_agent(delay=0.2)
+        with mock.patch.object(market_agent, "market_agent_core", agent):
+            async def run():
+                queries = ["Electricity rate in New York", "NYC electricity cost per kWh", "electricity rate in new york?"]
+                return await asyncio.gather(*(search_product_data_async(queries[i % 3]) for i in range(20)))
+
+            results = asyncio.run(run())
+            self.assertEqual(len(agent.model.threads), 1)
+            self.assertTrue(all(r == results[0] for r in results))
+            self.assertEqual(len({id(r) for r in results}), 20)  # each caller gets its own copy
+
+            # Sync callers from many threads coalesce on the background loop; failures share the fallback
+            outcomes = []
+            def call():
+                outcomes.append(search_product_data("broken electricity rate in Ohio"))
+            with mock.patch("sys.stdout"):
+                threads = [threading.Thread(target=call) for _ in range(8)]
+                for t in threads:
+                    t.start()
+                for t in threads:
+                    t.join()
+
+        self.assertEqual(len(agent.model.threads), 2)
+        self.assertEqual(outcomes, [FALLBACK_DEFAULTS["rate"]] * 8)
+        self.assertEqual(market_agent._inflight.stats()["in_flight"], 0)
+
+    # Test 5: Deadline budget
+    def test_deadline_returns_fallback_and_fills_cache(self):
+        """Check: past the deadline callers get last known/fallback values at once; the search still fills the cache."""
+        agent = stub_market_agent(delay=0.4)
+        with mock.patch.object(market_agent, "market_agent_core", agent), mock.patch("sys.stdout"):
+            async def run():
+                start = time.perf_counter()
+                quick = await search_product_data_async("Electricity rate in New York", deadline_s=0.05)
+                waited = time.perf_counter() - start
+                await asyncio.gather(*market_agent._inflight._tasks)
+                filled = await search_product_data_async("Electricity rate in New York", deadline_s=0.05)
+
+                # A fully expired entry is still better than the generic fallback
+                self.cache.put("rate:boston", "rate", {"type": "rate", "location": "Boston", "rate_usd_kwh": 0.31})
+                self.clock.now += 10_000
+                last_known = await search_product_data_async("Electricity rate in Boston", deadline_s=0.05)
+                await asyncio.gather(*market_agent._inflight._tasks)
+                return quick, waited, filled, last_known
+
+            timeouts_before = market_agent.market_search_stats()["timeouts"]
+            quick, waited, filled, last_known = asyncio.run(run())
+
+        self.assertEqual(quick, FALLBACK_DEFAULTS["rate"])
+        self.assertLess(waited, 0.3)
+        self.assertEqual(filled["location"], "New York")
+        self.assertEqual(last_known["location"], "Boston")
+        stats = market_agent.market_search_stats()
+        self.assertEqual(stats["timeouts"] - timeouts_before, 2)
+        self.assertIn("p99_ms", stats["upstream_latency"])
+        self.assertIn("p50_ms", stats["call_latency"])
+
+    # Test 6: Early stop on the first valid JSON object
+    def test_stream_stops_after_json(self):
+        """Check: the streamed answer is closed once a schema-valid object is complete; values are coerced."""
+        model = StreamingMarketLlm(model="stub")
+        agent = Agent(name="market_agent", model=model, instruction="Return JSON.")
+        with mock.patch.object(market_agent, "market_agent_core", agent):
+            async def run():
+                start = time.perf_counter()
+                data = await search_product_data_async("Electricity rate in Ohio")
+                return data, time.perf_counter() - start
+
+            data, elapsed = asyncio.run(run())
+
+        self.assertEqual(data, {"type": "rate", "location": "Ohio {north}", "rate_usd_kwh": 0.16})
+        self.assertEqual(model.chunks_sent, 3)
+        self.assertLess(elapsed, 0.4)  # the full answer takes 0.65 s
+
+if __name__ == '__main__':
+    unittest.main()
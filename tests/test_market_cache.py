@@ -0,0 +1,65 @@
+import unittest
+import sys
+import os
+import tempfile
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, os.path.join(parent_dir, 'my_agent'))
+
+from market_cache import MarketCache, normalize_query, FRESH, STALE
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+class TestMarketCache(unittest.TestCase):
+
+    # Test 1: Query normalization
+    def test_normalize_query(self):
+        """Check: phrasing, case, synonyms and units collapse to one key; locations key rates."""
+        self.assertEqual(normalize_query("Electricity rate in New York"), ("rate", "rate:new york"))
+        self.assertEqual(normalize_query("What is the average electricity price per kWh in NYC?"), ("rate", "rate:new york"))
+        self.assertEqual(normalize_query("residential power tariff kwh California 2025"), ("rate", "rate:california"))
+        self.assertEqual(normalize_query("Price of Philips LED bulb 1500 lumens")[1],
+                         normalize_query("philips   led lamp 1500lm")[1])
+        self.assertNotEqual(normalize_query("Philips LED 1500lm")[1], normalize_query("Philips LED 1600lm")[1])
+        self.assertEqual(normalize_query("Price of dimmable Philips Hue A19 bulb")[0], "product")
+        self.assertEqual(normalize_query("How much does a dimmable 800 lumen Philips bulb cost in New York")[0], "product")
+
+    # Test 2: TTL per kind and the stale window
+    def test_ttl_and_stale(self):
+        """Check: rates outlive products; entries go fresh -> stale -> miss."""
+        clock = FakeClock()
+        cache = MarketCache(db_path=None, rate_ttl_s=100, product_ttl_s=10, stale_factor=1.0, clock=clock)
+        cache.put("rate:boston", "rate", {"rate_usd_kwh": 0.3}, latency_s=4.0)
+        cache.put("product:a19 bulb", "product", {"price_usd": 6.0}, latency_s=2.0)
+
+        clock.now += 15
+        self.assertEqual(cache.get("rate:boston"), ({"rate_usd_kwh": 0.3}, FRESH))
+        self.assertEqual(cache.get("product:a19 bulb"), ({"price_usd": 6.0}, STALE))
+        clock.now += 10
+        self.assertEqual(cache.get("product:a19 bulb"), (None, None))
+
+        stats = cache.stats()
+        self.assertEqual((stats["memory_hits"], stats["stale_hits"], stats["misses"]), (2, 1, 1))
+        self.assertAlmostEqual(stats["saved_latency_s"], 6.0)
+        self.assertAlmostEqual(stats["hit_rate"], 0.667)
+
+    # Test 3: SQLite tier survives restarts
+    def test_sqlite_tier(self):
+        """Check: a new cache instance (e.g. after a restart) serves entries from SQLite."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "market.sqlite3")
+            MarketCache(db_path=path).put("rate:texas", "rate", {"rate_usd_kwh": 0.15})
+            reopened = MarketCache(db_path=path, memory_entries=1)
+            self.assertEqual(reopened.get("rate:texas"), ({"rate_usd_kwh": 0.15}, FRESH))
+            self.assertEqual(reopened.stats()["disk_hits"], 1)
+            self.assertEqual(reopened.purge_expired(), 0)
+            reopened._db.close()
+
+if __name__ == '__main__':
+    unittest.main()
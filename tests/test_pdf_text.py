@@ -0,0 +1,110 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+
+import pypdf
+from fpdf import FPDF
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, os.path.join(parent_dir, 'my_agent'))
+
+from pdf_text import PdfTextExtractor, file_digest
+
+def write_catalog(path: str, pages: int, tag: str = "A"):
+    """A lighting catalog with one short product list per page."""
+    pdf = FPDF()
+    pdf.set_font("helvetica", size=10)
+    for p in range(1, pages + 1):
+        pdf.add_page()
+        for r in range(5):
+            pdf.cell(0, 8, f"{tag}-SKU-{p}-{r} Luminous Flux: {800 + r * 100} lumens, Power: {9 + r} Watts",
+                     new_x="LMARGIN", new_y="NEXT")
+    pdf.output(path)
+
+class TestPdfText(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = tmp.name
+        self.path = os.path.join(self.dir, "catalog.pdf")
+        write_catalog(self.path, 12)
+        self.extractor = PdfTextExtractor()
+
+    # Test 1: Same text as a direct pypdf read, page ranges clamp
+    def test_extract_matches_pypdf(self):
+        """Check: extracted blocks equal pypdf's page text; ranges clamp; a start past the end raises."""
+        reader = pypdf.PdfReader(self.path)
+        expected = "".join(f"[Page {i + 1}]\n{page.extract_text()}\n" for i, page in enumerate(reader.pages))
+        result = self.extractor.extract_text(self.path)
+        self.assertEqual(result["text"], expected)
+        self.assertEqual((result["page_count"], result["last_page"], result["next_page"]), (12, 12, None))
+
+        result = self.extractor.extract_text(self.path, first_page=11, last_page=40)
+        self.assertTrue(result["text"].startswith("[Page 11]\nA-SKU-11-0"))
+        self.assertEqual((result["first_page"], result["last_page"]), (11, 12))
+        with self.assertRaises(ValueError):
+            self.extractor.extract_text(self.path, first_page=13)
+
+    # Test 2: A char budget stops extraction early
+    def test_max_chars_streams(self):
+        """Check: max_chars stops at a page boundary, later pages are never parsed, next_page continues."""
+        page_len = len(self.extractor.extract_text(self.path, 1, 1)["text"])
+        extractor = PdfTextExtractor()
+        result = extractor.extract_text(self.path, max_chars=page_len * 3 + 10)
+        self.assertEqual((result["last_page"], result["next_page"]), (3, 4))
+        self.assertEqual(extractor.stats()["pages_extracted"], 4)  # the 4th was read to find it does not fit
+
+        rest = extractor.extract_text(self.path, first_page=result["next_page"])
+        self.assertTrue(rest["text"].startswith("[Page 4]"))
+        self.assertEqual(extractor.stats()["pages_extracted"], 12)
+
+        cut = extractor.extract_text(self.path, max_chars=20)
+        self.assertEqual((cut["last_page"], cut["next_page"]), (1, 2))
+        self.assertTrue(cut["text"].endswith("…[page truncated]\n"))
+
+    # Test 3: Cache keyed by content hash
+    def test_content_hash_cache(self):
+        """Check: a copy under another name is served from cache; a rewritten file is parsed again."""
+        first = self.extractor.extract_text(self.path)["text"]
+        copy = os.path.join(self.dir, "copy.pdf")
+        shutil.copy(self.path, copy)
+        self.assertEqual(file_digest(copy), file_digest(self.path))
+        self.assertEqual(self.extractor.extract_text(copy)["text"], first)
+        stats = self.extractor.stats()
+        self.assertEqual((stats["pages_extracted"], stats["page_cache_hits"]), (12, 12))
+
+        write_catalog(self.path, 2, tag="B")
+        result = self.extractor.extract_text(self.path)
+        self.assertEqual(result["page_count"], 2)
+        self.assertIn("B-SKU-2-4", result["text"])
+
+    # Test 4: Process-pool batches
+    def test_parallel_batches(self):
+        """Check: warm_up starts the workers; their page batches come back complete and in page order."""
+        extractor = PdfTextExtractor(workers=2, parallel_min_pages=4, batch_pages=3)
+        try:
+            self.assertEqual(extractor.warm_up(), 2)
+            result = extractor.extract_text(self.path)
+            self.assertEqual(result["text"], self.extractor.extract_text(self.path)["text"])
+            self.assertEqual(extractor.stats()["parallel_batches"], 3)  # pages 1-3 inline, 4-12 in the pool
+        finally:
+            if extractor._pool is not None:
+                extractor._pool.shutdown()
+
+    # Test 5: Agent tool output
+    def test_read_pdf_file_tool(self):
+        """Check: read_pdf_file reports the page window and where to continue."""
+        import agent
+        page_len = len(self.extractor.extract_text(self.path, 1, 1)["text"])
+        text = agent.read_pdf_file(self.path, first_page=2, max_chars=page_len * 2 + 10)
+        self.assertIn("(pages 2-3 of 12)", text)
+        self.assertTrue(text.endswith("Call again with first_page=4 to continue.]\n"))
+        self.assertIn("not found", agent.read_pdf_file(os.path.join(self.dir, "missing.pdf")))
+        self.assertIn("Error reading PDF", agent.read_pdf_file(self.path, first_page=99))
+
+if __name__ == '__main__':
+    unittest.main()
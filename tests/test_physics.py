@@ -7,7 +7,7 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 parent_dir = os.path.dirname(current_dir)
 sys.path.insert(0, os.path.join(parent_dir, 'my_agent'))
 
-from physics_engine import calculate_lux_at_point, generate_optimization_report, calculate_roi_and_savings
+from physics_engine import calculate_lux_at_point, calculate_lux_batch, calculate_lux_records, generate_optimization_report, calculate_roi_and_savings, generate_light_distribution_heatmap, FAST_HEATMAP_SIZE, _overlay_heatmap_field, _lamp_field_fft, _lamp_field_direct
 
 class TestSpatialPhysics(unittest.TestCase):
     
@@ -52,5 +52,68 @@ class TestSpatialPhysics(unittest.TestCase):
         # For 20m2 and 500 lux, 10000 lumens are needed. There are 800. Deficit should be > 0
         self.assertTrue(data["deficiency_lumens"] > 0)
 
+    # Test 5: Batch API matches scalar API
+    def test_lux_batch_matches_scalar(self):
+        """Check: batch results rounded to 2 decimals equal the scalar results."""
+        lumens = [800, 1500, 450, 3000, 800]
+        distances = [1.0, 2.5, 0.7, 3.2, 0]
+        angles = [120, 90, 36, 60, 120]
+
+        batch = calculate_lux_batch(lumens, distances, angles)
+        for i, (lm, d, a) in enumerate(zip(lumens, distances, angles)):
+            self.assertEqual(round(float(batch[i]), 2), float(calculate_lux_at_point(lm, d, a)))
+
+    # Test 6: Record-based batch input
+    def test_lux_records_default_angle(self):
+        """Check: records without 'angle' use the 120 degree default."""
+        records = [{"lumens": 800, "distance": 1.0}, {"lumens": 800, "distance": 2.0, "angle": 120}]
+        lux = calculate_lux_records(records)
+        self.assertEqual(lux.shape, (2,))
+        self.assertAlmostEqual(lux[0] / lux[1], 4.0)
+
+    # Test 7: Fast heatmap render mode
+    def test_fast_heatmap_png(self):
+        """Check: fast mode returns a palette PNG of the configured size."""
+        import base64
+        import io
+        from PIL import Image
+        img = Image.open(io.BytesIO(base64.b64decode(generate_light_distribution_heatmap(800, 2.5, 120, render_mode="fast"))))
+        self.assertEqual(img.format, "PNG")
+        self.assertEqual(img.size, (FAST_HEATMAP_SIZE, FAST_HEATMAP_SIZE))
+        self.assertEqual(img.mode, "P")
+
+    # Test 8: Unknown render mode
+    def test_heatmap_unknown_mode(self):
+        """Check: unsupported render modes are rejected."""
+        with self.assertRaises(ValueError):
+            generate_light_distribution_heatmap(800, 2.5, 120, render_mode="svg")
+
+    # Test 9: Separable overlay field
+    def test_overlay_field_separable(self):
+        """Check: small photos match the dense Gaussian; large ones stay at the capped grid."""
+        import numpy as np
+        w, h = 320, 240
+        y_idx, x_idx = np.mgrid[0:h, 0:w]
+        dense = np.exp(-((x_idx - w // 2)**2 + (y_idx - h // 2)**2) / (2 * (min(w, h) / 3)**2))
+        field = _overlay_heatmap_field(w, h)
+        self.assertEqual(field.dtype, np.float32)
+        np.testing.assert_allclose(field, dense, rtol=1e-5, atol=1e-6)
+
+        big = _overlay_heatmap_field(4000, 3000, work_side=512)
+        self.assertEqual(big.shape, (384, 512))
+
+    # Test 10: Multi-lamp overlay field
+    def test_overlay_field_lamps(self):
+        """Check: the FFT lamp field matches direct summation and peaks at 1.0."""
+        import numpy as np
+        w, h = 4000, 3000
+        lamps = [(500.0, 400.0), (2000.0, 1500.0), (3500.0, 2600.0), (1000.0, 2800.0)]
+        np.testing.assert_allclose(_lamp_field_fft(w, h, lamps), _lamp_field_direct(w, h, lamps), atol=1e-3)
+
+        many = [(x, y) for x in np.linspace(100, 3900, 10) for y in np.linspace(100, 2900, 10)]
+        field = _overlay_heatmap_field(w, h, many)
+        self.assertEqual(field.shape, (384, 512))
+        self.assertAlmostEqual(float(field.max()), 1.0, places=5)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
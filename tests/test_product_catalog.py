@@ -0,0 +1,128 @@
+import unittest
+import sys
+import os
+import io
+import json
+import time
+import asyncio
+from unittest import mock
+
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, os.path.join(parent_dir, 'my_agent'))
+
+from product_catalog import ProductCatalog, ProductFeedError, parse_product_query, PRODUCT_CATALOG_PATH
+
+def synthetic_products(n: int, seed: int = 7):
+    rng = np.random.default_rng(seed)
+    protocols = ["None", "Zigbee", "WiFi", "Bluetooth", "Matter"]
+    lumens = rng.integers(200, 3000, n)
+    for i in range(n):
+        yield {"sku": f"SKU-{i}", "name": f"Brand{i % 50} Model{i} A19", "brand": f"Brand{i % 50}",
+               "price_usd": float(rng.uniform(2, 60)), "lumens": float(lumens[i]), "watts": float(lumens[i] / 90),
+               "is_dimmable": bool(i % 3), "protocol": protocols[i % 5], "link": ""}
+
+class TestProductCatalog(unittest.TestCase):
+
+    def setUp(self):
+        self.catalog = ProductCatalog()
+        with mock.patch("sys.stdout"):
+            self.catalog.load(PRODUCT_CATALOG_PATH)
+
+    # Test 1: Query parsing
+    def test_parse_product_query(self):
+        """Check: specs, budgets, dimmability and protocols become filters; other words are terms."""
+        filters = parse_product_query("dimmable 1500 lm Zigbee bulb under $10")
+        self.assertEqual(filters["price_usd"], (None, 10.0))
+        self.assertEqual(filters["near_lumens"], 1500.0)
+        self.assertAlmostEqual(filters["lumens"][0], 1275.0)
+        self.assertEqual((filters["is_dimmable"], filters["protocol"], filters["terms"]), (True, "Zigbee", []))
+
+        filters = parse_product_query("Non-dimmable Wi-Fi 60W equivalent, $5-$8, at least 9 watts")
+        self.assertEqual((filters["is_dimmable"], filters["protocol"]), (False, "WiFi"))
+        self.assertEqual(filters["near_lumens"], 800.0)
+        self.assertEqual((filters["price_usd"], filters["watts"]), ((5.0, 8.0), (9.0, None)))
+        self.assertEqual(parse_product_query("Price of Philips Hue A19 bulb")["terms"], ["philips", "hue", "a19"])
+
+    # Test 2: Structured lookups against the sample catalog
+    def test_lookup(self):
+        """Check: filters, keywords and ranking pick the expected SKU; unknown words and misses return None."""
+        best = self.catalog.lookup("dimmable 1500 lm Zigbee bulb under $10")
+        self.assertEqual(best["sku"], "IN-A21-W-1521")  # closest to 1500 lm, then cheapest
+        self.assertEqual(best["source"], "Local product catalog")
+        self.assertEqual(self.catalog.lookup("Price of dimmable Philips Hue A19 bulb")["sku"], "PH-HUE-A19-W-800")
+        self.assertEqual(self.catalog.lookup("cheapest non-dimmable 60W equivalent")["price_usd"], 2.49)
+
+        self.assertIsNone(self.catalog.lookup("Philips LED bulb 2700K"))  # CCT is not indexed
+        self.assertIsNone(self.catalog.lookup("led bulb"))  # nothing to filter on
+        self.assertIsNone(self.catalog.lookup("1100+ lumens Matter bulb"))  # no such product
+        stats = self.catalog.stats()
+        self.assertEqual((stats["hits"], stats["unanswerable"], stats["no_match"]), (3, 2, 1))
+
+    # Test 3: Index results equal a brute-force scan
+    def test_find_matches_scan(self):
+        """Check: sorted/bitmap/keyword index results equal a full scan over 20k SKUs."""
+        catalog = ProductCatalog()
+        rows = list(synthetic_products(20_000))
+        catalog.add_products(rows)
+        found = catalog.find(lumens=(1000, 1400), price_usd=(None, 20), is_dimmable=True, protocol="zigbee", limit=10_000)
+        expected = sorted((r for r in rows if 1000 <= r["lumens"] <= 1400 and r["price_usd"] <= 20
+                           and r["is_dimmable"] and r["protocol"] == "Zigbee"), key=lambda r: r["price_usd"])
+        self.assertEqual([p["sku"] for p in found], [r["sku"] for r in expected])
+
+        found = catalog.find(keywords=["brand7"], watts=(10, None), limit=10_000)
+        expected = [r for r in rows if r["brand"] == "Brand7" and r["watts"] >= 10]
+        self.assertEqual(sorted(p["sku"] for p in found), sorted(r["sku"] for r in expected))
+
+    # Test 4: Sub-millisecond lookups over 100k SKUs
+    def test_lookup_latency(self):
+        """Check: structured lookups over 100k SKUs take well under a millisecond."""
+        catalog = ProductCatalog()
+        catalog.add_products(synthetic_products(100_000))
+        catalog.warm_up()
+        queries = ["dimmable 1500 lm Zigbee bulb under $10", "wifi bulb under $15", "Brand3 800 lumens"]
+        for q in queries:
+            self.assertIsNotNone(catalog.lookup(q))
+        start = time.perf_counter()
+        for _ in range(100):
+            for q in queries:
+                catalog.lookup(q)
+        per_lookup_ms = (time.perf_counter() - start) * 1000 / 300
+        self.assertLess(per_lookup_ms, 1.0)
+
+    # Test 5: Bulk JSON feed loading
+    def test_load_json_feed(self):
+        """Check: JSON Lines feeds load with aliases and coercion; malformed rows raise ProductFeedError."""
+        feed = io.StringIO("\n".join(json.dumps(r) for r in [
+            {"title": "Test Bulb", "price": "$3.50", "wattage": 9, "lm": 800, "dimmable": "yes", "connectivity": "Wi-Fi"},
+            {"title": "No Lumens Bulb", "price": 2, "wattage": 5},
+        ]))
+        catalog = ProductCatalog()
+        with mock.patch("sys.stdout"):
+            self.assertEqual(catalog.load(feed, fmt="json"), 2)
+        product = catalog.find(protocol="WiFi")[0]
+        self.assertEqual((product["price_usd"], product["is_dimmable"], product["lumens"]), (3.5, True, 800))
+        self.assertNotIn("lumens", catalog.find(price_usd=(None, 2))[0])
+
+        with self.assertRaises(ProductFeedError):
+            ProductCatalog().load(io.StringIO('[{"title": "Bad", "price": "cheap", "wattage": 9}]'), fmt="json")
+
+    # Test 6: Market tool uses the catalog first
+    def test_market_tool_catalog_first(self):
+        """Check: the market tool answers catalog hits locally (even when they mention cost) and goes remote only on a miss."""
+        import agent
+        remote = mock.AsyncMock(return_value={"type": "product", "name": "Remote Bulb", "price_usd": 1.0, "watts": 5.0})
+        with mock.patch.object(agent, "product_catalog", self.catalog), \
+             mock.patch.object(agent, "search_product_data_async", remote), mock.patch("sys.stdout"):
+            hit = json.loads(asyncio.run(agent.search_market_tool("dimmable 1500 lm Zigbee bulb under $10")))
+            miss = json.loads(asyncio.run(agent.search_market_tool("Philips LED bulb 2700K")))
+            priced = json.loads(asyncio.run(agent.search_market_tool("dimmable 800 lm bulb cost")))
+        self.assertEqual(hit["sku"], "IN-A21-W-1521")
+        self.assertTrue(priced["is_dimmable"])  # "cost" used to route it past the catalog
+        self.assertEqual(miss["name"], "Remote Bulb")
+        remote.assert_awaited_once_with("Philips LED bulb 2700K")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+import sys
+import os
+import time
+import base64
+
+# Ensure project root is in path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.render_service import RenderService, RenderQueueFullError, RenderTimeoutError
+from my_agent.physics_engine import generate_consumption_chart
+
+class TestRenderService(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.service = RenderService(workers=2, max_queue=2, timeout_s=30, max_jobs_per_worker=1)
+        cls.service.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.service.shutdown()
+
+    # Test 1: Charts render in the worker processes
+    def test_chart_renders_in_pool(self):
+        """Check: a chart generator returns a PNG when run through the pool."""
+        img_b64 = self.service.render(generate_consumption_chart, 60, 9, 5.0)
+        self.assertTrue(base64.b64decode(img_b64).startswith(b"\x89PNG"))
+
+    # Test 2: Bounded queue depth
+    def test_queue_full_rejects(self):
+        """Check: submitting beyond max_queue fails fast instead of queueing."""
+        futures = [self.service.submit(time.sleep, 0.5) for _ in range(2)]
+        with self.assertRaises(RenderQueueFullError):
+            self.service.submit(time.sleep, 0.5)
+        for f in futures:
+            f.result()
+
+    # Test 3: Per-job timeout
+    def test_timeout(self):
+        """Check: a slow job raises RenderTimeoutError after the job timeout."""
+        with self.assertRaises(RenderTimeoutError):
+            self.service.render(time.sleep, 1.0, timeout_s=0.05)
+        time.sleep(1.0)  # let the job finish so its queue slot is released
+
+    # Test 4: Worker recycling
+    def test_workers_recycled(self):
+        """Check: with max_jobs_per_worker=1 every job runs in a fresh process."""
+        pids = {self.service.render(os.getpid) for _ in range(3)}
+        self.assertEqual(len(pids), 3)
+
+    # Test 5: Inline mode
+    def test_inline_mode(self):
+        """Check: workers=0 runs jobs on the caller's process."""
+        inline = RenderService(workers=0)
+        self.assertEqual(inline.render(os.getpid), os.getpid())
+
+if __name__ == '__main__':
+    unittest.main()
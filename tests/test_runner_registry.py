@@ -0,0 +1,97 @@
+import unittest
+import sys
+import os
+import asyncio
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, os.path.join(parent_dir, 'my_agent'))
+
+from google.adk.agents import Agent
+from google.adk.models import BaseLlm, LlmResponse
+from google.adk.models.registry import LLMRegistry
+from google.genai import types
+
+from runner_registry import RunnerPool, RunnerRegistry
+
+class EchoLlm(BaseLlm):
+    """Offline model: replies with how many user turns it has seen."""
+
+    @classmethod
+    def supported_models(cls):
+        return [r"echo-test-.*"]
+
+    async def generate_content_async(self, llm_request, stream=False):
+        turns = sum(1 for c in llm_request.contents if c.role == "user")
+        yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text=f"turns={turns}")]))
+
+LLMRegistry.register(EchoLlm)
+
+def make_agent():
+    return Agent(name="echo_agent", model="echo-test-model", instruction="Reply.")
+
+async def reply(pool: RunnerPool, user_id: str, text: str, session_id: str = None):
+    session_id = await pool.session_id_for(user_id, session_id)
+    texts = []
+    async for event in pool.run_async(user_id, session_id, types.Content(role="user", parts=[types.Part(text=text)])):
+        if event.content and event.content.parts and event.content.parts[0].text:
+            texts.append(event.content.parts[0].text)
+    return session_id, texts[-1]
+
+class TestRunnerPool(unittest.IsolatedAsyncioTestCase):
+
+    # Test 1: Per-user sessions carry the conversation
+    async def test_sessions_reused_per_user(self):
+        """Check: each user gets a generated session id that is reused across calls."""
+        pool = RunnerPool(make_agent(), "test_app", size=2)
+        sid_a1, first = await reply(pool, "alice", "hello")
+        sid_a2, second = await reply(pool, "alice", "again")
+        sid_b, other = await reply(pool, "bob", "hi")
+
+        self.assertEqual(sid_a1, sid_a2)
+        self.assertNotEqual(sid_a1, sid_b)
+        self.assertEqual((first, second, other), ("turns=1", "turns=2", "turns=1"))
+        self.assertEqual(pool.stats()["sessions_created"], 2)
+
+        fresh = await pool.new_session("alice")
+        self.assertNotEqual(fresh, sid_a1)
+        self.assertEqual((await reply(pool, "alice", "new topic"))[1], "turns=1")
+
+        # An explicit unknown id is created as-is
+        sid, _ = await reply(pool, "carol", "hi", session_id="carol-audit-1")
+        self.assertEqual(sid, "carol-audit-1")
+
+    # Test 2: Warm-up pins the model and builds the runners
+    async def test_warm_up(self):
+        """Check: warm_up resolves the string model once and registry pools are shared."""
+        registry = RunnerRegistry()
+        agent = make_agent()
+        pool = registry.register("test_app", agent, size=3)
+        self.assertIs(registry.register("test_app", make_agent()), pool)
+
+        await registry.warm_up()
+        self.assertIsInstance(agent.model, EchoLlm)
+        self.assertEqual(pool.stats()["runners"], 3)
+        self.assertEqual(pool.stats()["warmups"], 1)
+        with self.assertRaises(KeyError):
+            registry.get("unknown_app")
+
+    # Test 3: Bounded session maps, one first session per user
+    async def test_bounded_and_serialized(self):
+        """Check: concurrent first calls share one session; user maps stay within max_users."""
+        pool = RunnerPool(make_agent(), "test_app", max_users=2)
+        first = await asyncio.gather(*(pool.session_id_for("dave") for _ in range(5)))
+        self.assertEqual(len(set(first)), 1)
+        self.assertEqual(pool.stats()["sessions_created"], 1)
+        explicit = await asyncio.gather(*(pool.session_id_for("erin", "erin-1") for _ in range(3)))
+        self.assertEqual(explicit, ["erin-1"] * 3)
+
+        for user in ("frank", "grace", "heidi"):
+            await pool.session_id_for(user)
+        await pool.new_session("heidi")
+        self.assertEqual(pool.stats()["users"], 2)
+        self.assertLessEqual(len(pool._known_sessions), 2)
+        self.assertEqual(pool._user_locks, {})
+
+if __name__ == '__main__':
+    unittest.main()
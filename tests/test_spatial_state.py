@@ -0,0 +1,118 @@
+import unittest
+import sys
+import os
+import io
+import json
+import time
+from unittest import mock
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, os.path.join(parent_dir, 'my_agent'))
+
+from spatial_state import SpatialState, SUMMARY_MAX_SOURCES
+from fixture_schedule import iter_fixture_rows, FixtureScheduleError
+
+class TestSpatialStateStore(unittest.TestCase):
+
+    # Test 1: Running totals follow add/remove/update
+    def test_running_totals(self):
+        """Check: total lumens and Lux track bulk add, remove and update without re-summing."""
+        room = SpatialState(area_sqm=20, wall_reflection=0.5)
+        room.add_light_source("Main", 1500)
+        room.add_light_sources([{"name": f"Spot {i}", "lumens": 100, "x": i * 0.5, "y": 1.0} for i in range(8)])
+        self.assertEqual(room.source_count, 9)
+        self.assertAlmostEqual(room.total_lumens, 2300)
+        self.assertEqual(room.calculate_current_lux(), round(2300 * 1.25 / 20, 2))
+
+        self.assertEqual(room.update_light_sources({"Main": {"lumens": 1000}}), 1)
+        self.assertEqual(room.remove_light_sources(["Spot 0", "Spot 1"]), 2)
+        self.assertAlmostEqual(room.total_lumens, 1600)
+        self.assertEqual(room.source_names()[:2], ["Main", "Spot 2"])
+
+        room.remove_light_sources(room.source_names())
+        self.assertEqual(room.total_lumens, 0.0)
+        self.assertEqual(room.calculate_current_lux(), 0.0)
+
+    # Test 2: Compatibility view and positioned arrays
+    def test_light_sources_view(self):
+        """Check: light_sources keeps the old dict shape; only positioned sources reach the field."""
+        room = SpatialState()
+        room.add_light_source("Window", 5000)
+        room.add_light_source("Lamp", 800, x=1.0, y=2.0, height=2.4, beam_angle=90)
+        self.assertEqual(room.light_sources, [
+            {"name": "Window", "lumens": 5000.0},
+            {"name": "Lamp", "lumens": 800.0, "x": 1.0, "y": 2.0, "height": 2.4, "beam_angle": 90.0}
+        ])
+        self.assertEqual(room.positioned_arrays()["lumens"].tolist(), [800.0])
+
+        room.update_light_sources({"Lamp": {"x": None, "y": None}})
+        self.assertIsNone(room.positioned_arrays())
+        with self.assertRaises(ValueError):
+            room.update_light_sources({"Window": {"x": 1.0}})
+
+        # A bad update later in the batch leaves every source, total and the cached field untouched
+        room.set_dimensions(4.0, 5.0)
+        room.update_light_sources({"Lamp": {"x": 1.0, "y": 2.0}})
+        before = (room.light_sources, room.total_lumens, room.calculate_illuminance_field()["e_avg"])
+        for bad in ({"Window": {"lumens": 100}, "Lamp": {"y": None}}, {"Window": {"lumens": 100}, "Lamp": {"lumens": "bright"}}):
+            with self.assertRaises(ValueError):
+                room.update_light_sources(bad)
+            self.assertEqual((room.light_sources, room.total_lumens, room.calculate_illuminance_field()["e_avg"]), before)
+
+    # Test 3: Truncated summary
+    def test_summary_truncated(self):
+        """Check: large inventories list only the first sources plus a count and total."""
+        room = SpatialState(area_sqm=500)
+        room.add_light_sources({"name": f"Panel {i}", "lumens": 3000} for i in range(20000))
+        summary = room.get_summary()
+        self.assertIn(f"... and {20000 - SUMMARY_MAX_SOURCES} more (20000 sources, 60000000lm total)", summary)
+        self.assertNotIn(f"Panel {SUMMARY_MAX_SOURCES}", summary)
+
+    # Test 4: Streaming fixture import
+    def test_import_fixture_schedule(self):
+        """Check: CSV and JSON (array and JSON Lines) schedules import in batches."""
+        csv_text = "Name,Lumens,x_m,y_m,Mounting_Height_m\n" + "".join(
+            f"Downlight {i},{600 + i},{i % 10},{i // 10},2.7\n" for i in range(250)
+        ) + "Window,4000,,,\n"
+        room = SpatialState()
+        self.assertEqual(room.import_fixture_schedule(io.StringIO(csv_text), fmt="csv", batch_size=64), 251)
+        self.assertEqual(room.positioned_arrays()["height"].tolist(), [2.7] * 250)
+        self.assertAlmostEqual(room.total_lumens, sum(600 + i for i in range(250)) + 4000)
+
+        records = [{"name": f"Strip {i}", "lumens": 1200, "x": 1.5, "y": i * 0.1} for i in range(5000)]
+        for text in (json.dumps(records, indent=1), "\n".join(json.dumps(r) for r in records)):
+            rows = list(iter_fixture_rows(io.StringIO(text), fmt="json"))
+            self.assertEqual(len(rows), 5000)
+            self.assertEqual(rows[-1], {"name": "Strip 4999", "lumens": 1200.0, "x": 1.5, "y": 4999 * 0.1})
+
+        with self.assertRaises(FixtureScheduleError):
+            list(iter_fixture_rows(io.StringIO("name,lumens\nLamp,bright\n"), fmt="csv"))
+        with self.assertRaises(FixtureScheduleError):
+            list(iter_fixture_rows(io.StringIO('[{"name": "Lamp", "lumens": 800}, {"name": '), fmt="json"))
+
+    # Test 5: Summary cost stays bounded after a bulk import
+    def test_summary_bounded_after_import(self):
+        """Check: after importing many positioned fixtures the summary is fast; small rooms get a coarsened field."""
+        csv_text = "Name,Lumens,x_m,y_m\n" + "".join(
+            f"Downlight {i},800,{(i % 200) * 0.25},{(i // 200) * 0.2}\n" for i in range(20000))
+        room = SpatialState()
+        with mock.patch("sys.stdout"):
+            room.set_dimensions(50.0, 40.0)
+            room.import_fixture_schedule(io.StringIO(csv_text), fmt="csv")
+            room.update_light_sources({"Downlight 0": {"lumens": 900}})
+        start = time.perf_counter()
+        summary = room.get_summary()
+        self.assertLess(time.perf_counter() - start, 0.5)  # the full 0.1 m field took over a minute
+        self.assertIn("not computed for 20000 positioned sources", summary)
+
+        with mock.patch("sys.stdout"):
+            room.remove_light_sources([f"Downlight {i}" for i in range(100, 20000)])
+        start = time.perf_counter()
+        self.assertIn("point-by-point, 0.4 m grid", room.get_summary())  # 100 lamps: coarser grid
+        self.assertLess(time.perf_counter() - start, 0.5)
+        room.calculate_illuminance_field(0.1)
+        self.assertIn("point-by-point, 0.1 m grid", room.get_summary())  # a fresh full field is reused
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+from unittest import mock
+
+from fpdf import FPDF
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, os.path.join(parent_dir, 'my_agent'))
+
+from spec_extractor import extract_specs, extract_pdf_specs, extract_many, iter_pdf_paths
+from pdf_text import PdfTextExtractor
+
+# The datasheet text of scripts/create_pdf.py
+DATASHEET = """
+Product Data Sheet
+-----------------------------------
+Model Name: UltraLED WorkLight Pro
+Manufacturer: SpatialLighting Corp.
+
+Electrical Characteristics:
+- Power Consumption: 12 Watts
+- Input Voltage: 220-240V
+- Frequency: 50/60 Hz
+
+Photometric Data:
+- Luminous Flux: 1500 lumens
+- Color Temperature: 4000K (Neutral White)
+- Beam Angle: 120 degrees
+- Color Rendering Index (CRI): >80
+
+Application Notes:
+Suitable for home offices, garages, and study rooms.
+Replaces standard 100W incandescent bulb.
+"""
+
+def write_datasheet(path: str, text: str = DATASHEET):
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font("helvetica", size=12)
+    pdf.multi_cell(0, 10, text)
+    pdf.output(path)
+
+def values(result: dict) -> dict:
+    return {field: spec["value"] for field, spec in result["specs"].items()}
+
+class TestSpecExtractor(unittest.TestCase):
+
+    # Test 1: Labeled datasheet fields
+    def test_datasheet_fields(self):
+        """Check: every labeled field is read with high confidence; the 100W comparison is not the lamp's wattage."""
+        result = extract_specs(DATASHEET)
+        self.assertEqual(values(result), {"lumens": 1500, "watts": 12, "cct_kelvin": 4000, "cri": 80,
+                                          "beam_angle_deg": 120, "efficacy_lm_per_w": 125})
+        self.assertTrue(all(result["specs"][f]["confidence"] >= 0.95 for f in ("lumens", "watts", "cri")))
+        self.assertEqual(result["specs"]["cri"]["qualifier"], "min")
+        self.assertEqual(result["specs"]["watts"]["evidence"], "Power Consumption: 12 Watts")
+        self.assertEqual((result["missing"], result["needs_review"], result["warnings"]), ([], [], []))
+
+    # Test 2: Other layouts and confidence
+    def test_layouts_and_confidence(self):
+        """Check: unlabeled values score lower, equivalents are skipped, ranges/conflicts/bad efficacy are flagged."""
+        result = extract_specs("LED A19 800 lm 9W (60W equivalent) 2700K CRI 95+ Ra>90, 36° beam")
+        self.assertEqual(values(result)["watts"], 9)
+        self.assertEqual(result["specs"]["lumens"]["confidence"], 0.6)
+        self.assertEqual(result["needs_review"], ["lumens", "watts", "cct_kelvin"])
+        self.assertEqual((result["specs"]["cri"]["value"], result["specs"]["beam_angle_deg"]["value"]), (95, 36))
+
+        tunable = extract_specs("Lumens: 1,600. Wattage: 14. CCT: 2700-6500K")
+        self.assertEqual((values(tunable)["lumens"], values(tunable)["watts"]), (1600, 14))
+        self.assertEqual(tunable["specs"]["cct_kelvin"]["range"], [2700, 6500])
+
+        catalog = extract_specs("Model A: 800 lm, 9 W. Model B: 1100 lm, 12 W.")
+        self.assertEqual(catalog["specs"]["lumens"]["alternatives"], [1100])
+        self.assertEqual(catalog["needs_review"], ["lumens", "watts"])
+
+        misread = extract_specs("Luminous Flux: 1500 lm, Power: 1500 W")
+        self.assertIn("Implausible efficacy", misread["warnings"][0])
+        self.assertNotIn("efficacy_lm_per_w", misread["specs"])
+
+    # Test 3: PDFs, one and many
+    def test_pdf_and_bulk(self):
+        """Check: specs come out of real PDFs; the bulk run covers every file in worker processes, errors included."""
+        with tempfile.TemporaryDirectory() as tmp:
+            for i, lumens in enumerate((800, 1500, 2600)):
+                write_datasheet(os.path.join(tmp, f"sheet_{i}.pdf"), DATASHEET.replace("1500 lumens", f"{lumens} lumens"))
+            with open(os.path.join(tmp, "broken.pdf"), "wb") as f:
+                f.write(b"not a pdf")
+            paths = list(iter_pdf_paths(tmp))
+            self.assertEqual(len(paths), 4)
+
+            single = extract_pdf_specs(paths[1], extractor=PdfTextExtractor(workers=1))
+            self.assertEqual((single["pages_scanned"], values(single)["lumens"]), (1, 800))
+
+            results = {os.path.basename(r["file"]): r for r in extract_many(paths, workers=2)}
+            self.assertIn("error", results["broken.pdf"])
+            self.assertEqual([values(results[f"sheet_{i}.pdf"])["lumens"] for i in range(3)], [800, 1500, 2600])
+
+    # Test 4: Agent tool
+    def test_agent_tool(self):
+        """Check: the agent tool returns the small JSON result, not the page text."""
+        import agent
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "datasheet.pdf")
+            write_datasheet(path)
+            with mock.patch("sys.stdout"):
+                output = agent.extract_datasheet_specs(path)
+            self.assertEqual(json.loads(output)["specs"]["beam_angle_deg"]["value"], 120)
+            self.assertNotIn("Suitable for home offices", output)
+            self.assertIn("not found", agent.extract_datasheet_specs(os.path.join(tmp, "missing.pdf")))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+import sys
+import os
+import tempfile
+from unittest import mock
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, os.path.join(parent_dir, 'my_agent'))
+
+from standards_kb import StandardsKB, parse_sections, tokenize, estimate_tokens, KB_PATH
+
+SAMPLE = """Preamble text.
+# Standards
+## Protocols
+### Zigbee
+- Requires Hub: YES (Philips Hue Bridge).
+### Wi-Fi
+- Requires Hub: NO. Connects to the router.
+```
+# not a heading, just a code comment
+```
+## Dimmers
+- Never use standard wall dimmers with smart bulbs; they flicker.
+"""
+
+class TestStandardsKB(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "kb.md")
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write(SAMPLE)
+        self.kb = StandardsKB(self.path)
+
+    # Test 1: Heading-delimited sections
+    def test_parse_sections(self):
+        """Check: sections follow headings (not inside code fences); empty parents only appear in paths."""
+        sections = parse_sections(SAMPLE.splitlines(keepends=True))
+        self.assertEqual([s["path"] for s in sections],
+                         ["", "Standards > Protocols > Zigbee", "Standards > Protocols > Wi-Fi", "Standards > Dimmers"])
+        self.assertIn("# not a heading", sections[2]["text"])
+        self.assertEqual(tokenize("Wi-Fi Hubs switches"), ["wifi", "wi", "fi", "hub", "switch"])
+
+    # Test 2: Relevant sections within the budget
+    def test_search_ranks_and_budget(self):
+        """Check: the most relevant section ranks first, unrelated ones are left out, the budget holds."""
+        results = self.kb.search("Does Wi-Fi need a hub?")
+        self.assertEqual(results[0]["path"], "Standards > Protocols > Wi-Fi")
+        self.assertNotIn("Standards > Dimmers", [r["path"] for r in results])
+        self.assertEqual(self.kb.search("wall dimmer flicker", top_k=1)[0]["path"], "Standards > Dimmers")
+        self.assertEqual(self.kb.search("quantum chromodynamics"), [])
+
+        tight = self.kb.search("hub", top_k=3, token_budget=20)
+        self.assertLessEqual(sum(r["tokens"] for r in tight), 20)
+        tiny = self.kb.search("dimmers smart bulbs", token_budget=10)
+        self.assertTrue(tiny[0]["text"].endswith("…[truncated]"))
+
+    # Test 3: mtime-invalidated cache
+    def test_cache_invalidation(self):
+        """Check: the file is parsed once while unchanged and re-indexed after an edit."""
+        self.kb.search("zigbee")
+        self.kb.search("matter")
+        self.assertEqual(self.kb.stats()["loads"], 1)
+
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("## Matter\n- Needs a Matter controller.\n")
+        st = os.stat(self.path)
+        os.utime(self.path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+        self.assertEqual(self.kb.search("matter controller")[0]["path"], "Standards > Matter")
+        self.assertEqual(self.kb.stats()["loads"], 2)
+
+    # Test 4: The agent tool returns only relevant sections
+    def test_consult_standards_kb_tool(self):
+        """Check: the tool returns the matching sections, an outline when nothing matches, and an error without a file."""
+        import agent
+        with mock.patch("sys.stdout"):
+            answer = agent.consult_standards_kb("Philips Hue bridge Zigbee compatibility")
+            with mock.patch.object(agent, "standards_kb", self.kb):
+                outline = agent.consult_standards_kb("quantum chromodynamics")
+            with mock.patch.object(agent, "standards_kb", StandardsKB(self.path + ".missing")):
+                missing = agent.consult_standards_kb("zigbee")
+
+        with open(KB_PATH, "r", encoding="utf-8") as f:
+            full = f.read()
+        self.assertIn("Requires Hub**: YES", answer)
+        self.assertNotIn("Lighting Norms", answer)
+        self.assertLess(estimate_tokens(answer), estimate_tokens(full))
+        self.assertIn("Available sections", outline)
+        self.assertIn("Standards > Dimmers", outline)
+        self.assertTrue(missing.startswith("Error: Knowledge Base file not found"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+import unittest
+import sys
+import os
+import threading
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, os.path.join(parent_dir, 'my_agent'))
+
+from spatial_state import SpatialState
+from state_store import SessionStateStore
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class TestSessionStateStore(unittest.TestCase):
+
+    # Test 1: Sessions are isolated
+    def test_sessions_isolated(self):
+        """Check: concurrent sessions each see only their own lights."""
+        store = SessionStateStore()
+
+        def audit(session_id):
+            for i in range(50):
+                with store.session(session_id) as room:
+                    room.add_light_source(f"{session_id}-{i}", 100)
+
+        threads = [threading.Thread(target=audit, args=(f"s{n}",)) for n in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        for n in range(4):
+            with store.session(f"s{n}") as room:
+                self.assertEqual(room.source_count, 50)
+                self.assertTrue(all(name.startswith(f"s{n}-") for name in room.source_names()))
+
+    # Test 2: LRU and TTL eviction
+    def test_lru_and_ttl_eviction(self):
+        """Check: the least recently used idle session goes first; idle sessions expire after the TTL."""
+        clock = FakeClock()
+        store = SessionStateStore(max_sessions=2, ttl_s=60, clock=clock)
+        for session_id in ("a", "b"):
+            with store.session(session_id):
+                pass
+        with store.session("a"):
+            pass
+        with store.session("c"):
+            pass
+        self.assertEqual(sorted(s for s in ("a", "b", "c") if s in store), ["a", "c"])
+
+        clock.now = 30
+        with store.session("c"):
+            pass
+        clock.now = 61
+        store.evict_expired()
+        self.assertNotIn("a", store)
+        self.assertIn("c", store)
+        self.assertEqual(store.stats()["expired"], 1)
+
+    # Test 3: Memory cap never evicts a session in use
+    def test_memory_cap(self):
+        """Check: over the memory budget, idle sessions are evicted but the active one survives."""
+        store = SessionStateStore(memory_mb=0.05)
+        with store.session("idle") as room:
+            room.add_light_sources({"name": "Panel", "lumens": 100} for _ in range(200))
+        with store.session("active") as room:
+            room.add_light_sources({"name": "Panel", "lumens": 100} for _ in range(2000))
+            self.assertIn("active", store)
+        self.assertNotIn("idle", store)
+        self.assertIn("active", store)
+
+    # Test 4: Snapshot / restore round trip
+    def test_snapshot_restore(self):
+        """Check: a session moves between stores as compact bytes with identical state."""
+        source = SessionStateStore()
+        with source.session("audit") as room:
+            room.set_dimensions(4.0, 5.0)
+            room.add_light_source("Window", 5000)
+            room.add_light_source("Desk Lämp", 800, x=1.0, y=2.0, height=2.4, beam_angle=90)
+            expected = room.get_summary()
+        blob = source.snapshot("audit")
+        self.assertTrue(blob.startswith(b"SPST"))
+        self.assertIsNone(source.snapshot("unknown"))
+
+        target = SessionStateStore()
+        target.restore("audit", blob)
+        with target.session("audit") as room:
+            self.assertEqual(room.get_summary(), expected)
+            self.assertEqual(room.light_sources[1]["name"], "Desk Lämp")
+
+        with self.assertRaises(ValueError):
+            SpatialState.from_bytes(b"not a snapshot")
+
+    # Test 5: A session in use cannot be dropped
+    def test_drop_in_use(self):
+        """Check: drop refuses a checked-out session, so memory accounting and the room stay consistent."""
+        store = SessionStateStore()
+        with store.session("busy") as room:
+            room.add_light_sources({"name": "Panel", "lumens": 100} for _ in range(500))
+            with self.assertRaises(RuntimeError):
+                store.drop("busy")
+            with store.session("busy") as same:
+                self.assertIs(same, room)
+        used = store.stats()["memory_mb"]
+        self.assertGreater(used, 0)
+        self.assertTrue(store.drop("busy"))
+        self.assertFalse(store.drop("busy"))
+        self.assertEqual(store.stats()["memory_mb"], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import unittest
+import sys
+import os
+import io
+import json
+import time
+import asyncio
+from unittest import mock
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, os.path.join(parent_dir, 'my_agent'))
+
+from tariff_table import TariffTable, TariffTableError, TARIFF_TABLE_PATH
+from physics_engine import calculate_roi_and_savings
+
+PRODUCT_QUESTION = "How much does a dimmable 800 lumen Philips bulb cost in New York"
+
+class TestTariffTable(unittest.TestCase):
+
+    def setUp(self):
+        self.table = TariffTable(TARIFF_TABLE_PATH)
+        with mock.patch("sys.stdout"):
+            self.table.warm_up()
+
+    def location(self, text):
+        entry = self.table.resolve(text)
+        return entry and entry["location"]
+
+    # Test 1: Names, aliases, codes and prefixes
+    def test_resolve_locations(self):
+        """Check: free text resolves through names, aliases, codes and unique prefixes to the most specific entry."""
+        self.assertEqual(self.location("Electricity rate in New York"), "New York, United States")
+        self.assertEqual(self.location("NYC power cost per kWh?"), "New York City, New York, United States")
+        self.assertEqual(self.location("Washington, D.C."), "District of Columbia, United States")
+        self.assertEqual(self.location("rates in calif"), "California, United States")
+        self.assertEqual(self.location("San Francisco, California"), "San Francisco, California, United States")
+        self.assertEqual(self.location("London"), "London, United Kingdom")
+        self.assertIsNone(self.location("electricity rate"))
+        self.assertIsNone(self.location("Reykjavik"))
+
+    # Test 2: Ambiguous cities
+    def test_ambiguous_cities(self):
+        """Check: a named state or code picks between same-named cities; unknown cities fall back to the (last named) state."""
+        self.assertEqual(self.location("Springfield, MA"), "Springfield, Massachusetts, United States")
+        self.assertEqual(self.location("springfield illinois"), "Springfield, Illinois, United States")
+        self.assertEqual(self.location("Portland, ME"), "Portland, Maine, United States")
+        self.assertEqual(self.location("Portland OR"), "Portland, Oregon, United States")
+        self.assertEqual(self.location("Columbus, Georgia"), "Georgia, United States")
+        self.assertEqual(self.location("RATE IN OHIO"), "Ohio, United States")  # "IN" is not Indiana here
+        # CA is California and Canada: the state unless a Canadian place is named
+        self.assertEqual(self.location("Los Angeles, CA"), "Los Angeles, California, United States")
+        self.assertEqual(self.location("San Francisco, CA"), "San Francisco, California, United States")
+        self.assertEqual(self.location("Toronto, CA"), "Toronto, Ontario, Canada")
+        self.assertEqual(self.location("Kansas City, Missouri"), "Missouri, United States")  # the "City, State" state
+
+    # Test 3: Market records, stats and malformed tables
+    def test_lookup_record_and_errors(self):
+        """Check: lookup returns a market rate record with its effective date; bad rows raise TariffTableError."""
+        record = self.table.lookup("What is the electricity rate in Seattle?")
+        self.assertEqual(record["type"], "rate")
+        self.assertEqual(record["rate_usd_kwh"], 0.13)
+        self.assertEqual(record["effective_date"], "2024-12-31")
+        self.assertTrue(record["source"].startswith("Local tariff table"))
+
+        with self.assertRaises(TariffTableError):
+            TariffTable().load(io.StringIO("country,rate_usd_kwh\nNowhere,cheap\n"), fmt="csv")
+
+    # Test 4: Bulk ROI runs resolve rates locally
+    def test_bulk_roi_without_network(self):
+        """Check: ROI by location uses the table (default when unknown); 5000 sites take well under a second."""
+        with mock.patch("sys.stdout"):
+            given = json.loads(calculate_roi_and_savings(60, 9, kwh_cost_usd=0.20))
+            boston = json.loads(calculate_roi_and_savings(60, 9, location="Boston, MA"))
+            unknown = json.loads(calculate_roi_and_savings(60, 9, location="Atlantis"))
+        self.assertEqual((given["kwh_cost_usd"], given["rate_source"]), (0.20, "Given"))
+        self.assertEqual(boston["kwh_cost_usd"], 0.30)
+        self.assertIn("Boston", boston["rate_source"])
+        self.assertEqual((unknown["kwh_cost_usd"], unknown["rate_source"]), (0.17, "US average default"))
+
+        sites = ["Springfield, MA", "Austin, TX", "Honolulu", "Denver", "Ohio"] * 1000
+        start = time.perf_counter()
+        rates = [self.table.resolve(site)["rate_usd_kwh"] for site in sites]
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertEqual(rates[:5], [0.31, 0.13, 0.41, 0.15, 0.165])
+        self.assertEqual(self.table.stats()["cache_hits"], 4995)
+
+    # Test 5: Market tool answers known locations locally
+    def test_market_tool_uses_table(self):
+        """Check: rate questions for known locations never reach the market agent; product questions never get a tariff."""
+        import agent
+        remote = mock.AsyncMock(return_value={"type": "rate", "location": "Remote", "rate_usd_kwh": 0.5})
+        with mock.patch.object(agent, "tariff_table", self.table), \
+             mock.patch.object(agent, "search_product_data_async", remote), mock.patch("sys.stdout"):
+            local = json.loads(asyncio.run(agent.search_market_tool("Electricity rate in Denver")))
+            miss = json.loads(asyncio.run(agent.search_market_tool("Electricity rate in Reykjavik")))
+            product = json.loads(asyncio.run(agent.search_market_tool(PRODUCT_QUESTION)))
+        self.assertEqual(local["location"], "Denver, Colorado, United States")
+        self.assertEqual(miss["location"], "Remote")
+        self.assertEqual(product["location"], "Remote")  # a lamp price in New York, not its tariff
+        self.assertEqual([c.args[0] for c in remote.await_args_list], ["Electricity rate in Reykjavik", PRODUCT_QUESTION])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+import sys
+import os
+import time
+import asyncio
+import threading
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, os.path.join(parent_dir, 'my_agent'))
+
+from google.adk.agents import Agent
+from google.adk.models import BaseLlm, LlmResponse
+from google.adk.tools import FunctionTool, ToolContext
+from google.genai import types
+
+from runner_registry import RunnerPool
+from tool_executor import offload, tool_executor_stats
+
+class FanOutLlm(BaseLlm):
+    """Offline model: first turn calls every tool in `calls` at once, then answers."""
+    calls: list = []
+
+    async def generate_content_async(self, llm_request, stream=False):
+        if any(c.role == "model" for c in llm_request.contents):
+            yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text="done")]))
+            return
+        parts = [types.Part(function_call=types.FunctionCall(name=name, args=args)) for name, args in self.calls]
+        yield LlmResponse(content=types.Content(role="model", parts=parts))
+
+def read_datasheet(path: str, tool_context: ToolContext = None) -> str:
+    """Blocking read of a datasheet."""
+    time.sleep(0.2)
+    return f"{path} read on {threading.current_thread().name} for {tool_context.session.user_id}"
+
+async def search_rate(city: str) -> str:
+    """Remote rate search."""
+    await asyncio.sleep(0.2)
+    return f"rate for {city}"
+
+class TestToolExecutor(unittest.IsolatedAsyncioTestCase):
+
+    # Test 1: The model sees the same tool
+    def test_offload_keeps_declaration(self):
+        """Check: offloaded tools keep name, docstring and declaration; tool_context stays hidden."""
+        wrapped = offload(read_datasheet)
+        self.assertEqual((wrapped.__name__, wrapped.__doc__), (read_datasheet.__name__, read_datasheet.__doc__))
+        declaration = FunctionTool(wrapped)._get_declaration()
+        self.assertEqual(declaration, FunctionTool(read_datasheet)._get_declaration())
+        self.assertEqual(list(declaration.parameters.properties), ["path"])
+
+    # Test 2: Independent calls of one turn overlap, results keep call order
+    async def test_parallel_calls_in_one_turn(self):
+        """Check: blocking and async calls of one turn overlap off the loop; responses keep the call order."""
+        calls = [("read_datasheet", {"path": "a.pdf"}), ("search_rate", {"city": "Ohio"}), ("read_datasheet", {"path": "b.pdf"})]
+        model = FanOutLlm(model="stub", calls=calls)
+        pool = RunnerPool(Agent(name="fanout_agent", model=model, instruction="Go.",
+                                tools=[offload(read_datasheet), search_rate]), "fanout_test")
+        session_id = await pool.session_id_for("alice")
+        before = tool_executor_stats()["calls"]
+
+        responses, elapsed = [], None
+        start = time.perf_counter()
+        async for event in pool.run_async("alice", session_id, types.Content(role="user", parts=[types.Part(text="go")])):
+            if event.get_function_responses():
+                elapsed = time.perf_counter() - start
+                responses = [r.response["result"] for r in event.get_function_responses()]
+
+        self.assertLess(elapsed, 0.4)  # 3 x 0.2 s if run one after another
+        self.assertEqual([r.split(" ")[0] for r in responses], ["a.pdf", "rate", "b.pdf"])
+        self.assertIn("agent-tool", responses[0])
+        self.assertTrue(responses[0].endswith("for alice"))
+        self.assertEqual(tool_executor_stats()["calls"] - before, 2)
+        self.assertGreaterEqual(tool_executor_stats()["max_running"], 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+import unittest
+import sys
+import os
+import io
+import json
+import contextlib
+from types import SimpleNamespace
+from unittest import mock
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, os.path.join(parent_dir, 'my_agent'))
+
+from google.adk.agents import Agent
+from google.adk.models import BaseLlm, LlmResponse
+from google.adk.tools import FunctionTool
+from google.genai import types
+
+from physics_engine import calculate_lux_at_point, generate_optimization_report
+from runner_registry import RunnerPool
+from state_store import SessionStateStore, RoomSnapshotStore
+from tool_memo import ToolMemo
+
+def context(user_id: str, session_id: str):
+    """Just enough of a ToolContext for the room tools."""
+    return SimpleNamespace(session=SimpleNamespace(user_id=user_id, id=session_id))
+
+def session_of(tool_context) -> str:
+    return "" if tool_context is None else tool_context.session.id
+
+class RepeatLlm(BaseLlm):
+    """Offline model: calls calculate_lux_at_point once per model call (same arguments), answers on the third."""
+    answered_after: int = 3
+
+    async def generate_content_async(self, llm_request, stream=False):
+        responses = sum(1 for c in llm_request.contents for p in c.parts if p.function_response)
+        if responses >= self.answered_after:
+            yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text="done")]))
+            return
+        call = types.FunctionCall(name="calculate_lux_at_point",
+                                  args={"light_lumens": 800, "distance_meters": 2.0 if responses else 2})
+        yield LlmResponse(content=types.Content(role="model", parts=[types.Part(function_call=call)]))
+
+class TestToolMemo(unittest.IsolatedAsyncioTestCase):
+
+    # Test 1: The model sees the same tool
+    def test_keeps_declaration(self):
+        """Check: memoized tools keep name, docstring and declaration; the added tool_context stays hidden."""
+        memo = ToolMemo()
+        for fn in (calculate_lux_at_point, generate_optimization_report):
+            wrapped = memo.memoize(fn, session_key=session_of)
+            self.assertEqual((wrapped.__name__, wrapped.__doc__), (fn.__name__, fn.__doc__))
+            self.assertEqual(FunctionTool(wrapped)._get_declaration(), FunctionTool(fn)._get_declaration())
+
+    # Test 2: Hits skip the tool; keys are normalized and per session
+    def test_hits_skip_execution(self):
+        """Check: a repeat (60 vs 60.0, defaults spelled out) is a silent hit; other sessions and arguments miss."""
+        memo = ToolMemo()
+        lux = memo.memoize(calculate_lux_at_point, session_key=session_of)
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            first = lux(800, 2, tool_context=context("alice", "s1"))
+        self.assertIn("[PHYSICS ENGINE]", out.getvalue())
+
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            again = lux(light_lumens=800.0, distance_meters=2.0, beam_angle_degrees=120, tool_context=context("alice", "s1"))
+        self.assertEqual((again, out.getvalue()), (first, ""))
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            lux(800, 2, tool_context=context("bob", "s2"))
+            lux(800, 3, tool_context=context("alice", "s1"))
+            lux(800, 2)
+        stats = memo.stats()
+        self.assertEqual((stats["hits"], stats["calls"], stats["entries"]), (1, 5, 4))
+        self.assertEqual(stats["tools"]["calculate_lux_at_point"], {"hits": 1, "misses": 4})
+
+        small = ToolMemo(max_entries=2)
+        health = small.memoize(lambda lux_level: f"{lux_level} lux")
+        for level in (100, 200, 300, 100):
+            health(level)
+        self.assertEqual(small.stats()["hits"], 0)  # 100 was evicted before it came back
+
+    # Test 3: Room changes invalidate state-dependent results
+    def test_state_version(self):
+        """Check: writes bump the session version, reads do not; a scenes config is recomputed after a new light."""
+        store = SessionStateStore()
+        self.assertNotEqual(store.version("audit"), store.version("audit"))  # unknown: never current
+        with store.session("audit") as room:
+            room.add_light_source("Panel", 800)
+        written = store.version("audit")
+        with store.session("audit", readonly=True):
+            pass
+        store.snapshot("audit")
+        self.assertEqual(store.version("audit"), written)
+        with store.session("audit"):
+            pass
+        self.assertGreater(store.version("audit"), written)
+
+        import agent
+        self.enterContext(mock.patch.object(agent, "room_snapshots", RoomSnapshotStore(None)))
+        tool_context = context("memo_user", "memo_session")
+        scenes = [tool for tool in agent.root_agent.tools if tool.__name__ == "generate_scenarios_config"][0]
+        hits = agent.tool_memo.stats()["tools"]["generate_scenarios_config"]["hits"]
+        with contextlib.redirect_stdout(io.StringIO()):
+            agent.add_light_to_room("Desk Lamp", 800, tool_context=tool_context)
+            self.assertEqual(json.loads(scenes("Office", tool_context=tool_context))["devices"], ["Desk Lamp"])
+            scenes("Office", tool_context=tool_context)
+            agent.add_light_to_room("Ceiling", 2000, tool_context=tool_context)
+            devices = json.loads(scenes("Office", tool_context=tool_context))["devices"]
+        self.assertEqual(devices, ["Desk Lamp", "Ceiling"])
+        self.assertEqual(agent.tool_memo.stats()["tools"]["generate_scenarios_config"]["hits"] - hits, 1)
+
+    # Test 4: Through the ADK runner
+    async def test_repeated_calls_in_a_conversation(self):
+        """Check: within one agent run, the repeated tool calls are answered from the cache with the same result."""
+        memo = ToolMemo()
+        executed = []
+
+        def calculate_lux_at_point(light_lumens: float, distance_meters: float, beam_angle_degrees: float = 120) -> str:
+            """Calculates lux at a point."""
+            executed.append(light_lumens)
+            return f"{light_lumens / distance_meters ** 2:.1f}"
+
+        tool = memo.memoize(calculate_lux_at_point, session_key=session_of)
+        pool = RunnerPool(Agent(name="memo_agent", model=RepeatLlm(model="stub"), instruction="Go.", tools=[tool]),
+                          "memo_test")
+        session_id = await pool.session_id_for("alice")
+        results = []
+        async for event in pool.run_async("alice", session_id, types.Content(role="user", parts=[types.Part(text="go")])):
+            results += [r.response["result"] for r in event.get_function_responses()]
+
+        self.assertEqual(results, ["200.0"] * 3)
+        self.assertEqual(len(executed), 1)
+        self.assertEqual(memo.stats()["tools"]["calculate_lux_at_point"], {"hits": 2, "misses": 1})
+
+if __name__ == '__main__':
+    unittest.main()